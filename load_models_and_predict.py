@@ -7,6 +7,7 @@ import os
 from tools_calculate import get_day_of_week
 from tools_filter import clean_dataframe_nulls, sort_dataframe, identify_landing_runway_scenario
 from tools_import import load_and_process_parquet_files
+from tools_index import build_icao24_index, load_index, save_index
 
 results_csv_path = "engage-hackaton-checkpoint/checkpoint_YourTeamName_option1.csv"
 base_path = "engage-hackaton-checkpoint"
@@ -33,14 +34,24 @@ def process_scenarios(base_path, results_csv_path):
     icao24_list = list(checkpoint_df['icao24'].dropna().unique())
     print("Filtered ICAO24s:", icao24_list)
 
+    # Index the aircraft present in each scenario file, so that only the files with the
+    # filtered ICAO24s are opened
+    folder_paths = glob.glob(f"{base_path}/scenarios/*.parquet")
+    icao24_index_path = f"output/{os.path.basename(base_path)}_icao24_index.parquet"
+    if os.path.exists(icao24_index_path):
+        icao24_index = load_index(icao24_index_path)
+    else:
+        icao24_index = build_icao24_index(folder_paths)
+        save_index(icao24_index, icao24_index_path)
+
     # Load parquet files that match the filtered ICAO24s
     df_list = []
-    folder_paths = glob.glob(f"{base_path}/scenarios/*.parquet")
     for file in folder_paths:
         df = load_and_process_parquet_files(
             [file],
             icao24_list=icao24_list,
-            columns_to_extract=['df', 'icao24', 'ts', 'altitude', 'lat_deg', 'lon_deg']
+            columns_to_extract=['df', 'icao24', 'ts', 'altitude', 'lat_deg', 'lon_deg'],
+            icao24_index=icao24_index
         )
         df_list.append(df)
 
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+This script builds the sidecar indexes of the raw hourly ADS-B parquet files, used by the loaders
+to skip the files and row groups that cannot contain the requested data.
+"""
+from datetime import datetime
+
+from tools_import import scan_adsb_dataset
+from tools_index import build_spatial_index, build_icao24_index, build_catalog, save_index, SIDECAR_INDEXES
+
+
+def main():
+
+    # Raw dataset and index location
+    base_path = 'data/engage-hackathon-2025'
+    index_dir = 'data/engage-hackathon-2025-index'
+
+    # Date range
+    start_dt = datetime(2024, 11, 16, 0)
+    end_dt = datetime(2025, 2, 16, 23)
+
+    # Files to index
+    dataset = scan_adsb_dataset(base_path, start_dt, end_dt)
+
+    # Footer catalog (row counts, sizes, time ranges, null counts)
+    catalog = build_catalog(dataset.files, workers=8)
+    save_index(catalog, f"{index_dir}/{SIDECAR_INDEXES['catalog']}")
+
+    # Spatial index, with 0.1 deg tiles
+    spatial_index = build_spatial_index(dataset.files, tile_size=0.1, workers=8)
+    save_index(spatial_index, f"{index_dir}/{SIDECAR_INDEXES['spatial_index']}")
+
+    # icao24 membership index
+    icao24_index = build_icao24_index(dataset.files, workers=8)
+    save_index(icao24_index, f"{index_dir}/{SIDECAR_INDEXES['icao24_index']}")
+
+
+if __name__ == '__main__':
+    main()
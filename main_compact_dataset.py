@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+This script compacts the raw hourly ADS-B parquet files into a sorted, pruned store, one file per day.
+Running it again only compacts the days with new or modified hourly files.
+"""
+from datetime import date
+
+from tools_store import compact_adsb_dataset
+
+
+def main():
+
+    # Raw dataset and compacted store
+    base_path = 'data/engage-hackathon-2025'
+    store_path = 'data/engage-hackathon-2025-compact'
+
+    # Date range
+    start_year, start_month, start_day = [2024, 11, 16]
+    end_year, end_month, end_day = [2025, 2, 16]
+
+    # Geographical box around Madrid kept in the store
+    bounds = [40.3, 40.8, -3.8, -3.3]  # [deg]
+
+    compact_adsb_dataset(base_path, store_path,
+                         date(start_year, start_month, start_day),
+                         date(end_year, end_month, end_day),
+                         bounds=bounds, workers=8)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,16 +1,44 @@
 #!/usr/bin/env python3
 """
 This script processes ADS-B data stored in a parquet file, for 1 day
+
+Usage:
+    python main_extract_filtered_data_per_day.py [--workers N] [--max-memory-mb MB] [--prefetch-depth N]
+                                                 [--incremental | --full]
 """
+import argparse
 import os
 from datetime import date, timedelta
 
 from tools_import import generate_dates_list
-from tools_process import process_adsb_data_1day
+from tools_process import process_adsb_data_1day, process_adsb_days_incremental, process_adsb_days_parallel, \
+    prefetch_adsb_days, missing_day_files
 
 
 def main():
 
+    # Days are processed in parallel worker processes when --workers is greater than 1
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--workers', type=int, default=1, help='Number of days processed in parallel')
+    parser.add_argument('--max-memory-mb', type=int, default=None,
+                        help='Resident memory cap of each worker process [MB], a soft cap checked twice a second')
+    parser.add_argument('--prefetch-depth', type=int, default=1,
+                        help='Number of days loaded in the background while a day is processed (single worker)')
+    parser.add_argument('--index-dir', default=None,
+                        help='Directory of the sidecar indexes built by main_build_index.py, to only load the '
+                             'points near the airport')
+    parser.add_argument('--max-in-flight-mb', type=int, default=None,
+                        help='Maximum size of the files of a day being loaded at the same time [MB], measured '
+                             'with the footer catalog of --index-dir when available')
+    # Incremental mode: only process the days with new or changed hours, and update the combined
+    # training and statistics files (see tools_process.process_adsb_days_incremental)
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--incremental', dest='incremental', action='store_true', default=False,
+                      help='Only process the days with new or changed hours')
+    mode.add_argument('--full', dest='incremental', action='store_false',
+                      help='Process every day of the period (default)')
+    args = parser.parse_args()
+
     # Output directory
     output_dir = 'output/training_data'
     os.makedirs(output_dir, exist_ok=True)
@@ -26,9 +54,24 @@ def main():
     # Generate list of dates from start_date to end_date inclusive
     dates_list = [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)]
 
+    # Options shared by all the processing modes
+    max_in_flight_bytes = args.max_in_flight_mb * 2**20 if args.max_in_flight_mb is not None else None
+    options = dict(index_dir=args.index_dir, max_in_flight_bytes=max_in_flight_bytes)
+
     # Process all dates
-    for dt in dates_list:
-        process_adsb_data_1day(dt.year, dt.month, dt.day, output_dir=output_dir)
+    if args.incremental:
+        process_adsb_days_incremental(start_date, end_date, output_dir=output_dir,
+                                      processes=args.workers, max_memory_mb=args.max_memory_mb,
+                                      prefetch_depth=args.prefetch_depth, **options)
+    elif args.workers > 1:
+        process_adsb_days_parallel(dates_list, output_dir=output_dir,
+                                   processes=args.workers, max_memory_mb=args.max_memory_mb, **options)
+    else:
+        # The next days are loaded in the background while the current one is processed, but for their cached hours
+        for dt, data in prefetch_adsb_days(dates_list, depth=args.prefetch_depth, **options,
+                                           pending_files=lambda day: missing_day_files(day, output_dir=output_dir,
+                                                                                        **options)):
+            process_adsb_data_1day(dt.year, dt.month, dt.day, output_dir=output_dir, preloaded=data, **options)
 
 
 if __name__ == '__main__':
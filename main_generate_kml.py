@@ -10,8 +10,7 @@ Example:
 import os
 import sys
 
-import pandas as pd
-
+from tools_cache import save_stage_cache, load_stage_cache
 from tools_filter import filter_dataframe_by_bounds, filter_dataframe_by_altitude, sort_dataframe
 from tools_import import load_parquet_files
 from tools_export import export_trajectories_to_kml, export_trajectories_to_csv
@@ -29,12 +28,12 @@ def main():
     output_kml = sys.argv[5]
 
     # Define a cache file path (adjust folder as needed)
-    cache_file = f"output/main_generate_kml_cached_df_{year}_{month:02d}_{day:02d}.pkl"
+    cache_file = f"output/main_generate_kml_cached_df_{year}_{month:02d}_{day:02d}.arrow"
 
     # If the cache file exists, load the dataframe from it.
     if os.path.exists(cache_file):
         print(f"Loading cached dataframe from {cache_file} ...")
-        df = pd.read_pickle(cache_file)
+        df = load_stage_cache(cache_file)
     else:
         print("Cache file not found. Processing data ...")
 
@@ -59,7 +58,7 @@ def main():
 
         # Save the dataframe to cache for future runs
         print(f"Saving processed dataframe to cache file {cache_file} ...")
-        df.to_pickle(cache_file)
+        save_stage_cache(df, cache_file)
 
     # Export dataframe to CSV
     export_trajectories_to_csv(df, output_csv)
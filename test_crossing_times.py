@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Accuracy of the interpolated FAP and threshold crossing times (tools_projection.find_axis_crossings) when the
+data is downsampled, compared with the timestamps of the nearest samples (identify_landing_runway_strategies),
+on one day of data prepared as in tools_process.process_adsb_data_1day. The reference of each method is its
+result at full rate.
+"""
+import contextlib
+import io
+import time
+
+import numpy as np
+
+from tools_filter import identify_segments, sort_dataframe, filter_dataframe_by_bounds, filter_dataframe_by_altitude, \
+    clean_dataframe_nulls, extract_adsb_columns, downsample_dataframe, identify_landing_runway_strategies
+from tools_import import load_parquet_files
+from tools_projection import find_axis_crossings
+
+
+def landing_times(df):
+    """
+    Nearest-sample and interpolated delta_time [s] of each landing, indexed by (icao24, segment).
+    """
+    df, _ = identify_segments(df)
+    df = filter_dataframe_by_bounds(df, 40.3, 40.8, -3.8, -3.3)
+    df = filter_dataframe_by_altitude(df, -1000, 10000)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        _, basic_info_df, _ = identify_landing_runway_strategies(df, ['fap'])['fap']
+    basic_info_df['segment'] = df.loc[basic_info_df['idx_thr'], 'segment'].to_numpy()
+    nearest = basic_info_df.set_index(['icao24', 'segment'])['delta_time']
+
+    start = time.perf_counter()
+    crossings = find_axis_crossings(df)
+    elapsed = time.perf_counter() - start
+    interpolated = crossings.set_index(['icao24', 'segment'])['delta_time']
+    return nearest, interpolated, len(df), elapsed
+
+
+def main():
+
+    # Date
+    year = 2024
+    month = 11
+    day = 16
+
+    # Downsampling intervals [s]
+    intervals = [2, 5, 10]
+
+    df = load_parquet_files(year, month, day, 0, year, month, day, 23, base_path="data/engage-hackathon-2025")
+    df = clean_dataframe_nulls(df, ['altitude', 'lat_deg', 'lon_deg'])
+    df = sort_dataframe(extract_adsb_columns(df))
+
+    nearest_ref, interpolated_ref, n_points, elapsed = landing_times(df)
+    print(f"Full rate: {n_points} points, {len(interpolated_ref)} of {len(nearest_ref)} landings with both "
+          f"crossings, crossings found in {elapsed:.3f} s")
+
+    for interval in intervals:
+        nearest, interpolated, n_points, _ = landing_times(downsample_dataframe(df, interval))
+        error_nearest = np.abs(nearest - nearest_ref.reindex(nearest.index)).dropna()
+        error_interpolated = np.abs(interpolated - interpolated_ref.reindex(interpolated.index)).dropna()
+        print(f"{interval:>3} s: {n_points} points, delta_time error (mean / max) nearest sample "
+              f"{error_nearest.mean():.2f} / {error_nearest.max():.2f} s, interpolated "
+              f"{error_interpolated.mean():.2f} / {error_interpolated.max():.2f} s "
+              f"({len(error_interpolated)} landings)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the vectorised tools_filter.identify_segments against the previous implementation,
+which processed each flight (icao24) separately, on one day of data.
+The outputs of both implementations must be identical.
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+from tools_filter import identify_segments, clean_dataframe_nulls, extract_adsb_columns, sort_dataframe
+from tools_import import load_parquet_files
+
+
+def identify_segments_reference(df, time_gap_threshold=3600):
+    """
+    Previous implementation of identify_segments, looping over the flights (reference for the benchmark).
+    """
+    annotated_list = []
+    segment_summary_list = []
+
+    # Process each flight separately by grouping on 'icao24'
+    for icao, group in df.groupby('icao24'):
+        # Ensure the data is sorted by timestamp
+        group = group.sort_values('ts').copy()
+
+        # Compute time difference between consecutive rows (converted to seconds)
+        group['time_gap'] = group['ts'].diff().fillna(0) / 1000
+
+        # Create a new segment whenever the time gap exceeds the threshold.
+        # Each flight has its own segment numbering.
+        group['segment'] = (group['time_gap'] > time_gap_threshold).cumsum()
+
+        # Compute summary statistics for each segment in the flight.
+        seg_summary = group.groupby('segment').agg(
+            start_time=('ts', 'first'),
+            end_time=('ts', 'last'),
+            start_altitude=('altitude', 'first'),
+            end_altitude=('altitude', 'last')
+        ).reset_index()
+
+        # Calculate overall altitude change for each segment.
+        seg_summary['altitude_change'] = seg_summary['end_altitude'] - seg_summary['start_altitude']
+
+        # Classify each segment.
+        seg_summary['trajectory'] = np.where(
+            seg_summary['altitude_change'] > 0, 'departing',
+            np.where(seg_summary['altitude_change'] < 0, 'landing', 'level')
+        )
+
+        # Add the flight identifier to the segment summary.
+        seg_summary['icao24'] = icao
+
+        # Merge the trajectory classification back into the group's DataFrame.
+        group = group.merge(seg_summary[['segment', 'trajectory']], on='segment', how='left')
+
+        # (Optionally) Reinforce the flight identifier in the group's DataFrame.
+        group['icao24'] = icao
+
+        # Append the results for this flight.
+        annotated_list.append(group)
+        segment_summary_list.append(seg_summary)
+
+    # Combine the annotated data and summaries from all flights.
+    annotated_df = pd.concat(annotated_list).reset_index(drop=True)
+    segment_summary = pd.concat(segment_summary_list).reset_index(drop=True)
+
+    return annotated_df, segment_summary
+
+
+def main():
+
+    # Date
+    year = 2024
+    month = 11
+    day = 16
+
+    # Load one day, prepared as in tools_process.process_adsb_data_1day
+    df = load_parquet_files(year, month, day, 0, year, month, day, 23, base_path="data/engage-hackathon-2025")
+    df = clean_dataframe_nulls(df, ['altitude', 'lat_deg', 'lon_deg'])
+    df = extract_adsb_columns(df)
+    df = sort_dataframe(df)
+    print(f"{len(df)} points, {df['icao24'].nunique()} flights")
+
+    # Run both implementations
+    start = time.perf_counter()
+    annotated_ref, summary_ref = identify_segments_reference(df)
+    time_ref = time.perf_counter() - start
+
+    start = time.perf_counter()
+    annotated_vec, summary_vec = identify_segments(df)
+    time_vec = time.perf_counter() - start
+
+    # Compare the outputs
+    pd.testing.assert_frame_equal(annotated_vec, annotated_ref)
+    pd.testing.assert_frame_equal(summary_vec, summary_ref)
+    print("Outputs are identical")
+
+    print(f"Reference:  {time_ref:.3f} s")
+    print(f"Vectorised: {time_vec:.3f} s")
+    print(f"Speed-up:   {time_ref / time_vec:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,662 @@
+#!/usr/bin/env python3
+"""
+Parity test of tools_filter.identify_landing_runway_strategies against frozen copies of the original
+row-wise implementation (the per-group loops of identify_landing_runway and
+identify_landing_runway_scenario, over the row-wise find_nearest_point, haversine and compute_bearing),
+on one day of data prepared as in tools_process.process_adsb_data_1day. The backwards method keeps the
+original loop, with the heading-cone rule and FAP columns it has since been given, applied row by row.
+The three outputs of each strategy must be identical, and the whole day pipeline must run with each
+strategy as its model.
+"""
+import contextlib
+import datetime
+import io
+import math
+import tempfile
+import time
+from math import radians, sin, cos, sqrt, atan2
+
+import numpy as np
+import pandas as pd
+
+from tools_filter import identify_segments, sort_dataframe, filter_dataframe_by_bounds, filter_dataframe_by_altitude, \
+    clean_dataframe_nulls, extract_adsb_columns, identify_landing_runway_strategies, LANDING_STRATEGIES, with_degrees
+from tools_import import load_parquet_files
+from tools_process import process_adsb_data_1day, day_output_prefix
+from FAP_positions import FAP_position
+from threshold_positions import threshold_position
+
+
+# Frozen copies of the original row-wise helpers of tools_filter
+
+def _haversine(lat1, lon1, lat2, lon2):
+    # Radius of Earth in meters
+    R = 6371000
+    phi1, phi2 = radians(lat1), radians(lat2)
+    dphi = radians(lat2 - lat1)
+    dlambda = radians(lon2 - lon1)
+
+    a = sin(dphi/2)**2 + cos(phi1) * cos(phi2) * sin(dlambda/2)**2
+    c = 2 * atan2(sqrt(a), sqrt(1 - a))
+    return R * c
+
+
+def _calculate_bearing(lat1, lon1, lat2, lon2):
+    """
+    Calculate the bearing between two points.
+    All args must be in decimal degrees.
+    """
+    lat1, lon1, lat2, lon2 = map(np.radians, [lat1, lon1, lat2, lon2])
+    dlon = lon2 - lon1
+
+    x = np.sin(dlon) * np.cos(lat2)
+    y = np.cos(lat1)*np.sin(lat2) - np.sin(lat1)*np.cos(lat2)*np.cos(dlon)
+
+    initial_bearing = np.arctan2(x, y)
+    initial_bearing = np.degrees(initial_bearing)
+    compass_bearing = (initial_bearing + 360) % 360
+
+    return compass_bearing
+
+
+def _find_nearest_point(baseline_position: dict, filtered_df: pd.DataFrame):
+    # Make sure filtered_df has numeric lat/lon
+    df = filtered_df.copy()
+    df = df.dropna(subset=['lat_deg', 'lon_deg'])
+
+    nearest = {
+        'distance': float('inf'),
+        'runway': None,
+        'point': None,
+        'base_lat': None,
+        'base_lon': None,
+        'index': None,
+        'ts': None
+    }
+
+    for runway, point in baseline_position.items():
+        # Compute haversine distance from all points to this FAP
+        distances = df.apply(
+            lambda row: _haversine(row['lat_deg'], row['lon_deg'], point.latitude, point.longitude),
+            axis=1
+        )
+
+        min_idx = distances.idxmin()
+        min_distance = distances[min_idx]
+
+        if min_distance < nearest['distance']:
+            nearest['distance'] = min_distance
+            nearest['runway'] = runway
+            nearest['point'] = df.loc[min_idx]
+            nearest['base_lat'] = point.latitude
+            nearest['base_lon'] = point.longitude
+            nearest['index'] = min_idx
+            nearest['ts'] = df.loc[min_idx]['ts']
+
+    return nearest
+
+
+def _compute_bearing(lat1, lon1, lat2, lon2):
+    # Convert latitude/longitude from degrees to radians.
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    delta_lon = math.radians(lon2 - lon1)
+    x = math.sin(delta_lon) * math.cos(phi2)
+    y = math.cos(phi1) * math.sin(phi2) - math.sin(phi1) * math.cos(phi2) * math.cos(delta_lon)
+    bearing = math.degrees(math.atan2(x, y))
+    return (bearing + 360) % 360
+
+
+def _find_last_no_turning_point(group_df, nearest_thr, heading_offset=10):
+    """
+    Row-wise heading-cone rule of the backwards method: going backwards in time from the threshold point,
+    the start of the final contiguous run of points whose bearing to it is within heading_offset of the
+    runway heading.
+    """
+    runway = nearest_thr['runway']
+    runway_heading = float(runway[:2])*10
+
+    # Points before the threshold point, in time order
+    group_df = group_df.sort_values('ts', kind='stable')
+    before_thr = group_df.iloc[:group_df.index.get_loc(nearest_thr['index'])]
+    if before_thr.empty:
+        return None
+
+    bearing = before_thr.apply(lambda row: _calculate_bearing(row['lat_deg'], row['lon_deg'], nearest_thr["point"]["lat_deg"], nearest_thr["point"]["lon_deg"]), axis=1)
+    within_range = ((bearing - runway_heading + 180) % 360 - 180).abs() <= heading_offset
+    if not within_range.iloc[-1]:
+        return None
+
+    # Walk back to the start of the final run
+    start = len(within_range) - 1
+    while start > 0 and within_range.iloc[start - 1]:
+        start -= 1
+    fap_point = before_thr.iloc[start]
+
+    return {
+        'distance': 0,
+        'runway': runway,
+        'point': fap_point,
+        'index': before_thr.index[start],
+        # Save the timestamp from the 'ts' field of the corresponding row
+        'ts': fap_point['ts']
+    }
+
+
+def _identify_landing_runway_reference(df):
+    """
+    Frozen copy of the original per-group identify_landing_runway.
+    """
+    results = []
+    basic_info_results = []
+    segments_ils_results = []  # List to collect the trajectory segments (ILS segments)
+
+    # Work with latitude/longitude in degrees
+    df = with_degrees(df)
+
+    # Filter out unwanted trajectories
+    if 'trajectory' in df.columns:
+        df = df[~df['trajectory'].isin(['departing', 'level'])]
+
+    # Group by icao24 and segment
+    grouped = df.groupby(['icao24', 'segment'])
+
+    for (icao24, segment), group_df in grouped:
+
+        # Get a representative timestamp from the group (using the first row)
+        rep_ts = group_df['ts'].iloc[0]
+        rep_date = datetime.datetime.utcfromtimestamp(rep_ts / 1000).strftime('%Y-%m-%d %Hh')
+
+        # Find the nearest point to the FAP position and to the threshold position.
+        nearest_fap = _find_nearest_point(FAP_position, group_df)
+        nearest_thr = _find_nearest_point(threshold_position, group_df)
+
+        # Ensure that the runways are the same
+        if nearest_fap['runway'] != nearest_thr['runway']:
+            print(f'  icao24 {icao24} at ts {rep_ts} ({rep_date}): runways do not match: '
+                  f'{nearest_fap["runway"]} != {nearest_thr["runway"]}')
+            continue
+
+        # Ensure that the found points are "close enough" to the FAP
+        if nearest_fap['distance'] > 700:  # [meters]
+            print(f'  icao24 {icao24} at ts {rep_ts} ({rep_date}): FAP distance too large: {nearest_fap["distance"]}')
+            continue
+
+        # Ensure that the found points are "close enough" to the THR
+        if nearest_thr['distance'] > 700:  # [meters]
+            print(f'  icao24 {icao24} at ts {rep_ts} ({rep_date}): THR distance too large: {nearest_thr["distance"]}')
+            continue
+
+        # Augment the group's dataframe with runway and index/timestamp info
+        group_df = group_df.copy()
+        group_df['runway_fap'] = nearest_fap['runway']
+        group_df['runway_thr'] = nearest_thr['runway']
+        group_df['idx_fap'] = nearest_fap['index']
+        group_df['idx_thr'] = nearest_thr['index']
+        group_df['ts_fap'] = nearest_fap['ts']
+        group_df['ts_thr'] = nearest_thr['ts']
+
+        # Compute and add delta_time to each row in the group
+        delta_time_real = (nearest_thr['ts'] - nearest_fap['ts']) / 1000
+        group_df['delta_time'] = delta_time_real
+
+        # Extract coordinates for the nearest FAP and threshold points
+        lat_fap = group_df.loc[nearest_fap['index'], 'lat_deg']
+        lon_fap = group_df.loc[nearest_fap['index'], 'lon_deg']
+        lat_thr = group_df.loc[nearest_thr['index'], 'lat_deg']
+        lon_thr = group_df.loc[nearest_thr['index'], 'lon_deg']
+
+        # Compute the distance between the nearest FAP point and the nearest threshold point
+        distance_real = _haversine(lat_fap, lon_fap, lat_thr, lon_thr)
+
+        # Compute the "true" distance between the actual FAP and THR positions
+        true_distance = _haversine(nearest_fap["base_lat"], nearest_fap["base_lon"],
+                                  nearest_thr["base_lat"], nearest_thr["base_lon"])
+
+        # Compute a scaling factor (avoid division by zero)
+        scaling_factor = true_distance / distance_real if distance_real != 0 else 1
+
+        # Re-scale the delta_time and distance
+        delta_time_scaled = delta_time_real * scaling_factor
+        distance_scaled = distance_real * scaling_factor  # This should be equal to true_distance
+
+        # Save the scaled values to the group dataframe
+        group_df['distance_fap_to_thr'] = true_distance
+        group_df['delta_time_fap_to_thr'] = delta_time_scaled
+
+        # ----- New Computations at the FAP Point -----
+        # Compute speed, vertical_speed, and heading at the FAP point using the previous data point.
+        # We sort by timestamp to ensure the points are in chronological order.
+        group_df_sorted = group_df.sort_values('ts')
+        try:
+            # Get the position of the FAP point in the sorted dataframe
+            fap_pos = group_df_sorted.index.get_loc(nearest_fap['index'])
+        except Exception as e:
+            fap_pos = None
+
+        if fap_pos is not None and fap_pos > 0:
+            previous_point = group_df_sorted.iloc[fap_pos - 1]
+            # Time difference in seconds
+            dt = (nearest_fap['ts'] - previous_point['ts']) / 1000.0
+            if dt > 0:
+                # Compute horizontal distance in meters between previous point and FAP point.
+                horiz_distance = _haversine(lat_fap, lon_fap, previous_point['lat_deg'], previous_point['lon_deg'])
+                speed = horiz_distance / dt  # in m/s
+                # Compute vertical speed using altitude difference (assumes 'altitude' column exists)
+                vertical_speed = (group_df.loc[nearest_fap['index'], 'altitude'] - previous_point['altitude']) / dt
+                # Compute heading (bearing) from the previous point to the FAP point.
+                heading = _compute_bearing(previous_point['lat_deg'], previous_point['lon_deg'], lat_fap, lon_fap)
+            else:
+                speed, vertical_speed, heading = None, None, None
+        else:
+            speed, vertical_speed, heading = None, None, None
+
+        # Build the basic info dictionary for this icao24 segment including the new fields.
+        basic_info = {
+            'icao24': icao24,
+            'runway_fap': nearest_fap['runway'],
+            'idx_fap': nearest_fap['index'],
+            'idx_thr': nearest_thr['index'],
+            'ts_fap': nearest_fap['ts'],
+            'ts_thr': nearest_thr['ts'],
+            'lat_deg_fap': lat_fap,
+            'lon_deg_fap': lon_fap,
+            'lat_deg_thr': lat_thr,
+            'lon_deg_thr': lon_thr,
+            'distance': distance_real,
+            'delta_time': delta_time_real,
+            'distance_fap_to_thr': true_distance,
+            'delta_time_fap_to_thr': delta_time_scaled,
+            'speed_fap': speed,
+            'vertical_speed_fap': vertical_speed,
+            'heading_fap': heading
+        }
+        basic_info_results.append(basic_info)
+        # ---------------------------------------------
+
+        # Extract the ILS segment: the rows between the FAP and THR identified points.
+        try:
+            pos_fap = group_df.index.get_loc(nearest_fap['index'])
+            pos_thr = group_df.index.get_loc(nearest_thr['index'])
+        except Exception as e:
+            print(f"Error determining positions for icao24 {icao24}: {e}")
+            continue
+
+        start_pos = min(pos_fap, pos_thr)
+        end_pos = max(pos_fap, pos_thr) + 1  # +1 to include the endpoint
+        segment_ils = group_df.iloc[start_pos:end_pos]
+        segments_ils_results.append(segment_ils)
+
+        # Add group to the results
+        results.append(group_df)
+
+    # Concatenate the augmented group dataframes
+    df_with_runway = pd.concat(results).reset_index(drop=True)
+
+    # Create the smaller dataframe with basic info for each icao24 segment
+    basic_info_df = pd.DataFrame(basic_info_results)
+
+    # Concatenate the ILS segments (if any) into a single dataframe
+    df_segments_ils = pd.concat(segments_ils_results).reset_index(drop=True) if segments_ils_results else pd.DataFrame()
+
+    return df_with_runway, basic_info_df, df_segments_ils
+
+
+def _identify_landing_runway_backwards_reference(df, heading_offset=10):
+    """
+    Original per-group identify_landing_runway_backwards, with the heading-cone rule of
+    _find_last_no_turning_point and the FAP columns of the fap method (distance and time not scaled).
+    """
+    results = []
+    basic_info_results = []
+    segments_ils_results = []  # List to collect the trajectory segments (ILS segments)
+
+    # Work with latitude/longitude in degrees
+    df = with_degrees(df)
+
+    # Filter out unwanted trajectories
+    df = df[~df['trajectory'].isin(['departing', 'level'])]
+
+    # Group by icao24 and segment
+    grouped = df.groupby(['icao24', 'segment'])
+
+    for (icao24, segment), group_df in grouped:
+
+        # Get a representative timestamp from the group (using the first row)
+        rep_ts = group_df['ts'].iloc[0]
+        rep_date = datetime.datetime.utcfromtimestamp(rep_ts / 1000).strftime('%Y-%m-%d %Hh')
+
+
+        # Find the nearest point to the FAP position and to the threshold position.
+        nearest_thr = _find_nearest_point(threshold_position, group_df)
+        nearest_fap = _find_last_no_turning_point(group_df, nearest_thr, heading_offset)
+
+        if nearest_fap is None:
+            print(f'  icao24 {icao24} at ts {rep_ts} ({rep_date}): heading do not match')
+            continue
+
+        # Ensure that the runways are the same
+        if nearest_fap['runway'] != nearest_thr['runway']:
+            print(f'  icao24 {icao24} at ts {rep_ts} ({rep_date}): runways do not match: '
+                  f'{nearest_fap["runway"]} != {nearest_thr["runway"]}')
+            continue
+
+        # Ensure that the found points are "close enough" to the FAP
+        if nearest_fap['distance'] > 700:  # [meters]
+            print(f'  icao24 {icao24} at ts {rep_ts} ({rep_date}): FAP distance too large: {nearest_fap["distance"]}')
+            continue
+
+        # Ensure that the found points are "close enough" to the THR
+        if nearest_thr['distance'] > 700:  # [meters]
+            print(f'  icao24 {icao24} at ts {rep_ts} ({rep_date}): THR distance too large: {nearest_thr["distance"]}')
+            continue
+
+        # Augment the group's dataframe with runway and index/timestamp info
+        group_df = group_df.copy()
+        group_df['runway_fap'] = nearest_fap['runway']
+        group_df['runway_thr'] = nearest_thr['runway']
+        group_df['idx_fap'] = nearest_fap['index']
+        group_df['idx_thr'] = nearest_thr['index']
+        group_df['ts_fap'] = nearest_fap['ts']
+        group_df['ts_thr'] = nearest_thr['ts']
+
+        # Compute and add delta_time to each row in the group
+        delta_time = (nearest_thr['ts'] - nearest_fap['ts']) / 1000
+        group_df['delta_time'] = delta_time
+
+        # Extract coordinates for the nearest FAP and threshold df points
+        lat_fap = group_df.loc[nearest_fap['index'], 'lat_deg']
+        lon_fap = group_df.loc[nearest_fap['index'], 'lon_deg']
+        lat_thr = group_df.loc[nearest_thr['index'], 'lat_deg']
+        lon_thr = group_df.loc[nearest_thr['index'], 'lon_deg']
+
+        # Compute the distance between the nearest FAP point and the nearest threshold point
+        distance = _haversine(lat_fap, lon_fap, lat_thr, lon_thr)
+
+        # The FAP point is not tied to a FAP position: the distance and time are not scaled
+        group_df['distance_fap_to_thr'] = distance
+        group_df['delta_time_fap_to_thr'] = delta_time
+
+        results.append(group_df)
+
+        # Compute speed, vertical_speed, and heading at the FAP point using the previous data point.
+        group_df_sorted = group_df.sort_values('ts')
+        fap_pos = group_df_sorted.index.get_loc(nearest_fap['index'])
+        speed, vertical_speed, heading = np.nan, np.nan, np.nan
+        if fap_pos > 0:
+            previous_point = group_df_sorted.iloc[fap_pos - 1]
+            dt = (nearest_fap['ts'] - previous_point['ts']) / 1000.0
+            if dt > 0:
+                speed = _haversine(lat_fap, lon_fap, previous_point['lat_deg'], previous_point['lon_deg']) / dt
+                vertical_speed = (group_df.loc[nearest_fap['index'], 'altitude'] - previous_point['altitude']) / dt
+                heading = _compute_bearing(previous_point['lat_deg'], previous_point['lon_deg'], lat_fap, lon_fap)
+
+        # Build the basic info dictionary for this icao24 segment
+        basic_info = {
+            'icao24': icao24,
+            'runway_fap': nearest_fap['runway'],
+            'idx_fap': nearest_fap['index'],
+            'idx_thr': nearest_thr['index'],
+            'ts_fap': nearest_fap['ts'],
+            'ts_thr': nearest_thr['ts'],
+            'lat_deg_fap': lat_fap,
+            'lon_deg_fap': lon_fap,
+            'lat_deg_thr': lat_thr,
+            'lon_deg_thr': lon_thr,
+            'distance': distance,
+            'delta_time': delta_time,
+            'distance_fap_to_thr': distance,
+            'delta_time_fap_to_thr': delta_time,
+            'speed_fap': speed,
+            'vertical_speed_fap': vertical_speed,
+            'heading_fap': heading
+        }
+        basic_info_results.append(basic_info)
+
+        # Extract the ILS segment: the rows between the FAP and THR identified points.
+        # We first get their positional indexes in the group's dataframe.
+        try:
+            pos_fap = group_df.index.get_loc(nearest_fap['index'])
+            pos_thr = group_df.index.get_loc(nearest_thr['index'])
+        except Exception as e:
+            print(f"Error determining positions for icao24 {icao24}: {e}")
+            continue
+
+        start_pos = min(pos_fap, pos_thr)
+        end_pos = max(pos_fap, pos_thr) + 1  # +1 to include the endpoint
+        segment_ils = group_df.iloc[start_pos:end_pos]
+        segments_ils_results.append(segment_ils)
+
+    # Concatenate the augmented group dataframes
+    df_with_runway = pd.concat(results).reset_index(drop=True)
+
+    # Create the smaller dataframe with basic info for each icao24 segment
+    basic_info_df = pd.DataFrame(basic_info_results)
+
+    # Concatenate the ILS segments (if any) into a single dataframe
+    df_segments_ils = pd.concat(segments_ils_results).reset_index(drop=True) if segments_ils_results else pd.DataFrame()
+
+    return df_with_runway, basic_info_df, df_segments_ils
+
+
+def _identify_landing_runway_scenario_reference(df):
+    """
+    Frozen copy of the original per-group identify_landing_runway_scenario.
+    """
+    results = []
+    basic_info_results = []
+    segments_ils_results = []  # List to collect the trajectory segments (ILS segments)
+
+    # Work with latitude/longitude in degrees
+    df = with_degrees(df)
+
+    # Filter out unwanted trajectories
+    if 'trajectory' in df.columns:
+        df = df[~df['trajectory'].isin(['departing', 'level'])]
+
+    # Group by icao24 and segment
+    grouped = df.groupby(['icao24', 'segment'])
+
+    for (icao24, segment), group_df in grouped:
+
+        # Get a representative timestamp from the group (using the first row)
+        rep_ts = group_df['ts'].iloc[0]
+        rep_date = datetime.datetime.utcfromtimestamp(rep_ts / 1000).strftime('%Y-%m-%d %Hh')
+
+        # Find the nearest point to the FAP position and to the threshold position.
+        nearest_fap = _find_nearest_point(FAP_position, group_df)
+        nearest_thr = _find_nearest_point(threshold_position, group_df)
+
+        # Augment the group's dataframe with runway and index/timestamp info
+        group_df = group_df.copy()
+        group_df['runway_fap'] = nearest_fap['runway']
+        group_df['runway_thr'] = nearest_thr['runway']
+        group_df['idx_fap'] = nearest_fap['index']
+        group_df['idx_thr'] = nearest_thr['index']
+        group_df['ts_fap'] = nearest_fap['ts']
+        group_df['ts_thr'] = nearest_thr['ts']
+
+        # Compute and add delta_time to each row in the group
+        delta_time_real = (nearest_thr['ts'] - nearest_fap['ts']) / 1000
+        group_df['delta_time'] = delta_time_real
+
+        # Extract coordinates for the nearest FAP and threshold df points
+        lat_fap = group_df.loc[nearest_fap['index'], 'lat_deg']
+        lon_fap = group_df.loc[nearest_fap['index'], 'lon_deg']
+        lat_thr = group_df.loc[nearest_thr['index'], 'lat_deg']
+        lon_thr = group_df.loc[nearest_thr['index'], 'lon_deg']
+
+        # Compute the distance between the nearest FAP point and the nearest threshold point
+        distance_real = _haversine(lat_fap, lon_fap, lat_thr, lon_thr)
+
+        # Compute the "true" distance between the actual FAP and THR positions
+        true_distance = _haversine(nearest_fap["base_lat"], nearest_fap["base_lon"],
+                                  nearest_thr["base_lat"], nearest_thr["base_lon"])
+
+        # Compute a scaling factor (avoid division by zero)
+        scaling_factor = true_distance / distance_real if distance_real != 0 else 1
+
+        # Re-scale the delta_time and distance
+        delta_time_scaled = delta_time_real * scaling_factor
+        distance_scaled = distance_real * scaling_factor  # This should be equal to true_distance
+
+        # --- New Computations for the Scenario Pair ---
+        # Compute the distance between the real FAP point and the true threshold (using base coordinates)
+        distance_scenario = _haversine(
+            lat_fap, lon_fap,
+            nearest_thr["base_lat"], nearest_thr["base_lon"]
+        )
+        # Compute the corresponding time assuming a constant speed (scale delta_time_real proportionally)
+        time_scenario = delta_time_real * (distance_scenario / distance_real) if distance_real != 0 else delta_time_real
+
+        # Save the scaled values to the group dataframe
+        group_df['distance_fap_to_thr'] = true_distance
+        group_df['delta_time_fap_to_thr'] = delta_time_scaled
+
+        # ----- New Computations at the FAP Point -----
+        # Compute speed, vertical_speed, and heading at the FAP point using the previous data point.
+        # We sort by timestamp to ensure the points are in chronological order.
+        group_df_sorted = group_df.sort_values('ts')
+        try:
+            # Get the position of the FAP point in the sorted dataframe
+            fap_pos = group_df_sorted.index.get_loc(nearest_fap['index'])
+        except Exception as e:
+            fap_pos = None
+
+        if fap_pos is not None and fap_pos > 0:
+            previous_point = group_df_sorted.iloc[fap_pos - 1]
+            # Time difference in seconds
+            dt = (nearest_fap['ts'] - previous_point['ts']) / 1000.0
+            if dt > 0:
+                # Compute horizontal distance in meters between previous point and FAP point.
+                horiz_distance = _haversine(lat_fap, lon_fap, previous_point['lat_deg'], previous_point['lon_deg'])
+                speed = horiz_distance / dt  # in m/s
+                # Compute vertical speed using altitude difference (assumes 'altitude' column exists)
+                vertical_speed = (group_df.loc[nearest_fap['index'], 'altitude'] - previous_point['altitude']) / dt
+                # Compute heading (bearing) from the previous point to the FAP point.
+                heading = _compute_bearing(previous_point['lat_deg'], previous_point['lon_deg'], lat_fap, lon_fap)
+            else:
+                speed, vertical_speed, heading = None, None, None
+        else:
+            speed, vertical_speed, heading = None, None, None
+
+        # Build the basic info dictionary for this icao24 segment including the new fields.
+        basic_info = {
+            'icao24': icao24,
+            'runway_fap': nearest_fap['runway'],
+            'idx_fap': nearest_fap['index'],
+            'idx_thr': nearest_thr['index'],
+            'ts_fap': nearest_fap['ts'],
+            'ts_thr': nearest_thr['ts'],
+            'lat_deg_fap': lat_fap,
+            'lon_deg_fap': lon_fap,
+            'lat_deg_thr': lat_thr,
+            'lon_deg_thr': lon_thr,
+            'distance': distance_real,
+            'delta_time': delta_time_real,
+            'distance_fap_to_thr': true_distance,
+            'delta_time_fap_to_thr': delta_time_scaled,
+            'speed_fap': speed,
+            'vertical_speed_fap': vertical_speed,
+            'heading_fap': heading,
+            'distance_scenario': distance_scenario,
+            'time_scenario': time_scenario
+        }
+        basic_info_results.append(basic_info)
+        # ---------------------------------------------
+
+        # Extract the ILS segment: the rows between the FAP and THR identified points.
+        # We first get their positional indexes in the group's dataframe.
+        try:
+            pos_fap = group_df.index.get_loc(nearest_fap['index'])
+            pos_thr = group_df.index.get_loc(nearest_thr['index'])
+        except Exception as e:
+            print(f"Error determining positions for icao24 {icao24}: {e}")
+            continue
+
+        start_pos = min(pos_fap, pos_thr)
+        end_pos = max(pos_fap, pos_thr) + 1  # +1 to include the endpoint
+        segment_ils = group_df.iloc[start_pos:end_pos]
+        segments_ils_results.append(segment_ils)
+
+        # Add group to the results
+        results.append(group_df)
+
+    # Concatenate the augmented group dataframes
+    df_with_runway = pd.concat(results).reset_index(drop=True)
+
+    # Create the smaller dataframe with basic info for each icao24 segment
+    basic_info_df = pd.DataFrame(basic_info_results)
+
+    # Concatenate the ILS segments (if any) into a single dataframe
+    df_segments_ils = pd.concat(segments_ils_results).reset_index(drop=True) if segments_ils_results else pd.DataFrame()
+
+    return df_with_runway, basic_info_df, df_segments_ils
+
+
+def main():
+
+    # Date
+    year = 2024
+    month = 11
+    day = 16
+
+    # Reference function of each strategy
+    references = {
+        'fap': _identify_landing_runway_reference,
+        'backwards': _identify_landing_runway_backwards_reference,
+        'scenario': _identify_landing_runway_scenario_reference,
+    }
+
+    # Load and segment one day
+    df = load_parquet_files(year, month, day, 0, year, month, day, 23, base_path="data/engage-hackathon-2025")
+    df = clean_dataframe_nulls(df, ['altitude', 'lat_deg', 'lon_deg'])
+    df = sort_dataframe(extract_adsb_columns(df))
+    df, _ = identify_segments(df)
+    df = filter_dataframe_by_bounds(df, 40.3, 40.8, -3.8, -3.3)
+    df = filter_dataframe_by_altitude(df, -1000, 10000)
+
+    # Run the reference functions one after the other (their per-segment messages are not shown)
+    results_ref = {}
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for strategy in LANDING_STRATEGIES:
+            results_ref[strategy] = references[strategy](df)
+    time_ref = time.perf_counter() - start
+
+    # Run all the strategies in one pass
+    start = time.perf_counter()
+    results_col = identify_landing_runway_strategies(df, LANDING_STRATEGIES)
+    time_col = time.perf_counter() - start
+
+    # Compare the outputs
+    for strategy in LANDING_STRATEGIES:
+        for name, result_col, result_ref in zip(['df_with_runway', 'basic_info_df', 'df_segments_ils'],
+                                                results_col[strategy], results_ref[strategy]):
+            pd.testing.assert_frame_equal(result_col, result_ref)
+            print(f"{strategy} {name}: identical ({len(result_col)} rows)")
+
+    # The gated strategies alone search the points near the positions with a spatial index
+    for strategy in ['fap', 'backwards']:
+        with contextlib.redirect_stdout(io.StringIO()):
+            results_index = identify_landing_runway_strategies(df, [strategy])[strategy]
+        for result_index, result_ref in zip(results_index, results_ref[strategy]):
+            pd.testing.assert_frame_equal(result_index, result_ref)
+        print(f"{strategy} with spatial index: identical")
+
+    print(f"Reference:  {time_ref:.3f} s")
+    print(f"Strategies: {time_col:.3f} s")
+    print(f"Speed-up:   {time_ref / time_col:.1f}x")
+
+    # The whole day pipeline runs with every model, and exports the same training columns
+    for model in LANDING_STRATEGIES:
+        with tempfile.TemporaryDirectory() as output_dir:
+            with contextlib.redirect_stdout(io.StringIO()):
+                process_adsb_data_1day(year, month, day, output_dir=output_dir,
+                                       base_path="data/engage-hackathon-2025", model=model)
+            training = pd.read_csv(day_output_prefix(output_dir, datetime.date(year, month, day)) + '_training.csv')
+            assert {'delta_time_fap_to_thr', 'speed_fap', 'vertical_speed_fap', 'heading_fap'} <= set(training.columns)
+            print(f"{model} pipeline: {len(training)} training rows")
+
+
+if __name__ == '__main__':
+    main()
@@ -26,6 +26,8 @@ import pandas as pd
 
 from tools_calculate import compute_segment_delta_times, plot_delta_time_pdf, compute_delta_time_statistics, \
     plot_delta_time_pdf_by_runway
+from tools_cache import save_stage_cache, load_stage_cache, landing_cache_exists, save_landing_cache, \
+    load_landing_cache
 from tools_export import export_trajectories_to_csv, export_trajectories_to_kml
 from tools_filter import identify_segments, sort_dataframe, filter_dataframe_by_bounds, filter_dataframe_by_altitude, \
     clean_dataframe_nulls, extract_adsb_columns, identify_landing_runway
@@ -47,12 +49,12 @@ def main():
     output_name = 'output/test_scenarios_checkpoint'
 
     # Define a cache file path (adjust folder as needed)
-    cache_file = f"output/test_scenarios_checkpoint_cached_df_{year}_{month:02d}_{day:02d}.pkl"
+    cache_file = f"output/test_scenarios_checkpoint_cached_df_{year}_{month:02d}_{day:02d}.arrow"
 
     # If the cache file exists, load the dataframe from it.
     if os.path.exists(cache_file):
         print(f"Loading cached dataframe from {cache_file} ...")
-        df = pd.read_pickle(cache_file)
+        df = load_stage_cache(cache_file)
     else:
         print("Cache file not found. Processing data ...")
 
@@ -77,16 +79,16 @@ def main():
 
         # Save the dataframe to cache for future runs
         print(f"Saving processed dataframe to cache file {cache_file} ...")
-        df.to_pickle(cache_file)
+        save_stage_cache(df, cache_file)
 
 
     # Define a cache file path (adjust folder as needed)
-    cache_file2 = f"output/test_scenarios_checkpoint_df_{year}_{month:02d}_{day:02d}.pkl"
+    cache_file2 = f"output/test_scenarios_checkpoint_df_{year}_{month:02d}_{day:02d}.arrow"
 
     # If the cache file exists, load the dataframe from it.
     if os.path.exists(cache_file2):
         print(f"Loading cached dataframe2 from {cache_file2} ...")
-        df = pd.read_pickle(cache_file2)
+        df = load_stage_cache(cache_file2)
     else:
         print("Cache file2 not found. Processing data ...")
 
@@ -120,19 +122,19 @@ def main():
 
         # Save the dataframe to cache for future runs
         print(f"Saving processed dataframe to cache file2 {cache_file2} ...")
-        df.to_pickle(cache_file2)
+        save_stage_cache(df, cache_file2)
 
     # Identify and extract landings, with caching
-    cache_file3 = f"output/test_scenarios_checkpoint_cached_landing_{year}_{month:02d}_{day:02d}.pkl"
-    if os.path.exists(cache_file3):
-        print(f"Loading cached landing runway results from {cache_file3} ...")
-        df_with_runway, basic_info_df, df_segments_ils = pd.read_pickle(cache_file3)
+    cache_file3 = f"output/test_scenarios_checkpoint_cached_landing_{year}_{month:02d}_{day:02d}"
+    if landing_cache_exists(cache_file3):
+        print(f"Loading cached landing runway results from {cache_file3}_* ...")
+        df_with_runway, basic_info_df, df_segments_ils = load_landing_cache(cache_file3)
     else:
         print("Cache file for landing runway not found. Processing landing runway results ...")
         df_with_runway, basic_info_df, df_segments_ils = identify_landing_runway(df)
 
-        print(f"Saving landing runway results to cache file {cache_file3} ...")
-        pd.to_pickle((df_with_runway, basic_info_df, df_segments_ils), cache_file3)
+        print(f"Saving landing runway results to cache files {cache_file3}_* ...")
+        save_landing_cache((df_with_runway, basic_info_df, df_segments_ils), cache_file3)
 
     # Define the normal range thresholds (in seconds)
     min_delta = 100
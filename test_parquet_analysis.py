@@ -22,12 +22,13 @@ import matplotlib.pyplot as plt
 import numpy as np
 
 
-def load_parquet_file(filepath):
+def load_parquet_file(filepath, columns=None):
     """
     Load a Parquet file and convert it to a Pandas DataFrame.
 
     Args:
         filepath (str): Path to the Parquet file.
+        columns (list, optional): Columns to read. Defaults to None (all columns).
 
     Returns:
         pd.DataFrame: Loaded ADS-B data.
@@ -35,8 +36,8 @@ def load_parquet_file(filepath):
     try:
         # Open the Parquet file with PyArrow
         parquet_file = pq.ParquetFile(filepath)
-        # Read the entire file into a PyArrow Table
-        table = parquet_file.read()
+        # Read only the requested columns into a PyArrow Table
+        table = parquet_file.read(columns=columns)
         # Convert the table to a Pandas DataFrame
         df = table.to_pandas()
         return df
@@ -172,7 +173,7 @@ def main():
 
     # Step 1: Load the data
     print("Loading ADS-B data...")
-    df = load_parquet_file(filepath)
+    df = load_parquet_file(filepath, columns=['altitude', 'vertical_rate', 'groundspeed'])
 
     # Step 2: Preprocess data (filter for landing/approach phase)
     print("Preprocessing data for runway safety analysis (altitude < 2000 ft)...")
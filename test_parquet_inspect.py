@@ -14,6 +14,8 @@ import sys
 import pyarrow.parquet as pq
 import pandas as pd
 
+from tools_index import build_catalog
+
 
 def load_and_inspect_parquet(filepath):
     """
@@ -55,12 +57,20 @@ def load_and_inspect_parquet(filepath):
             print(f"  Physical Type: {col_meta.physical_type}")
             print(f"  Encodings: {col_meta.encodings}")
 
-    # Load the entire file into memory as a PyArrow Table
+    # Summarize the row groups from the footer only (sizes, time range and null counts)
+    print("\n=== Catalog ===")
+    catalog = build_catalog([filepath])
+    print(catalog[['row_group', 'num_rows', 'total_byte_size', 'compressed_byte_size', 'ts_min', 'ts_max']])
+    null_counts = catalog.filter(like='null_count_').sum()
+    print("Null counts per column:")
+    print(null_counts.rename(lambda name: name.replace('null_count_', '')).to_string())
+
+    # Decode only the first rows, instead of the entire file
     print("\n=== Loading Data ===")
-    table = parquet_file.read()
+    first_batch = next(parquet_file.iter_batches(batch_size=5))
 
-    # Convert the table to a Pandas DataFrame for easier viewing and manipulation
-    df = table.to_pandas()
+    # Convert the batch to a Pandas DataFrame for easier viewing and manipulation
+    df = first_batch.to_pandas()
 
     # Display a preview of the data
     print("\n=== Data Preview (first 5 rows) ===")
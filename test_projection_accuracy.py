@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Accuracy of the local ENU frame (tools_projection) against haversine and compute_bearing (tools_filter),
+for random pairs of points in the 50 km box around Madrid used by the pipeline.
+"""
+import numpy as np
+
+from tools_filter import haversine_vector, compute_bearing_vector
+from tools_projection import geodetic_to_enu, enu_to_geodetic, enu_distance, enu_bearing, RUNWAY_GEOMETRY
+
+
+def main():
+
+    # Box and number of random pairs
+    min_lat, max_lat, min_lon, max_lon = [40.3, 40.8, -3.8, -3.3]  # [deg]
+    n_pairs = 1000000
+
+    rng = np.random.default_rng(0)
+    lat1, lat2 = rng.uniform(min_lat, max_lat, (2, n_pairs))
+    lon1, lon2 = rng.uniform(min_lon, max_lon, (2, n_pairs))
+    altitude1, altitude2 = rng.uniform(0, 10000, (2, n_pairs))  # [ft]
+    east1, north1, _ = geodetic_to_enu(lat1, lon1, altitude1)
+    east2, north2, _ = geodetic_to_enu(lat2, lon2, altitude2)
+
+    # Distances
+    distance_ref = haversine_vector(lat1, lon1, lat2, lon2)
+    error = np.abs(enu_distance(east1, north1, east2, north2) - distance_ref)
+    near = distance_ref < 1000
+    print(f"Pairs up to {distance_ref.max() / 1000:.1f} km apart")
+    print(f"Distance error: max {error.max():.3f} m, relative max {(error / distance_ref).max():.2e}")
+    print(f"Distance error below 1 km: max {error[near].max() * 1000:.2f} mm")
+
+    # Bearings (only for pairs far enough for the bearing to be meaningful)
+    far = distance_ref > 100
+    difference = enu_bearing(east1, north1, east2, north2) - compute_bearing_vector(lat1, lon1, lat2, lon2)
+    difference = np.abs((difference + 180) % 360 - 180)
+    print(f"Bearing difference: max {difference[far].max():.3f} deg")
+
+    # Round trip of the ground positions
+    lat_back, lon_back = enu_to_geodetic(east1, north1)
+    print(f"Round trip error: max {max(np.abs(lat_back - lat1).max(), np.abs(lon_back - lon1).max()):.1e} deg")
+
+    for runway, geometry in RUNWAY_GEOMETRY.items():
+        print(f"Runway {runway}: {geometry}")
+
+
+if __name__ == '__main__':
+    main()
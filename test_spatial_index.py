@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Check of tools_spatial.SpatialIndex on one day of data prepared as in tools_process.process_adsb_data_1day:
+the nearest point of each segment within 700 m of each FAP and threshold must be the one found by the
+haversine distances from every point to every reference point, and the index must survive the pipeline
+cache.
+"""
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from FAP_positions import FAP_position
+from threshold_positions import threshold_position
+from tools_cache import PipelineCache
+from tools_filter import identify_segments, sort_dataframe, filter_dataframe_by_bounds, filter_dataframe_by_altitude, \
+    clean_dataframe_nulls, extract_adsb_columns, haversine_matrix
+from tools_import import load_parquet_files
+from tools_projection import add_enu_columns
+from tools_spatial import SpatialIndex, runway_targets
+
+
+def nearest_per_segment_haversine(df, positions, radius):
+    """
+    Reference: distances from every point to every position, then the nearest point of each segment.
+    """
+    runways = list(positions)
+    distances = haversine_matrix(df['lat_deg'].to_numpy(), df['lon_deg'].to_numpy(),
+                                 [positions[runway].latitude for runway in runways],
+                                 [positions[runway].longitude for runway in runways])
+    results = pd.DataFrame({
+        'icao24': np.repeat(df['icao24'].to_numpy(), len(runways)),
+        'segment': np.repeat(df['segment'].to_numpy(), len(runways)),
+        'target': np.tile(np.array(runways, dtype=object), len(df)),
+        'row': np.repeat(np.arange(len(df)), len(runways)),
+        'distance': distances.ravel(),
+    })
+    results = results[results['distance'] <= radius].sort_values(['distance', 'row'], kind='stable')
+    results = results.drop_duplicates(['icao24', 'segment', 'target'])
+    return results.sort_values(['icao24', 'segment', 'row'], kind='stable').reset_index(drop=True)
+
+
+def main():
+
+    # Date
+    year = 2024
+    month = 11
+    day = 16
+
+    # Gate around the reference points [meters]
+    radius = 700
+
+    # Load, segment and project one day
+    df = load_parquet_files(year, month, day, 0, year, month, day, 23, base_path="data/engage-hackathon-2025")
+    df = clean_dataframe_nulls(df, ['altitude', 'lat_deg', 'lon_deg'])
+    df = sort_dataframe(extract_adsb_columns(df))
+    df, _ = identify_segments(df)
+    df = filter_dataframe_by_bounds(df, 40.3, 40.8, -3.8, -3.3)
+    df = filter_dataframe_by_altitude(df, -1000, 10000)
+    df = add_enu_columns(df)
+
+    start = time.perf_counter()
+    index = SpatialIndex(df)
+    print(f"Index of {len(index)} points built in {time.perf_counter() - start:.3f} s")
+
+    for kind, positions in [('fap', FAP_position), ('thr', threshold_position)]:
+        start = time.perf_counter()
+        results_ref = nearest_per_segment_haversine(df, positions, radius)
+        time_ref = time.perf_counter() - start
+
+        start = time.perf_counter()
+        results = index.nearest_per_segment(runway_targets(kind), radius)
+        time_index = time.perf_counter() - start
+
+        # Same segments and points (up to ties closer than the accuracy of the ENU frame)
+        merged = results.merge(results_ref, on=['icao24', 'segment', 'target'], how='outer',
+                               suffixes=('', '_ref'), indicator=True)
+        assert (merged['_merge'] == 'both').all(), merged[merged['_merge'] != 'both']
+        assert np.abs(merged['distance'] - merged['distance_ref']).max() < 0.05
+        same_row = (merged['row'] == merged['row_ref']).mean()
+        print(f"{kind}: {len(results)} segment matches, {same_row:.1%} same point, "
+              f"haversine {time_ref:.3f} s, index {time_index:.3f} s")
+
+    # Cache the inputs of the index alongside the segments, and rebuild it
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = PipelineCache(cache_dir)
+        key = cache.key('segments', {'day': f"{year}-{month:02d}-{day:02d}"})
+        cache.save('segments', key, df)
+        cache.save('kdtree', key, index.to_frame())
+        cached = SpatialIndex.from_frame(cache.load('kdtree', key))
+        pd.testing.assert_frame_equal(cached.nearest_per_segment(runway_targets('fap'), radius),
+                                      index.nearest_per_segment(runway_targets('fap'), radius))
+        print("Cached index: identical results")
+
+if __name__ == '__main__':
+    main()
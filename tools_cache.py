@@ -0,0 +1,302 @@
+import ast
+import hashlib
+import json
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Names of the three tables of the landing runway results
+LANDING_TABLES = ['df_with_runway', 'basic_info_df', 'df_segments_ils']
+
+# Module of the pipeline whose source code, with the local modules it imports, determines the cached
+# results (see code_modules)
+CODE_ENTRY_MODULE = 'tools_process.py'
+
+
+def save_stage_cache(df: pd.DataFrame, cache_file: str):
+    """
+    Save an intermediate DataFrame of the pipeline to a cache file.
+
+    Files ending in '.parquet' are written as zstd-compressed Parquet (cold storage). Any other
+    file is written as an uncompressed Arrow IPC (Feather v2) file, which load_stage_cache reads
+    back memory-mapped without copying. The DataFrame index is preserved in both formats, since
+    the landing runway results refer to the index labels.
+
+    Args:
+        df (pd.DataFrame): The DataFrame to save.
+        cache_file (str): Path of the cache file (e.g. 'output/save_2024_11_16_cached_df.arrow').
+    """
+    table = pa.Table.from_pandas(df, preserve_index=True)
+    # Write to a temporary file first, so that an interrupted run never leaves a partial cache
+    tmp_file = cache_file + '.tmp'
+    if cache_file.endswith('.parquet'):
+        pq.write_table(table, tmp_file, compression='zstd')
+    else:
+        with pa.OSFile(tmp_file, 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+    os.replace(tmp_file, cache_file)
+
+
+def load_stage_cache(cache_file: str) -> pd.DataFrame:
+    """
+    Load an intermediate DataFrame saved with save_stage_cache.
+
+    Arrow IPC files are memory-mapped: the columns are not read nor copied until they are used.
+
+    Args:
+        cache_file (str): Path of the cache file.
+
+    Returns:
+        pd.DataFrame: The cached DataFrame, with its original index.
+    """
+    if cache_file.endswith('.parquet'):
+        table = pq.read_table(cache_file)
+    else:
+        table = pa.ipc.open_file(pa.memory_map(cache_file, 'r')).read_all()
+    # split_blocks avoids consolidating the columns into a single block, which would copy them
+    return table.to_pandas(split_blocks=True)
+
+
+def landing_cache_files(cache_prefix: str, extension: str = '.arrow') -> dict:
+    """
+    Return the cache file of each of the three landing runway tables, named after the prefix.
+    """
+    return {name: f"{cache_prefix}_{name}{extension}" for name in LANDING_TABLES}
+
+
+def landing_cache_exists(cache_prefix: str, extension: str = '.arrow') -> bool:
+    """
+    Check whether the three landing runway tables are cached.
+    """
+    return all(os.path.exists(file) for file in landing_cache_files(cache_prefix, extension).values())
+
+
+def save_landing_cache(landing_results: tuple, cache_prefix: str, extension: str = '.arrow'):
+    """
+    Save the results of identify_landing_runway (df_with_runway, basic_info_df, df_segments_ils)
+    as three named tables, see save_stage_cache.
+
+    Args:
+        landing_results (tuple): The three DataFrames, in the order of LANDING_TABLES.
+        cache_prefix (str): Prefix of the cache files (e.g. 'output/save_2024_11_16_cached_landing').
+        extension (str, optional): '.arrow' (default) or '.parquet'.
+    """
+    for df, cache_file in zip(landing_results, landing_cache_files(cache_prefix, extension).values()):
+        save_stage_cache(df, cache_file)
+
+
+def load_landing_cache(cache_prefix: str, extension: str = '.arrow') -> tuple:
+    """
+    Load the landing runway results saved with save_landing_cache.
+
+    Returns:
+        tuple: (df_with_runway, basic_info_df, df_segments_ils)
+    """
+    return tuple(load_stage_cache(cache_file)
+                 for cache_file in landing_cache_files(cache_prefix, extension).values())
+
+
+def code_modules(entry_module: str = CODE_ENTRY_MODULE) -> list:
+    """
+    Return the local modules imported, directly or not, by a module of the repository (itself included),
+    e.g. the runway positions of FAP_positions.py and threshold_positions.py used by the landing stage.
+
+    Args:
+        entry_module (str, optional): File name of the module. Defaults to CODE_ENTRY_MODULE.
+
+    Returns:
+        list: Sorted file names of the modules.
+    """
+    source_dir = os.path.dirname(os.path.abspath(__file__))
+    modules = set()
+    pending = [entry_module]
+    while pending:
+        module = pending.pop()
+        if module in modules:
+            continue
+        modules.add(module)
+        with open(os.path.join(source_dir, module), 'rb') as f:
+            tree = ast.parse(f.read(), filename=module)
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                names = [node.module]
+            else:
+                continue
+            for name in names:
+                file_name = name.split('.')[0] + '.py'
+                if os.path.exists(os.path.join(source_dir, file_name)):
+                    pending.append(file_name)
+    return sorted(modules)
+
+
+def code_version() -> str:
+    """
+    Return a hash of the source code of the modules that compute the cached stages (see code_modules),
+    so that cached results are invalidated when that code changes.
+    """
+    source_dir = os.path.dirname(os.path.abspath(__file__))
+    digest = hashlib.sha256()
+    for module in code_modules():
+        with open(os.path.join(source_dir, module), 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+class PipelineCache:
+    """
+    Content-addressed cache of the pipeline stages.
+
+    The key of a stage hashes the stage name, its parameters, the fingerprints (path, size, mtime) of
+    its input files and/or the key of its upstream stage, and the code version. Changing any of them
+    gives a new key, so a stale result is never served, while the upstream stages whose key did not
+    change are reused.
+
+    Entries are stored as Arrow IPC files in cache_dir (see save_stage_cache). When the directory
+    grows beyond max_bytes, the least recently used entries are evicted. Hits and misses are counted
+    per stage, see report.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = None):
+        """
+        Args:
+            cache_dir (str): Directory of the cache.
+            max_bytes (int, optional): Maximum total size of the cache directory. Defaults to None (no limit).
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.code_version = code_version()
+        self.hits = {}
+        self.misses = {}
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, stage: str, params: dict, input_files: list = None, upstream_key: str = None) -> str:
+        """
+        Compute the key of a stage.
+
+        Args:
+            stage (str): Name of the stage (e.g. 'load').
+            params (dict): Parameters of the stage (JSON-serializable).
+            input_files (list, optional): Input files of the stage. Defaults to None.
+            upstream_key (str, optional): Key of the stage that produced the input. Defaults to None.
+
+        Returns:
+            str: The key.
+        """
+        fingerprints = []
+        for path in input_files or []:
+            stat = os.stat(path)
+            fingerprints.append([path, stat.st_size, stat.st_mtime])
+        content = json.dumps({'stage': stage, 'params': params, 'inputs': fingerprints,
+                              'upstream': upstream_key, 'code': self.code_version}, sort_keys=True)
+        return hashlib.sha256(content.encode()).hexdigest()[:24]
+
+    def _entry(self, stage: str, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{stage}-{key}")
+
+    def _count(self, stage: str, hit: bool):
+        counter = self.hits if hit else self.misses
+        counter[stage] = counter.get(stage, 0) + 1
+
+    def _touch(self, files: list):
+        # The modification time records the last use, for the LRU eviction
+        for file in files:
+            os.utime(file)
+
+    def contains(self, stage: str, key: str) -> bool:
+        """
+        Check whether the DataFrame of a stage is cached, without loading it.
+        """
+        return os.path.exists(self._entry(stage, key) + '.arrow')
+
+    def load(self, stage: str, key: str):
+        """
+        Load the DataFrame of a stage, or return None if it is not cached.
+        """
+        cache_file = self._entry(stage, key) + '.arrow'
+        if not os.path.exists(cache_file):
+            self._count(stage, hit=False)
+            return None
+        self._count(stage, hit=True)
+        self._touch([cache_file])
+        print(f"Cache hit for stage {stage}: {cache_file}")
+        return load_stage_cache(cache_file)
+
+    def save(self, stage: str, key: str, df: pd.DataFrame):
+        """
+        Save the DataFrame of a stage, then evict old entries if needed.
+        """
+        cache_file = self._entry(stage, key) + '.arrow'
+        print(f"Saving stage {stage} to cache file {cache_file} ...")
+        save_stage_cache(df, cache_file)
+        self.evict(keep=self._entry(stage, key))
+
+    def load_landing(self, stage: str, key: str):
+        """
+        Load the three landing runway tables of a stage, or return None if they are not cached.
+        """
+        cache_prefix = self._entry(stage, key)
+        if not landing_cache_exists(cache_prefix):
+            self._count(stage, hit=False)
+            return None
+        self._count(stage, hit=True)
+        self._touch(list(landing_cache_files(cache_prefix).values()))
+        print(f"Cache hit for stage {stage}: {cache_prefix}_*")
+        return load_landing_cache(cache_prefix)
+
+    def save_landing(self, stage: str, key: str, landing_results: tuple):
+        """
+        Save the three landing runway tables of a stage, then evict old entries if needed.
+        """
+        cache_prefix = self._entry(stage, key)
+        print(f"Saving stage {stage} to cache files {cache_prefix}_* ...")
+        save_landing_cache(landing_results, cache_prefix)
+        self.evict(keep=cache_prefix)
+
+    def evict(self, keep: str = None):
+        """
+        Remove the least recently used entries until the cache directory fits in max_bytes.
+
+        Args:
+            keep (str, optional): Entry that is never evicted (the one just saved). Defaults to None.
+        """
+        if self.max_bytes is None:
+            return
+        # Group the files by entry ('<stage>-<key>', shared by the three landing tables)
+        entries = {}
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if name.endswith('.tmp') or not os.path.isfile(path):
+                continue
+            entry = name.split('.')[0].split('_')[0]
+            stat = os.stat(path)
+            size, last_used = entries.get(entry, (0, 0))
+            entries[entry] = (size + stat.st_size, max(last_used, stat.st_mtime))
+
+        total_bytes = sum(size for size, _ in entries.values())
+        for entry, (size, _) in sorted(entries.items(), key=lambda item: item[1][1]):
+            if total_bytes <= self.max_bytes:
+                break
+            if keep is not None and entry == os.path.basename(keep):
+                continue
+            for name in os.listdir(self.cache_dir):
+                if name.split('.')[0].split('_')[0] == entry:
+                    os.remove(os.path.join(self.cache_dir, name))
+            total_bytes -= size
+            print(f"Evicted cache entry {entry} ({size} bytes)")
+
+    def report(self) -> dict:
+        """
+        Print and return the number of hits and misses per stage.
+        """
+        stages = sorted(set(self.hits) | set(self.misses))
+        report = {stage: {'hits': self.hits.get(stage, 0), 'misses': self.misses.get(stage, 0)}
+                  for stage in stages}
+        print("Cache report:")
+        for stage, counts in report.items():
+            print(f"  {stage}: {counts['hits']} hits, {counts['misses']} misses")
+        return report
@@ -1,5 +1,6 @@
-import datetime
+import functools
 import math
+import re
 from typing import List, Optional
 
 import numpy as np
@@ -10,6 +11,164 @@ from math import radians, sin, cos, sqrt, atan2, asin
 from FAP_positions import FAP_position
 from threshold_positions import threshold_position
 
+# Scale of the fixed-point (int32) latitude/longitude columns of the compact schema
+MICRODEGREES_PER_DEGREE = 1_000_000
+
+# Value of the compact (uint8) 'df' column for messages without downlink format
+DF_NULL = 255
+
+# Value of the compact (uint32) 'icao24' column for missing or malformed identifiers (address 000000 is not assigned)
+ICAO24_INVALID = 0
+
+# Valid icao24 identifier: up to 6 hexadecimal digits
+ICAO24_PATTERN = re.compile(r'[0-9a-fA-F]{1,6}')
+
+
+def chunkwise(func):
+    """
+    Allow a row-wise DataFrame function to also be applied to a stream of chunks.
+
+    If the first argument of the decorated function is a DataFrame, the function is applied as usual.
+    Otherwise, it is treated as an iterator of chunks (pandas DataFrames, or pyarrow record batches
+    or tables, e.g. from tools_import.iter_parquet_batches), and a generator is returned that
+    applies the function to each chunk and yields the resulting DataFrames.
+    """
+    @functools.wraps(func)
+    def wrapper(data, *args, **kwargs):
+        if isinstance(data, pd.DataFrame):
+            return func(data, *args, **kwargs)
+        return (func(chunk if isinstance(chunk, pd.DataFrame) else chunk.to_pandas(), *args, **kwargs)
+                for chunk in data)
+    return wrapper
+
+
+def encode_icao24(values) -> np.ndarray:
+    """
+    Encode icao24 identifiers from hexadecimal strings to uint32 integers.
+
+    The conversion is done once per unique identifier. It is reversed by decode_icao24. Missing
+    identifiers and those that are not hexadecimal strings of up to 6 digits are encoded as
+    ICAO24_INVALID, and counted in a message.
+
+    Args:
+        values (array-like): icao24 identifiers as hexadecimal strings (e.g. '3443c4').
+
+    Returns:
+        np.ndarray: The identifiers as uint32 integers.
+    """
+    codes, uniques = pd.factorize(np.asarray(values, dtype=object))
+    valid = np.array([isinstance(value, str) and ICAO24_PATTERN.fullmatch(value) is not None for value in uniques] +
+                     [False], dtype=bool)
+    unique_ints = np.array([int(value, 16) if is_valid else ICAO24_INVALID for value, is_valid in zip(uniques, valid)] +
+                           [ICAO24_INVALID], dtype=np.uint32)  # code -1 (null) picks the trailing ICAO24_INVALID
+    invalid_count = np.count_nonzero(~valid[codes])
+    if invalid_count:
+        print(f"{invalid_count} missing or malformed icao24 identifiers encoded as {ICAO24_INVALID}")
+    return unique_ints[codes]
+
+
+def decode_icao24(values) -> np.ndarray:
+    """
+    Decode uint32 icao24 identifiers back to 6-digit lower-case hexadecimal strings.
+
+    Args:
+        values (array-like): icao24 identifiers as integers.
+
+    Returns:
+        np.ndarray: The identifiers as strings (dtype object), None for ICAO24_INVALID.
+    """
+    codes, uniques = pd.factorize(np.asarray(values))
+    unique_strs = np.array([None if value == ICAO24_INVALID else f"{int(value):06x}" for value in uniques] + [None],
+                           dtype=object)
+    return unique_strs[codes]
+
+
+def is_fixed_point(df: pd.DataFrame) -> bool:
+    """
+    Check whether the latitude/longitude columns use the fixed-point (int32 micro-degrees) compact schema.
+    """
+    return 'lat_deg' in df.columns and pd.api.types.is_integer_dtype(df['lat_deg'])
+
+
+def with_degrees(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Return the DataFrame with 'lat_deg' and 'lon_deg' in float64 degrees.
+
+    DataFrames already in degrees are returned unchanged; fixed-point ones are converted on a copy.
+    """
+    if not is_fixed_point(df):
+        return df
+    df = df.copy()
+    for col in ['lat_deg', 'lon_deg']:
+        df[col] = df[col] / MICRODEGREES_PER_DEGREE
+    return df
+
+
+@chunkwise
+def compact_dataframe(df: pd.DataFrame, fixed_point_latlon: bool = False) -> pd.DataFrame:
+    """
+    Convert ADS-B data to the compact in-memory schema. Only the columns present are converted:
+      - 'icao24': hexadecimal string -> uint32, ICAO24_INVALID for missing or malformed ones
+        (see encode_icao24).
+      - 'df': byte string -> uint8 (DF_NULL for missing values).
+      - 'altitude': float32.
+      - 'lat_deg', 'lon_deg': float64, or int32 micro-degrees if fixed_point_latlon is True.
+
+    All functions of this module accept both schemas. expand_dataframe converts back.
+
+    Args:
+        df (pd.DataFrame): The ADS-B data.
+        fixed_point_latlon (bool, optional): Store latitude/longitude as int32 micro-degrees.
+            Requires non-null positions. Defaults to False.
+
+    Returns:
+        pd.DataFrame: A compact copy of the DataFrame.
+
+    Raises:
+        ValueError: If fixed_point_latlon is requested and there are null positions.
+    """
+    df = df.copy()
+    if 'icao24' in df.columns and not pd.api.types.is_integer_dtype(df['icao24']):
+        df['icao24'] = encode_icao24(df['icao24'])
+    if 'df' in df.columns and not pd.api.types.is_integer_dtype(df['df']):
+        codes, uniques = pd.factorize(df['df'])
+        unique_ints = np.array([int(value) for value in uniques] + [DF_NULL], dtype=np.uint8)
+        df['df'] = unique_ints[codes]  # code -1 (null) picks the trailing DF_NULL
+    if 'altitude' in df.columns:
+        df['altitude'] = df['altitude'].astype(np.float32)
+    if fixed_point_latlon and not is_fixed_point(df):
+        for col in ['lat_deg', 'lon_deg']:
+            if df[col].isna().any():
+                raise ValueError(f"Column {col} has null values and cannot be stored as fixed point")
+            df[col] = np.round(df[col] * MICRODEGREES_PER_DEGREE).astype(np.int32)
+    return df
+
+
+@chunkwise
+def expand_dataframe(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convert ADS-B data in the compact schema (see compact_dataframe) back to the original one:
+    icao24 as hexadecimal strings, df as byte strings and latitude/longitude in float64 degrees.
+    Altitude is converted to float64. DataFrames already in the original schema are returned unchanged.
+
+    Args:
+        df (pd.DataFrame): The ADS-B data.
+
+    Returns:
+        pd.DataFrame: The expanded DataFrame.
+    """
+    df = with_degrees(df)
+    if 'icao24' in df.columns and pd.api.types.is_integer_dtype(df['icao24']):
+        df = df.copy()
+        df['icao24'] = decode_icao24(df['icao24'])
+    if 'df' in df.columns and pd.api.types.is_integer_dtype(df['df']):
+        df = df.copy()
+        df['df'] = [None if value == DF_NULL else str(value).encode() for value in df['df']]
+    if 'altitude' in df.columns and df['altitude'].dtype == np.float32:
+        df = df.copy()
+        df['altitude'] = df['altitude'].astype(np.float64)
+    return df
+
 
 def sort_dataframe(df: pd.DataFrame, fields: Optional[List[str]] = None) -> pd.DataFrame:
     """
@@ -44,6 +203,7 @@ def sort_dataframe(df: pd.DataFrame, fields: Optional[List[str]] = None) -> pd.D
     return sorted_df
 
 
+@chunkwise
 def extract_adsb_columns(df: pd.DataFrame, columns: list = None) -> pd.DataFrame:
     """
     Extract a subset of columns from the ADS-B data.
@@ -66,6 +226,7 @@ def extract_adsb_columns(df: pd.DataFrame, columns: list = None) -> pd.DataFrame
     return extracted_df
 
 
+@chunkwise
 def clean_dataframe_nulls(df: pd.DataFrame, fields: Optional[List[str]] = None) -> pd.DataFrame:
     """
     Filter the ADS-B data to remove rows with missing altitude or latitude.
@@ -91,6 +252,7 @@ def clean_dataframe_nulls(df: pd.DataFrame, fields: Optional[List[str]] = None)
     return df
 
 
+@chunkwise
 def filter_dataframe_by_icao(df: pd.DataFrame, icao24_list: list = None) -> pd.DataFrame:
     """
     Filter the ADS-B data by a list of icao24 identifiers.
@@ -104,13 +266,17 @@ def filter_dataframe_by_icao(df: pd.DataFrame, icao24_list: list = None) -> pd.D
         pd.DataFrame: The filtered DataFrame.
     """
     if icao24_list:
-        df = df[df['icao24'].isin(icao24_list)]
+        if pd.api.types.is_integer_dtype(df['icao24']):
+            df = df[df['icao24'].isin(encode_icao24(icao24_list))]
+        else:
+            df = df[df['icao24'].isin(icao24_list)]
         print(f"Rows after filtering by provided icao24 values {icao24_list}: {len(df)}")
     else:
         print("No specific icao24 codes provided. Processing all flights.")
     return df
 
 
+@chunkwise
 def filter_dataframe_by_bounds(df, min_lat, max_lat, min_lon, max_lon):
     """
     Filters the given DataFrame to only include rows where:
@@ -127,6 +293,9 @@ def filter_dataframe_by_bounds(df, min_lat, max_lat, min_lon, max_lon):
     Returns:
         pd.DataFrame: Filtered DataFrame containing only rows within the specified bounds.
     """
+    if is_fixed_point(df):
+        min_lat, max_lat, min_lon, max_lon = [bound * MICRODEGREES_PER_DEGREE
+                                              for bound in (min_lat, max_lat, min_lon, max_lon)]
     filtered_df = df[
         (df['lat_deg'] >= min_lat) & (df['lat_deg'] <= max_lat) &
         (df['lon_deg'] >= min_lon) & (df['lon_deg'] <= max_lon)
@@ -134,6 +303,7 @@ def filter_dataframe_by_bounds(df, min_lat, max_lat, min_lon, max_lon):
     return filtered_df
 
 
+@chunkwise
 def filter_dataframe_by_altitude(df, min_alt, max_alt):
     """
     Filters the given DataFrame to only include rows where:
@@ -153,6 +323,26 @@ def filter_dataframe_by_altitude(df, min_alt, max_alt):
     return filtered_df
 
 
+def downsample_dataframe(df: pd.DataFrame, interval: float = 1) -> pd.DataFrame:
+    """
+    Downsample the trajectories: keep at most one point per aircraft and time interval (the first point
+    of each aircraft in each interval).
+
+    Parameters:
+        df (pd.DataFrame): The input DataFrame containing 'icao24' and 'ts' [ms] columns.
+        interval (float): Length of the time intervals [s], positive. It is rounded to the millisecond,
+            with a minimum of 1 ms.
+
+    Returns:
+        pd.DataFrame: The kept rows, in their original order.
+    """
+    if interval <= 0:
+        raise ValueError(f"Downsampling interval must be positive, got {interval}")
+    bucket = df['ts'].to_numpy() // max(1, round(interval * 1000))
+    duplicated = pd.DataFrame({'icao24': df['icao24'].to_numpy(), 'bucket': bucket}).duplicated().to_numpy()
+    return df[~duplicated]
+
+
 def identify_segments(df, time_gap_threshold=3600):
     """
     Identify separate trajectory segments in ADS-B data based on time gaps and classify each segment,
@@ -179,56 +369,237 @@ def identify_segments(df, time_gap_threshold=3600):
               * 'altitude_change': Overall altitude change in the segment.
               * 'trajectory': Classification of the segment.
     """
-    annotated_list = []
-    segment_summary_list = []
-
-    # Process each flight separately by grouping on 'icao24'
-    for icao, group in df.groupby('icao24'):
-        # Ensure the data is sorted by timestamp
-        group = group.sort_values('ts').copy()
-
-        # Compute time difference between consecutive rows (converted to seconds)
-        group['time_gap'] = group['ts'].diff().fillna(0) / 1000
-
-        # Create a new segment whenever the time gap exceeds the threshold.
-        # Each flight has its own segment numbering.
-        group['segment'] = (group['time_gap'] > time_gap_threshold).cumsum()
+    # Whole-column passes over the data sorted by flight and time (sort_dataframe order). The stable
+    # sort keeps the order of the points with the same timestamp, and is cheap on sorted data.
+    # Points without icao24 are dropped, as by groupby.
+    annotated_df = df[df['icao24'].notna()].sort_values(['icao24', 'ts'], kind='stable').reset_index(drop=True)
+    icao24 = annotated_df['icao24'].to_numpy()
+
+    # First point of each flight
+    new_flight = np.ones(len(annotated_df), dtype=bool)
+    new_flight[1:] = icao24[1:] != icao24[:-1]
+
+    # Time difference between consecutive points of the same flight (converted to seconds)
+    annotated_df['time_gap'] = annotated_df['ts'].diff().where(~new_flight).fillna(0) / 1000
+
+    # Create a new segment whenever the time gap exceeds the threshold.
+    # Each flight has its own segment numbering: the cumulative count of gaps since its first point.
+    new_gap = (annotated_df['time_gap'] > time_gap_threshold).to_numpy()
+    gap_count = np.cumsum(new_gap)
+    flight_start = np.maximum.accumulate(np.where(new_flight, np.arange(len(annotated_df)), 0))
+    annotated_df['segment'] = (gap_count - gap_count[flight_start]).astype(np.int64)
+
+    # Compute summary statistics for each segment of each flight.
+    segment_summary = annotated_df.groupby(['icao24', 'segment'], sort=False).agg(
+        start_time=('ts', 'first'),
+        end_time=('ts', 'last'),
+        start_altitude=('altitude', 'first'),
+        end_altitude=('altitude', 'last')
+    ).reset_index()
+
+    # Calculate overall altitude change for each segment.
+    segment_summary['altitude_change'] = segment_summary['end_altitude'] - segment_summary['start_altitude']
+
+    # Classify each segment.
+    segment_summary['trajectory'] = np.where(
+        segment_summary['altitude_change'] > 0, 'departing',
+        np.where(segment_summary['altitude_change'] < 0, 'landing', 'level')
+    )
+    segment_summary = segment_summary[['segment', 'start_time', 'end_time', 'start_altitude', 'end_altitude',
+                                       'altitude_change', 'trajectory', 'icao24']]
+
+    # Broadcast the trajectory classification to the points: segments are contiguous and in summary order.
+    segment_position = np.cumsum(new_flight | new_gap) - 1
+    annotated_df['trajectory'] = segment_summary['trajectory'].to_numpy()[segment_position]
 
-        # Compute summary statistics for each segment in the flight.
-        seg_summary = group.groupby('segment').agg(
-            start_time=('ts', 'first'),
-            end_time=('ts', 'last'),
-            start_altitude=('altitude', 'first'),
-            end_altitude=('altitude', 'last')
-        ).reset_index()
-
-        # Calculate overall altitude change for each segment.
-        seg_summary['altitude_change'] = seg_summary['end_altitude'] - seg_summary['start_altitude']
-
-        # Classify each segment.
-        seg_summary['trajectory'] = np.where(
-            seg_summary['altitude_change'] > 0, 'departing',
-            np.where(seg_summary['altitude_change'] < 0, 'landing', 'level')
-        )
+    return annotated_df, segment_summary
 
-        # Add the flight identifier to the segment summary.
-        seg_summary['icao24'] = icao
 
-        # Merge the trajectory classification back into the group's DataFrame.
-        group = group.merge(seg_summary[['segment', 'trajectory']], on='segment', how='left')
+class StreamingSegmenter:
+    """
+    Streaming form of identify_segments, to segment a long period (e.g. a whole season) in one pass
+    with a memory proportional to the number of aircraft flying at the same time.
+
+    Time-ordered batches of points are pushed one after the other. Each aircraft with open segments
+    has one small record (the time of its last emitted point, the number of its next segment, and the
+    end of its first open segment) and the raw points of its open segments, which are
+    needed to classify them. A push only appends the points of the batch to their aircraft, and
+    segments the points of the aircraft whose first open segment may be closed. A segment is closed,
+    and emitted with its summary and its annotated points, once no later point can extend it: when its
+    last point is older than the time gap threshold before the oldest time a future point can have.
+
+    The record of an aircraft is evicted once all its segments are closed. When it reappears, the
+    numbering of its segments starts again from 0 and the time_gap of its first point is 0, as for a
+    new aircraft: the segments of a long stream are identified by (icao24, start_time).
+
+    The batches must be in time order, up to max_delay: a point may not be older than the newest
+    point of the previous batches by more than max_delay (e.g. one hour when the batches come from
+    the hourly partitions, see tools_import.iter_parquet_batches, whose points are not sorted
+    within an hour).
+
+    The segments are emitted in the order they close. Concatenating all the emitted points and
+    summaries, and sorting them by icao24 and time, gives the output of identify_segments, but for the
+    segment numbers and the first time_gap of the aircraft that reappear after their record was evicted.
+    """
 
-        # (Optionally) Reinforce the flight identifier in the group's DataFrame.
-        group['icao24'] = icao
+    def __init__(self, time_gap_threshold=3600, max_delay=3600):
+        """
+        Args:
+            time_gap_threshold (int, optional): The time gap threshold (in seconds) used to define a new
+                segment. Defaults to 3600 seconds (1 hour).
+            max_delay (int, optional): Maximum delay (in seconds) of a point with respect to the newest
+                point of the previous batches. Defaults to 3600 seconds (1 hour).
+        """
+        self.time_gap_threshold = time_gap_threshold
+        self.max_delay = max_delay
+        self.watermark = None   # Newest timestamp seen
+        # One record per aircraft with open segments: the timestamp of its last emitted point, the number
+        # of its next emitted segment, and the end time of its first open segment (a lower bound, its
+        # points are segmented again when it may be closed)
+        self.aircraft = pd.DataFrame({'emitted_ts': pd.Series(dtype=float), 'next_segment': pd.Series(dtype=np.int64),
+                                      'close_after': pd.Series(dtype=float)})
+        # Points of the open segments: chunks of points sorted by icao24 (the pushed batches), the slices
+        # (chunk, start, stop) of the points of each aircraft, and the number of slices of each chunk
+        self.chunks = {}
+        self.slices = {}
+        self.slice_count = {}
+        self.next_chunk = 0
+
+    def push(self, batch) -> tuple:
+        """
+        Add a batch of points (pandas DataFrame, or pyarrow record batch or table) and return the
+        segments that are closed.
+
+        Returns:
+            tuple: (annotated_df, segment_summary) of the closed segments, as in identify_segments.
+        """
+        if not isinstance(batch, pd.DataFrame):
+            batch = batch.to_pandas()
+        batch = batch[batch['icao24'].notna()]
+        if not batch.empty:
+            batch_watermark = batch['ts'].max()
+            self.watermark = batch_watermark if self.watermark is None else max(self.watermark, batch_watermark)
+
+            # Update the records of the aircraft of the batch, and append their points
+            first_ts = batch.groupby('icao24', sort=False)['ts'].min()
+            aircraft = self.aircraft.reindex(self.aircraft.index.union(first_ts.index))
+            aircraft['close_after'] = np.fmin(aircraft['close_after'], first_ts.reindex(aircraft.index))
+            aircraft['next_segment'] = aircraft['next_segment'].fillna(0).astype(np.int64)
+            self.aircraft = aircraft
+            self._add_chunk(batch.sort_values('icao24', kind='stable'))
+        if self.watermark is None:
+            return self._emit(None)
+        return self._emit(self.watermark - self.max_delay * 1000)
+
+    def close(self) -> tuple:
+        """
+        Close and return all the open segments, at the end of the stream.
+
+        Returns:
+            tuple: (annotated_df, segment_summary) of the closed segments, as in identify_segments.
+        """
+        return self._emit(None, close_all=True)
+
+    def _emit(self, oldest_future_ts, close_all=False) -> tuple:
+        threshold = self.time_gap_threshold * 1000
+        aircraft = self.aircraft
+
+        # Aircraft whose first open segment may be closed
+        if close_all:
+            candidates = aircraft.index[aircraft['close_after'].notna()]
+        elif oldest_future_ts is None:
+            candidates = aircraft.index[:0]
+        else:
+            candidates = aircraft.index[(aircraft['close_after'] + threshold < oldest_future_ts).to_numpy()]
+        if len(candidates) == 0:
+            return pd.DataFrame(), pd.DataFrame()
 
-        # Append the results for this flight.
-        annotated_list.append(group)
-        segment_summary_list.append(seg_summary)
+        points = self._take_points(candidates)
+        columns = list(points.columns)
+        annotated_df, segment_summary = identify_segments(points, self.time_gap_threshold)
 
-    # Combine the annotated data and summaries from all flights.
-    annotated_df = pd.concat(annotated_list).reset_index(drop=True)
-    segment_summary = pd.concat(segment_summary_list).reset_index(drop=True)
+        # Segments that no future point can extend
+        if close_all:
+            closed = np.ones(len(segment_summary), dtype=bool)
+        else:
+            closed = (segment_summary['end_time'] + threshold < oldest_future_ts).to_numpy()
+        closed_points = closed[annotated_df.groupby(['icao24', 'segment'], sort=False).ngroup().to_numpy()]
+
+        # Continue the time gaps and the segment numbering of the segments already emitted
+        icao24 = annotated_df['icao24']
+        new_flight = (icao24 != icao24.shift()).to_numpy()
+        emitted_ts = icao24.map(aircraft['emitted_ts'])
+        continued = new_flight & emitted_ts.notna().to_numpy()
+        annotated_df.loc[continued, 'time_gap'] = (annotated_df['ts'][continued] - emitted_ts[continued]) / 1000
+        annotated_df['segment'] += icao24.map(aircraft['next_segment']).to_numpy()
+        segment_summary['segment'] += segment_summary['icao24'].map(aircraft['next_segment']).to_numpy()
+
+        # Update the records of the candidates, and keep the points of their open segments
+        closed_summary = segment_summary[closed].reset_index(drop=True)
+        last_closed = closed_summary.groupby('icao24', sort=False).last()
+        aircraft.loc[last_closed.index, 'next_segment'] = last_closed['segment'] + 1
+        aircraft.loc[last_closed.index, 'emitted_ts'] = last_closed['end_time'].astype(float)
+        first_open = segment_summary[~closed].groupby('icao24', sort=False).first()
+        aircraft.loc[candidates, 'close_after'] = np.nan
+        aircraft.loc[first_open.index, 'close_after'] = first_open['end_time'].astype(float)
+        self._add_chunk(annotated_df.loc[~closed_points, columns])
+
+        # Evict the aircraft without open segments
+        self.aircraft = aircraft[aircraft['close_after'].notna()].copy()
+
+        return annotated_df[closed_points].reset_index(drop=True), closed_summary
+
+    def _add_chunk(self, points: pd.DataFrame):
+        # Add points sorted by icao24, referenced by one slice per aircraft
+        if points.empty:
+            return
+        chunk = self.next_chunk
+        self.next_chunk += 1
+        icao24 = points['icao24'].to_numpy()
+        starts = np.flatnonzero(np.concatenate([[True], icao24[1:] != icao24[:-1]]))
+        stops = np.append(starts[1:], len(icao24))
+        for icao, start, stop in zip(icao24[starts].tolist(), starts.tolist(), stops.tolist()):
+            self.slices.setdefault(icao, []).append((chunk, start, stop))
+        self.chunks[chunk] = points
+        self.slice_count[chunk] = len(starts)
+
+    def _take_points(self, aircraft) -> pd.DataFrame:
+        # Remove the points of the given aircraft, in the order they were pushed
+        rows = {}
+        for icao in aircraft:
+            for chunk, start, stop in self.slices.pop(icao):
+                rows.setdefault(chunk, []).append(np.arange(start, stop))
+        frames = []
+        for chunk in sorted(rows):
+            frames.append(self.chunks[chunk].iloc[np.concatenate(rows[chunk])])
+            self.slice_count[chunk] -= len(rows[chunk])
+            if self.slice_count[chunk] == 0:
+                del self.chunks[chunk], self.slice_count[chunk]
+        return pd.concat(frames, ignore_index=True)
+
+
+def iter_segments(batches, time_gap_threshold=3600, max_delay=3600):
+    """
+    Segment a stream of time-ordered batches of points with a StreamingSegmenter.
 
-    return annotated_df, segment_summary
+    Args:
+        batches (iterable): Batches of points (pandas DataFrames, or pyarrow record batches or tables).
+        time_gap_threshold (int, optional): The time gap threshold (in seconds) used to define a new segment.
+        max_delay (int, optional): Maximum delay (in seconds) of a point with respect to the newest
+            point of the previous batches.
+
+    Yields:
+        tuple: (annotated_df, segment_summary) of the segments closed after each batch, then of the
+            segments still open at the end of the stream.
+    """
+    segmenter = StreamingSegmenter(time_gap_threshold, max_delay)
+    for batch in batches:
+        annotated_df, segment_summary = segmenter.push(batch)
+        if not segment_summary.empty:
+            yield annotated_df, segment_summary
+    annotated_df, segment_summary = segmenter.close()
+    if not segment_summary.empty:
+        yield annotated_df, segment_summary
 
 
 def haversine(lat1, lon1, lat2, lon2):
@@ -245,88 +616,141 @@ def haversine(lat1, lon1, lat2, lon2):
 
 def calculate_bearing(lat1, lon1, lat2, lon2):
     """
-    Calculate the bearing between two points.
+    Calculate the bearing between two points (or arrays of points, see compute_bearing_vector).
     All args must be in decimal degrees.
     """
-    lat1, lon1, lat2, lon2 = map(np.radians, [lat1, lon1, lat2, lon2])
-    dlon = lon2 - lon1
+    return compute_bearing_vector(lat1, lon1, lat2, lon2)
 
-    x = np.sin(dlon) * np.cos(lat2)
-    y = np.cos(lat1)*np.sin(lat2) - np.sin(lat1)*np.cos(lat2)*np.cos(dlon)
-
-    initial_bearing = np.arctan2(x, y)
-    initial_bearing = np.degrees(initial_bearing)
-    compass_bearing = (initial_bearing + 360) % 360
+def find_last_no_turning_point(group_df, nearest_thr, heading_offset=10):
+    """
+    Find the FAP point of the backwards method in one segment: going backwards in time from the nearest
+    threshold point, the last point before the aircraft leaves the heading cone of the runway, i.e. the
+    start of the final contiguous run of points whose bearing to the threshold point is within
+    heading_offset of the runway heading (see find_last_no_turning_points for all segments at once).
 
-    return compass_bearing
+    Args:
+        group_df (pd.DataFrame): Points of one (icao24, segment) group.
+        nearest_thr (dict): Nearest threshold point of the group, see find_nearest_point.
+        heading_offset (float, optional): Half-width of the heading cone [deg]. Defaults to 10.
 
-def find_last_no_turning_point(group_df, nearest_thr):
+    Returns:
+        dict: 'distance' (0), 'runway', 'point', 'index' and 'ts' of the FAP point, or None if the point
+            preceding the threshold point is not in the cone.
+    """
+    group_df = with_degrees(group_df)
     runway = nearest_thr['runway']
-    index = nearest_thr['index']
     runway_heading = float(runway[:2])*10
-    offset = 10
 
-    group_df['bearing'] = group_df.apply(lambda row: calculate_bearing(row['lat_deg'], row['lon_deg'], nearest_thr["point"]["lat_deg"], nearest_thr["point"]["lon_deg"]), axis=1)
+    # Points in time order, up to the threshold point
+    group_df = group_df.iloc[np.argsort(group_df['ts'].to_numpy(), kind='stable')]
+    thr_pos = group_df.index.get_loc(nearest_thr['index'])
+    bearing = calculate_bearing(group_df['lat_deg'].to_numpy()[:thr_pos], group_df['lon_deg'].to_numpy()[:thr_pos],
+                                nearest_thr["point"]["lat_deg"], nearest_thr["point"]["lon_deg"])
+    within_range = np.abs((bearing - runway_heading + 180) % 360 - 180) <= heading_offset
+    if thr_pos == 0 or not within_range[-1]:
+        return None
 
-    nearest = {
-        'distance': float('inf'),
-        'runway': None,
-        'point': None,
-        'index': None
+    # Start of the final run of points in the cone
+    out_of_range = np.flatnonzero(~within_range)
+    start = out_of_range[-1] + 1 if len(out_of_range) else 0
+    fap_point = group_df.iloc[start]
+
+    return {
+        'distance': 0,
+        'runway': runway,
+        'point': fap_point,
+        'index': group_df.index[start],
+        # Save the timestamp from the 'ts' field of the corresponding row
+        'ts': fap_point['ts']
     }
 
-    group_df['within_range'] = (group_df['bearing'] >= runway_heading - offset) & (group_df['bearing'] <= runway_heading + offset)
+def haversine_vector(lat1, lon1, lat2, lon2):
+    """
+    Vectorised haversine: element-wise distances [meters] between arrays of points (broadcast as NumPy arrays).
+    """
+    # Radius of Earth in meters
+    R = 6371000
+    lat1, lon1, lat2, lon2 = (np.asarray(value, dtype=float) for value in (lat1, lon1, lat2, lon2))
+    phi1, phi2 = np.radians(lat1), np.radians(lat2)
+    dphi = np.radians(lat2 - lat1)
+    dlambda = np.radians(lon2 - lon1)
 
-    if not group_df['within_range'].unique()[0]:
-        return None
+    a = np.sin(dphi/2)**2 + np.cos(phi1) * np.cos(phi2) * np.sin(dlambda/2)**2
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+    return R * c
 
-    last_true_row = group_df[group_df['within_range']].iloc[-1]
-    last_true_index = group_df[group_df['within_range']].index[-1]
 
-    nearest['distance'] = 0
-    nearest['runway'] = runway
-    nearest['point'] = last_true_row
-    nearest['index'] = last_true_index
-    # Save the timestamp from the 'ts' field of the corresponding row
-    nearest['ts'] = last_true_row['ts']
+def haversine_matrix(lat, lon, target_lat, target_lon) -> np.ndarray:
+    """
+    Vectorised haversine: distances [meters] between N points and R targets, in one pass.
 
-    return nearest
+    Args:
+        lat, lon (array-like): Coordinates of the N points [deg].
+        target_lat, target_lon (array-like): Coordinates of the R targets [deg].
+
+    Returns:
+        np.ndarray: N x R matrix of distances.
+    """
+    return haversine_vector(np.asarray(lat, dtype=float)[:, None], np.asarray(lon, dtype=float)[:, None],
+                            np.asarray(target_lat, dtype=float)[None, :], np.asarray(target_lon, dtype=float)[None, :])
+
+
+def find_nearest_point(baseline_position, filtered_df: pd.DataFrame):
+    """
+    Find the point of the trajectory nearest to a set of runway positions (e.g. FAP_position or
+    threshold_position), computing the distances to all the positions at once.
+
+    Several sets of positions can be given as a list, e.g. [FAP_position, threshold_position]:
+    the distances to all of them are then computed in one pass, and a list with the result of each
+    set is returned.
+
+    Args:
+        baseline_position (dict or list): Positions per runway (objects with latitude and longitude),
+            or a list of such dicts.
+        filtered_df (pd.DataFrame): Trajectory points, with 'lat_deg', 'lon_deg' and 'ts' columns.
+
+    Returns:
+        dict (or list of dicts): 'distance' [meters], 'runway', 'point' (the nearest row), 'base_lat',
+            'base_lon' (the runway position), 'index' (the index label of the nearest row) and 'ts'.
+            Ties go to the first runway, then to the first point.
+    """
+    position_sets = baseline_position if isinstance(baseline_position, (list, tuple)) else [baseline_position]
 
-def find_nearest_point(baseline_position: dict, filtered_df: pd.DataFrame):
     # Make sure filtered_df has numeric lat/lon
-    df = filtered_df.copy()
+    df = with_degrees(filtered_df)
     df = df.dropna(subset=['lat_deg', 'lon_deg'])
 
-    nearest = {
-        'distance': float('inf'),
-        'runway': None,
-        'point': None,
-        'base_lat': None,
-        'base_lon': None,
-        'index': None,
-        'ts': None
-    }
-
-    for runway, point in baseline_position.items():
-        # Compute haversine distance from all points to this FAP
-        distances = df.apply(
-            lambda row: haversine(row['lat_deg'], row['lon_deg'], point.latitude, point.longitude),
-            axis=1
-        )
-
-        min_idx = distances.idxmin()
-        min_distance = distances[min_idx]
-
-        if min_distance < nearest['distance']:
-            nearest['distance'] = min_distance
-            nearest['runway'] = runway
-            nearest['point'] = df.loc[min_idx]
-            nearest['base_lat'] = point.latitude
-            nearest['base_lon'] = point.longitude
-            nearest['index'] = min_idx
-            nearest['ts'] = df.loc[min_idx]['ts']
+    # Distances from all points to all the positions of all the sets (N x R)
+    positions = [(runway, point) for position_set in position_sets for runway, point in position_set.items()]
+    distances = haversine_matrix(df['lat_deg'].to_numpy(), df['lon_deg'].to_numpy(),
+                                 [point.latitude for _, point in positions],
+                                 [point.longitude for _, point in positions])
 
-    return nearest
+    results = []
+    first_column = 0
+    for position_set in position_sets:
+        set_distances = distances[:, first_column:first_column + len(position_set)]
+        set_positions = positions[first_column:first_column + len(position_set)]
+        first_column += len(position_set)
+
+        # Nearest point to each runway, then nearest runway
+        nearest_rows = set_distances.argmin(axis=0)
+        best = int(np.argmin(set_distances[nearest_rows, np.arange(len(set_positions))]))
+        row = nearest_rows[best]
+        runway, point = set_positions[best]
+        nearest_point = df.iloc[row]
+
+        results.append({
+            'distance': set_distances[row, best],
+            'runway': runway,
+            'point': nearest_point,
+            'base_lat': point.latitude,
+            'base_lon': point.longitude,
+            'index': df.index[row],
+            'ts': nearest_point['ts']
+        })
+
+    return results if isinstance(baseline_position, (list, tuple)) else results[0]
 
 
 def compute_bearing(lat1, lon1, lat2, lon2):
@@ -339,411 +763,450 @@ def compute_bearing(lat1, lon1, lat2, lon2):
     return (bearing + 360) % 360
 
 
-def identify_landing_runway(df):
-    results = []
-    basic_info_results = []
-    segments_ils_results = []  # List to collect the trajectory segments (ILS segments)
+def compute_bearing_vector(lat1, lon1, lat2, lon2):
+    """
+    Vectorised compute_bearing: element-wise bearings [deg] from the first to the second points.
+    """
+    # Convert latitude/longitude from degrees to radians.
+    lat1, lon1, lat2, lon2 = (np.asarray(value, dtype=float) for value in (lat1, lon1, lat2, lon2))
+    phi1, phi2 = np.radians(lat1), np.radians(lat2)
+    delta_lon = np.radians(lon2 - lon1)
+    x = np.sin(delta_lon) * np.cos(phi2)
+    y = np.cos(phi1) * np.sin(phi2) - np.sin(phi1) * np.cos(phi2) * np.cos(delta_lon)
+    bearing = np.degrees(np.arctan2(x, y))
+    return (bearing + 360) % 360
 
-    # Filter out unwanted trajectories
-    if 'trajectory' in df.columns:
-        df = df[~df['trajectory'].isin(['departing', 'level'])]
 
-    # Group by icao24 and segment
-    grouped = df.groupby(['icao24', 'segment'])
-
-    for (icao24, segment), group_df in grouped:
-
-        # Get a representative timestamp from the group (using the first row)
-        rep_ts = group_df['ts'].iloc[0]
-        rep_date = datetime.datetime.utcfromtimestamp(rep_ts / 1000).strftime('%Y-%m-%d %Hh')
-
-        # Find the nearest point to the FAP position and to the threshold position.
-        nearest_fap = find_nearest_point(FAP_position, group_df)
-        nearest_thr = find_nearest_point(threshold_position, group_df)
-
-        # Ensure that the runways are the same
-        if nearest_fap['runway'] != nearest_thr['runway']:
-            print(f'  icao24 {icao24} at ts {rep_ts} ({rep_date}): runways do not match: '
-                  f'{nearest_fap["runway"]} != {nearest_thr["runway"]}')
-            continue
-
-        # Ensure that the found points are "close enough" to the FAP
-        if nearest_fap['distance'] > 700:  # [meters]
-            print(f'  icao24 {icao24} at ts {rep_ts} ({rep_date}): FAP distance too large: {nearest_fap["distance"]}')
-            continue
-
-        # Ensure that the found points are "close enough" to the THR
-        if nearest_thr['distance'] > 700:  # [meters]
-            print(f'  icao24 {icao24} at ts {rep_ts} ({rep_date}): THR distance too large: {nearest_thr["distance"]}')
-            continue
-
-        # Augment the group's dataframe with runway and index/timestamp info
-        group_df = group_df.copy()
-        group_df['runway_fap'] = nearest_fap['runway']
-        group_df['runway_thr'] = nearest_thr['runway']
-        group_df['idx_fap'] = nearest_fap['index']
-        group_df['idx_thr'] = nearest_thr['index']
-        group_df['ts_fap'] = nearest_fap['ts']
-        group_df['ts_thr'] = nearest_thr['ts']
-
-        # Compute and add delta_time to each row in the group
-        delta_time_real = (nearest_thr['ts'] - nearest_fap['ts']) / 1000
-        group_df['delta_time'] = delta_time_real
-
-        # Extract coordinates for the nearest FAP and threshold points
-        lat_fap = group_df.loc[nearest_fap['index'], 'lat_deg']
-        lon_fap = group_df.loc[nearest_fap['index'], 'lon_deg']
-        lat_thr = group_df.loc[nearest_thr['index'], 'lat_deg']
-        lon_thr = group_df.loc[nearest_thr['index'], 'lon_deg']
-
-        # Compute the distance between the nearest FAP point and the nearest threshold point
-        distance_real = haversine(lat_fap, lon_fap, lat_thr, lon_thr)
-
-        # Compute the "true" distance between the actual FAP and THR positions
-        true_distance = haversine(nearest_fap["base_lat"], nearest_fap["base_lon"],
-                                  nearest_thr["base_lat"], nearest_thr["base_lon"])
-
-        # Compute a scaling factor (avoid division by zero)
-        scaling_factor = true_distance / distance_real if distance_real != 0 else 1
-
-        # Re-scale the delta_time and distance
-        delta_time_scaled = delta_time_real * scaling_factor
-        distance_scaled = distance_real * scaling_factor  # This should be equal to true_distance
-
-        # Save the scaled values to the group dataframe
-        group_df['distance_fap_to_thr'] = true_distance
-        group_df['delta_time_fap_to_thr'] = delta_time_scaled
-
-        # ----- New Computations at the FAP Point -----
-        # Compute speed, vertical_speed, and heading at the FAP point using the previous data point.
-        # We sort by timestamp to ensure the points are in chronological order.
-        group_df_sorted = group_df.sort_values('ts')
-        try:
-            # Get the position of the FAP point in the sorted dataframe
-            fap_pos = group_df_sorted.index.get_loc(nearest_fap['index'])
-        except Exception as e:
-            fap_pos = None
-
-        if fap_pos is not None and fap_pos > 0:
-            previous_point = group_df_sorted.iloc[fap_pos - 1]
-            # Time difference in seconds
-            dt = (nearest_fap['ts'] - previous_point['ts']) / 1000.0
-            if dt > 0:
-                # Compute horizontal distance in meters between previous point and FAP point.
-                horiz_distance = haversine(lat_fap, lon_fap, previous_point['lat_deg'], previous_point['lon_deg'])
-                speed = horiz_distance / dt  # in m/s
-                # Compute vertical speed using altitude difference (assumes 'altitude' column exists)
-                vertical_speed = (group_df.loc[nearest_fap['index'], 'altitude'] - previous_point['altitude']) / dt
-                # Compute heading (bearing) from the previous point to the FAP point.
-                heading = compute_bearing(previous_point['lat_deg'], previous_point['lon_deg'], lat_fap, lon_fap)
-            else:
-                speed, vertical_speed, heading = None, None, None
-        else:
-            speed, vertical_speed, heading = None, None, None
-
-        # Build the basic info dictionary for this icao24 segment including the new fields.
-        basic_info = {
-            'icao24': icao24,
-            'runway_fap': nearest_fap['runway'],
-            'idx_fap': nearest_fap['index'],
-            'idx_thr': nearest_thr['index'],
-            'ts_fap': nearest_fap['ts'],
-            'ts_thr': nearest_thr['ts'],
-            'lat_deg_fap': lat_fap,
-            'lon_deg_fap': lon_fap,
-            'lat_deg_thr': lat_thr,
-            'lon_deg_thr': lon_thr,
-            'distance': distance_real,
-            'delta_time': delta_time_real,
-            'distance_fap_to_thr': true_distance,
-            'delta_time_fap_to_thr': delta_time_scaled,
-            'speed_fap': speed,
-            'vertical_speed_fap': vertical_speed,
-            'heading_fap': heading
-        }
-        basic_info_results.append(basic_info)
-        # ---------------------------------------------
-
-        # Extract the ILS segment: the rows between the FAP and THR identified points.
-        try:
-            pos_fap = group_df.index.get_loc(nearest_fap['index'])
-            pos_thr = group_df.index.get_loc(nearest_thr['index'])
-        except Exception as e:
-            print(f"Error determining positions for icao24 {icao24}: {e}")
-            continue
-
-        start_pos = min(pos_fap, pos_thr)
-        end_pos = max(pos_fap, pos_thr) + 1  # +1 to include the endpoint
-        segment_ils = group_df.iloc[start_pos:end_pos]
-        segments_ils_results.append(segment_ils)
-
-        # Add group to the results
-        results.append(group_df)
-
-    # Concatenate the augmented group dataframes
-    df_with_runway = pd.concat(results).reset_index(drop=True)
-
-    # Create the smaller dataframe with basic info for each icao24 segment
-    basic_info_df = pd.DataFrame(basic_info_results)
-
-    # Concatenate the ILS segments (if any) into a single dataframe
-    df_segments_ils = pd.concat(segments_ils_results).reset_index(drop=True) if segments_ils_results else pd.DataFrame()
+# FAP-selection strategies of identify_landing_runway_strategies
+LANDING_STRATEGIES = ['fap', 'backwards', 'scenario']
 
-    return df_with_runway, basic_info_df, df_segments_ils
+# Margin [m] of the spatial index searches over the 700 m gates, above the accuracy of its ENU frame
+INDEX_MARGIN = 1
 
-def identify_landing_runway_backwards(df):
-    results = []
-    basic_info_results = []
-    segments_ils_results = []  # List to collect the trajectory segments (ILS segments)
 
-    # Filter out unwanted trajectories
-    df = df[~df['trajectory'].isin(['departing', 'level'])]
-
-    # Group by icao24 and segment
-    grouped = df.groupby(['icao24', 'segment'])
-
-    for (icao24, segment), group_df in grouped:
-
-        # Get a representative timestamp from the group (using the first row)
-        rep_ts = group_df['ts'].iloc[0]
-        rep_date = datetime.datetime.utcfromtimestamp(rep_ts / 1000).strftime('%Y-%m-%d %Hh')
-
-
-        # Find the nearest point to the FAP position and to the threshold position.
-        nearest_thr = find_nearest_point(threshold_position, group_df)
-        nearest_fap = find_last_no_turning_point(group_df, nearest_thr)
-
-        if nearest_fap is None:
-            print(f'  icao24 {icao24} at ts {rep_ts} ({rep_date}): heading do not match')
-            continue # Nos el follem perque no esta prop del bearing esperat
-
-        # Ensure that the runways are the same
-        if nearest_fap['runway'] != nearest_thr['runway']:
-            print(f'  icao24 {icao24} at ts {rep_ts} ({rep_date}): runways do not match: '
-                  f'{nearest_fap["runway"]} != {nearest_thr["runway"]}')
-            continue
-
-        # Ensure that the found points are "close enough" to the FAP
-        if nearest_fap['distance'] > 700:  # [meters]
-            print(f'  icao24 {icao24} at ts {rep_ts} ({rep_date}): FAP distance too large: {nearest_fap["distance"]}')
-            continue
-
-        # Ensure that the found points are "close enough" to the THR
-        if nearest_thr['distance'] > 700:  # [meters]
-            print(f'  icao24 {icao24} at ts {rep_ts} ({rep_date}): THR distance too large: {nearest_thr["distance"]}')
-            continue
-
-        # Augment the group's dataframe with runway and index/timestamp info
-        group_df = group_df.copy()
-        group_df['runway_fap'] = nearest_fap['runway']
-        group_df['runway_thr'] = nearest_thr['runway']
-        group_df['idx_fap'] = nearest_fap['index']
-        group_df['idx_thr'] = nearest_thr['index']
-        group_df['ts_fap'] = nearest_fap['ts']
-        group_df['ts_thr'] = nearest_thr['ts']
-
-        # Compute and add delta_time to each row in the group
-        delta_time = (nearest_thr['ts'] - nearest_fap['ts']) / 1000
-        group_df['delta_time'] = delta_time
-
-        results.append(group_df)
-
-        # Extract coordinates for the nearest FAP and threshold df points
-        lat_fap = group_df.loc[nearest_fap['index'], 'lat_deg']
-        lon_fap = group_df.loc[nearest_fap['index'], 'lon_deg']
-        lat_thr = group_df.loc[nearest_thr['index'], 'lat_deg']
-        lon_thr = group_df.loc[nearest_thr['index'], 'lon_deg']
-
-        # Compute the distance between the nearest FAP point and the nearest threshold point
-        distance = haversine(lat_fap, lon_fap, lat_thr, lon_thr)
-
-        # Build the basic info dictionary for this icao24 segment
-        basic_info = {
-            'icao24': icao24,
-            'runway_fap': nearest_fap['runway'],
-            'idx_fap': nearest_fap['index'],
-            'idx_thr': nearest_thr['index'],
-            'ts_fap': nearest_fap['ts'],
-            'ts_thr': nearest_thr['ts'],
-            'delta_time': delta_time,
-            'lat_deg_fap': lat_fap,
-            'lon_deg_fap': lon_fap,
-            'lat_deg_thr': lat_thr,
-            'lon_deg_thr': lon_thr,
-            'distance_fap_to_thr': distance
-        }
-        basic_info_results.append(basic_info)
-
-        # Extract the ILS segment: the rows between the FAP and THR identified points.
-        # We first get their positional indexes in the group's dataframe.
-        try:
-            pos_fap = group_df.index.get_loc(nearest_fap['index'])
-            pos_thr = group_df.index.get_loc(nearest_thr['index'])
-        except Exception as e:
-            print(f"Error determining positions for icao24 {icao24}: {e}")
-            continue
-
-        start_pos = min(pos_fap, pos_thr)
-        end_pos = max(pos_fap, pos_thr) + 1  # +1 to include the endpoint
-        segment_ils = group_df.iloc[start_pos:end_pos]
-        segments_ils_results.append(segment_ils)
-
-    # Concatenate the augmented group dataframes
-    df_with_runway = pd.concat(results).reset_index(drop=True)
-
-    # Create the smaller dataframe with basic info for each icao24 segment
-    basic_info_df = pd.DataFrame(basic_info_results)
-
-    # Concatenate the ILS segments (if any) into a single dataframe
-    df_segments_ils = pd.concat(segments_ils_results).reset_index(drop=True) if segments_ils_results else pd.DataFrame()
+def _nearest_per_group(lat, lon, group_id, located, n_groups, positions, candidates=None):
+    """
+    Nearest point of each group to each runway position, then nearest runway (first runway, then
+    first point, on ties). Returns per group: the row, the distance, the runway and its position.
+
+    Without candidates, the distances from every located point to every position are computed. With
+    candidates (rows, runways) from a spatial index (see _index_candidates), only the distances of these
+    points to these runways are; the groups without candidates for a runway are at an infinite distance.
+    """
+    runways = list(positions)
+    nearest_rows = np.zeros((n_groups, len(runways)), dtype=np.int64)
+    nearest_distances = np.full((n_groups, len(runways)), np.inf)
+    if candidates is None:
+        located_rows = np.flatnonzero(located)
+        distances = haversine_matrix(lat[located], lon[located],
+                                     [positions[runway].latitude for runway in runways],
+                                     [positions[runway].longitude for runway in runways])
+        for column in range(len(runways)):
+            rows = pd.Series(distances[:, column]).groupby(group_id[located]).idxmin()
+            nearest_rows[rows.index, column] = located_rows[rows.to_numpy()]
+            nearest_distances[rows.index, column] = distances[rows.to_numpy(), column]
+    else:
+        candidate_rows, candidate_runways = candidates
+        for column, runway in enumerate(runways):
+            column_rows = np.sort(candidate_rows[candidate_runways == runway])
+            column_rows = column_rows[located[column_rows]]
+            distances = haversine_vector(lat[column_rows], lon[column_rows],
+                                         positions[runway].latitude, positions[runway].longitude)
+            rows = pd.Series(distances).groupby(group_id[column_rows]).idxmin()
+            nearest_rows[rows.index, column] = column_rows[rows.to_numpy()]
+            nearest_distances[rows.index, column] = distances[rows.to_numpy()]
+    best = np.argmin(nearest_distances, axis=1)
+    return {
+        'row': nearest_rows[np.arange(n_groups), best],
+        'distance': nearest_distances[np.arange(n_groups), best],
+        'runway': np.array(runways, dtype=object)[best],
+        'base_lat': np.array([positions[runway].latitude for runway in runways])[best],
+        'base_lon': np.array([positions[runway].longitude for runway in runways])[best],
+    }
+
+
+def _index_candidates(df, spatial_index, kind, radius=700):
+    """
+    Rows of df within a radius [m] of the FAP or threshold positions ('fap' or 'thr'), with the runway of
+    each, found with a spatial index of df (see tools_spatial.SpatialIndex) instead of all the distances. The
+    radius is widened by INDEX_MARGIN, the accuracy of the ENU frame of the index, so that the points
+    within the radius in haversine distance are all found.
+    """
+    # Imported here, tools_spatial depends on this module
+    from tools_spatial import runway_targets
+
+    matches = spatial_index.query_radius(runway_targets(kind), radius + INDEX_MARGIN)
+
+    # Index labels, as the index may have been built on the frame df was filtered from
+    rows = df.index.get_indexer(matches['index'])
+    found = rows >= 0
+    return rows[found], matches['target'].to_numpy()[found]
+
+
+def _select_nearest_fap(geometry, gated=True):
+    """
+    'fap' and 'scenario' strategies: the FAP point is the point nearest to a FAP position. With gates,
+    the runways must match and both points must be within 700 m of the FAP and THR positions.
+    """
+    fap, thr = geometry['fap'], geometry['thr']
+    has_points = np.isfinite(fap['distance']) & np.isfinite(thr['distance'])
+    if not gated:
+        print(f"  {has_points.sum()} of {geometry['n_groups']} segments with a landing")
+        return has_points, fap['row'], fap
+
+    same_runway = fap['runway'] == thr['runway']
+    fap_close = fap['distance'] <= 700  # [meters]
+    thr_close = thr['distance'] <= 700  # [meters]
+    accepted = has_points & same_runway & fap_close & thr_close
+    print(f"  {accepted.sum()} of {geometry['n_groups']} segments with a landing: "
+          f"{(~has_points).sum()} without points near a FAP and a threshold, "
+          f"{(has_points & ~same_runway).sum()} runways do not match, "
+          f"{(has_points & same_runway & ~fap_close).sum()} FAP distance too large, "
+          f"{(has_points & same_runway & fap_close & ~thr_close).sum()} THR distance too large")
+    return accepted, fap['row'], fap
+
+
+def _heading_cone_start(geometry, heading_offset=10):
+    """
+    FAP point of the backwards method in every group at once, see find_last_no_turning_point: the start
+    of the final run of points in the heading cone of the runway, before the nearest THR point.
+
+    Returns:
+        tuple: (found, fap_row) per group; found is False if the point preceding the THR point of the
+            group is not in the cone (or if there is none).
+    """
+    thr = geometry['thr']
+    group_id, n_groups = geometry['group_id'], geometry['n_groups']
+    time_order, time_rank = geometry['time_order'], geometry['time_rank']
+    grouped = group_id >= 0
+    point_group = np.maximum(group_id, 0)
+    point_thr_row = thr['row'][point_group]
+
+    # Bearing of each point to the nearest THR point of its group, and whether it is in the heading cone
+    runway_heading = np.array([float(runway[:2]) * 10 for runway in thr['runway']])
+    bearing = calculate_bearing(geometry['lat'], geometry['lon'],
+                                geometry['lat'][point_thr_row], geometry['lon'][point_thr_row])
+    difference = (bearing - runway_heading[point_group] + 180) % 360 - 180
+    in_cone = grouped & (np.abs(difference) <= heading_offset)
+
+    # In time order, the start of the run of in-cone points that each point belongs to
+    in_cone_sorted = in_cone[time_order]
+    positions = np.arange(len(time_order))
+    new_group = np.ones(len(time_order), dtype=bool)
+    new_group[1:] = group_id[time_order][1:] != group_id[time_order][:-1]
+    run_start = np.maximum.accumulate(np.where(~in_cone_sorted, positions + 1, np.where(new_group, positions, 0))) \
+        if len(positions) else positions
+
+    # The point preceding the THR point must be in the cone; the FAP point starts its run
+    thr_rank = time_rank[thr['row']]
+    previous = np.maximum(thr_rank - 1, 0)
+    found = np.isfinite(thr['distance']) & (thr_rank > 0)
+    found[found] &= (group_id[time_order[previous[found]]] == np.flatnonzero(found)) & in_cone_sorted[previous[found]]
+    fap_row = np.zeros(n_groups, dtype=np.int64)
+    fap_row[found] = time_order[run_start[previous[found]]]
+    return found, fap_row
+
+
+def find_last_no_turning_points(df, heading_offset=10) -> dict:
+    """
+    Whole-day version of find_last_no_turning_point: the FAP point of the backwards method of every
+    (icao24, segment) group, computed for all the groups at once.
+
+    Args:
+        df (pd.DataFrame): Segmented trajectory points (see identify_segments).
+        heading_offset (float, optional): Half-width of the heading cone [deg]. Defaults to 10.
+
+    Returns:
+        dict: For each (icao24, segment), the FAP point as returned by find_last_no_turning_point, or None.
+    """
+    df = with_degrees(df)
+    geometry = _landing_geometry(df, ['backwards'])
+    found, fap_row = _heading_cone_start(geometry, heading_offset)
+
+    icao24, segment = df['icao24'].to_numpy(), df['segment'].to_numpy()
+    nearest = {}
+    for group, thr_row in enumerate(geometry['thr']['row']):
+        row = fap_row[group]
+        nearest[(icao24[thr_row], segment[thr_row])] = {
+            'distance': 0,
+            'runway': geometry['thr']['runway'][group],
+            'point': df.iloc[row],
+            'index': geometry['index'][row],
+            'ts': geometry['ts'][row]
+        } if found[group] else None
+    return nearest
+
+
+def _select_heading_cone(geometry, heading_offset=10):
+    """
+    'backwards' strategy: the FAP point is the start of the final run of points in the heading cone of
+    the runway, before the nearest THR point (see find_last_no_turning_point). The THR point must be
+    within 700 m of the THR position.
+    """
+    thr, n_groups = geometry['thr'], geometry['n_groups']
+    found, fap_row = _heading_cone_start(geometry, heading_offset)
+
+    has_points = np.isfinite(thr['distance'])
+    thr_close = thr['distance'] <= 700  # [meters]
+    accepted = found & thr_close
+    print(f"  {accepted.sum()} of {n_groups} segments with a landing: "
+          f"{(~has_points).sum()} without points near a threshold, "
+          f"{(has_points & ~found).sum()} heading do not match, "
+          f"{(found & ~thr_close).sum()} THR distance too large")
+
+    # The FAP point is on the runway of the THR point, at no distance of the (unused) FAP position
+    fap = dict(thr, distance=np.zeros(n_groups))
+    return accepted, fap_row, fap
+
+
+def _landing_geometry(df, strategies, indexed=False, spatial_index=None):
+    """
+    Geometry shared by all the strategies, computed once for all the (icao24, segment) groups: the
+    group of each point, its position in the group and in time, and the nearest THR and FAP points.
+
+    If indexed, the nearest points are only searched among the points found within 700 m of the
+    positions by a spatial index (the gates of the 'fap' and 'backwards' strategies), and the groups
+    without any are at an infinite distance.
+    """
+    group_id = df.groupby(['icao24', 'segment']).ngroup().to_numpy()
+    n_groups = group_id.max() + 1 if len(group_id) else 0
+    lat = df['lat_deg'].to_numpy(dtype=float)
+    lon = df['lon_deg'].to_numpy(dtype=float)
+    located = (group_id >= 0) & ~np.isnan(lat) & ~np.isnan(lon)
+
+    geometry = {'df': df, 'group_id': group_id, 'n_groups': n_groups, 'lat': lat, 'lon': lon,
+                'ts': df['ts'].to_numpy(), 'index': df.index.to_numpy(),
+                'row_in_group': pd.Series(group_id).groupby(group_id).cumcount().to_numpy()}
+
+    # Position of each point in the time order of its group
+    time_order = np.lexsort((geometry['ts'], group_id))
+    time_rank = np.empty_like(time_order)
+    time_rank[time_order] = np.arange(len(time_order))
+    geometry['time_order'], geometry['time_rank'] = time_order, time_rank
+
+    if indexed and (spatial_index is None or not df.index.is_unique):
+        # Imported here, tools_spatial depends on this module
+        from tools_spatial import SpatialIndex
+        spatial_index = SpatialIndex(df)
+    candidates = _index_candidates(df, spatial_index, 'thr') if indexed else None
+    geometry['thr'] = _nearest_per_group(lat, lon, group_id, located, n_groups, threshold_position, candidates)
+    if any(strategy != 'backwards' for strategy in strategies):
+        candidates = _index_candidates(df, spatial_index, 'fap') if indexed else None
+        geometry['fap'] = _nearest_per_group(lat, lon, group_id, located, n_groups, FAP_position, candidates)
+    return geometry
+
+
+def _landing_tables(geometry, strategy, accepted, fap_row_per_group, fap):
+    """
+    Build the three outputs of a strategy (df_with_runway, basic_info_df, df_segments_ils) from its
+    accepted groups and their FAP points.
+    """
+    df, group_id, n_groups = geometry['df'], geometry['group_id'], geometry['n_groups']
+    ts, lat, lon, index = geometry['ts'], geometry['lat'], geometry['lon'], geometry['index']
+    thr = geometry['thr']
+    if not accepted.any():
+        return pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
+
+    # Values per accepted group
+    groups = np.flatnonzero(accepted)
+    fap_row, thr_row = fap_row_per_group[groups], thr['row'][groups]
+    ts_fap, ts_thr = ts[fap_row], ts[thr_row]
+    lat_fap, lon_fap, lat_thr, lon_thr = lat[fap_row], lon[fap_row], lat[thr_row], lon[thr_row]
+
+    # delta_time, and its scaling to the "true" distance between the actual FAP and THR positions
+    delta_time_real = (ts_thr - ts_fap) / 1000
+    distance_real = haversine_vector(lat_fap, lon_fap, lat_thr, lon_thr)
+    if strategy == 'backwards':
+        # The FAP point of the backwards method is not tied to a FAP position: no scaling
+        true_distance = distance_real
+    else:
+        true_distance = haversine_vector(fap['base_lat'][groups], fap['base_lon'][groups],
+                                         thr['base_lat'][groups], thr['base_lon'][groups])
+    scaling_factor = np.divide(true_distance, distance_real, out=np.ones_like(true_distance),
+                               where=distance_real != 0)
+    delta_time_scaled = delta_time_real * scaling_factor
+
+    # Speed, vertical_speed, and heading at the FAP point, from the previous point in time of the group
+    time_order, time_rank = geometry['time_order'], geometry['time_rank']
+    previous_row = time_order[np.maximum(time_rank[fap_row] - 1, 0)]
+    has_previous = (time_rank[fap_row] > 0) & (group_id[previous_row] == group_id[fap_row])
+    dt = (ts_fap - ts[previous_row]) / 1000.0
+    valid = has_previous & (dt > 0)
+    dt_valid = np.where(valid, dt, 1.0)
+    altitude = df['altitude'].to_numpy(dtype=float)
+    speed = np.where(valid, haversine_vector(lat_fap, lon_fap, lat[previous_row], lon[previous_row]) / dt_valid, np.nan)
+    vertical_speed = np.where(valid, (altitude[fap_row] - altitude[previous_row]) / dt_valid, np.nan)
+    heading = np.where(valid, compute_bearing_vector(lat[previous_row], lon[previous_row], lat_fap, lon_fap), np.nan)
+
+    # Distance from the FAP point to the true threshold, and the corresponding time at constant speed
+    distance_scenario = haversine_vector(lat_fap, lon_fap, thr['base_lat'][groups], thr['base_lon'][groups])
+    time_scenario = delta_time_real * np.divide(distance_scenario, distance_real, out=np.ones_like(distance_real),
+                                                where=distance_real != 0)
+
+    values = {
+        'icao24': df['icao24'].to_numpy()[fap_row],
+        'runway_fap': fap['runway'][groups],
+        'runway_thr': thr['runway'][groups],
+        'idx_fap': index[fap_row],
+        'idx_thr': index[thr_row],
+        'ts_fap': ts_fap,
+        'ts_thr': ts_thr,
+        'lat_deg_fap': lat_fap,
+        'lon_deg_fap': lon_fap,
+        'lat_deg_thr': lat_thr,
+        'lon_deg_thr': lon_thr,
+        'distance': distance_real,
+        'delta_time': delta_time_real,
+        'distance_fap_to_thr': true_distance,
+        'delta_time_fap_to_thr': delta_time_scaled,
+        'speed_fap': speed,
+        'vertical_speed_fap': vertical_speed,
+        'heading_fap': heading,
+        'distance_scenario': distance_scenario,
+        'time_scenario': time_scenario
+    }
+
+    # Columns of each strategy: the 'scenario' strategy adds the distance and time to the true threshold
+    runway_columns = ['runway_fap', 'runway_thr', 'idx_fap', 'idx_thr', 'ts_fap', 'ts_thr', 'delta_time',
+                      'distance_fap_to_thr', 'delta_time_fap_to_thr']
+    info_columns = ['icao24', 'runway_fap', 'idx_fap', 'idx_thr', 'ts_fap', 'ts_thr', 'lat_deg_fap',
+                    'lon_deg_fap', 'lat_deg_thr', 'lon_deg_thr', 'distance', 'delta_time',
+                    'distance_fap_to_thr', 'delta_time_fap_to_thr', 'speed_fap', 'vertical_speed_fap',
+                    'heading_fap']
+    if strategy == 'scenario':
+        info_columns += ['distance_scenario', 'time_scenario']
+
+    # Augment the points of the accepted groups with runway and index/timestamp info
+    group_position = np.full(n_groups, -1)
+    group_position[groups] = np.arange(len(groups))
+    point_group = np.where(group_id >= 0, group_position[np.maximum(group_id, 0)], -1)
+    selected = np.flatnonzero(point_group >= 0)
+    selected = selected[np.argsort(point_group[selected], kind='stable')]
+    position = point_group[selected]
+
+    df_with_runway = df.iloc[selected].reset_index(drop=True)
+    for column in runway_columns:
+        df_with_runway[column] = values[column][position]
+
+    # Basic info for each icao24 segment
+    basic_info_df = pd.DataFrame({column: values[column] for column in info_columns})
+
+    # Extract the ILS segments: the rows between the FAP and THR identified points, in the group order
+    row_in_group = geometry['row_in_group']
+    pos_fap, pos_thr = row_in_group[fap_row], row_in_group[thr_row]
+    start_pos, end_pos = np.minimum(pos_fap, pos_thr), np.maximum(pos_fap, pos_thr)
+    point_pos = row_in_group[selected]
+    in_ils = (point_pos >= start_pos[position]) & (point_pos <= end_pos[position])
+    df_segments_ils = df_with_runway[in_ils].reset_index(drop=True)
 
     return df_with_runway, basic_info_df, df_segments_ils
 
 
-def identify_landing_runway_scenario(df):
-    results = []
-    basic_info_results = []
-    segments_ils_results = []  # List to collect the trajectory segments (ILS segments)
+def identify_landing_runway_strategies(df, strategies=('fap',), heading_offset=10, spatial_index=None):
+    """
+    Identify the landings with one or several FAP-selection strategies in a single pass.
+
+    The geometry shared by the strategies is computed once, for all the (icao24, segment) groups at
+    once: the nearest point of each group to each THR and FAP position, the order of the points in
+    each group and in time. Each strategy then selects the FAP point of each group:
+
+    - 'fap': the point nearest to a FAP position, with the runway match and 700 m gates
+      (see identify_landing_runway).
+    - 'backwards': the start of the final run of points in the heading cone of the runway, before the
+      nearest THR point (see find_last_no_turning_point).
+    - 'scenario': the point nearest to a FAP position, without gates, with the distance and time
+      to the true threshold (see identify_landing_runway_scenario).
+
+    Without the 'scenario' strategy, the nearest points are only searched among the points within 700 m
+    of the positions, found with a KD-tree (see tools_spatial.SpatialIndex) instead of the distances from
+    every point to every position. The haversine distances of these points then select the nearest ones,
+    so the results are the same.
+
+    Args:
+        df (pd.DataFrame): Segmented trajectory points (see identify_segments).
+        strategies (list, optional): Strategies to run, among LANDING_STRATEGIES. Defaults to ('fap',).
+        heading_offset (float, optional): Half-width of the heading cone of the 'backwards' strategy [deg].
+            Defaults to 10.
+        spatial_index (SpatialIndex, optional): Spatial index of df, or of the frame df was filtered from
+            (see tools_spatial.SpatialIndex), used to find the points near the FAP and threshold positions
+            when the 'scenario' strategy is not requested. Defaults to None (built from df when needed).
+
+    Returns:
+        dict: (df_with_runway, basic_info_df, df_segments_ils) of each strategy, see identify_landing_runway
+            (for the 'backwards' strategy, 'distance_fap_to_thr' and 'delta_time_fap_to_thr' are not scaled
+            to a FAP position: they are the distance and time between the FAP and THR points).
+    """
+    unknown = [strategy for strategy in strategies if strategy not in LANDING_STRATEGIES]
+    if unknown:
+        raise ValueError(f"Unknown landing strategies {unknown}, expected some of {LANDING_STRATEGIES}")
+
+    # Work with latitude/longitude in degrees
+    df = with_degrees(df)
 
     # Filter out unwanted trajectories
     if 'trajectory' in df.columns:
         df = df[~df['trajectory'].isin(['departing', 'level'])]
 
-    # Group by icao24 and segment
-    grouped = df.groupby(['icao24', 'segment'])
-
-    for (icao24, segment), group_df in grouped:
-
-        # Get a representative timestamp from the group (using the first row)
-        rep_ts = group_df['ts'].iloc[0]
-        rep_date = datetime.datetime.utcfromtimestamp(rep_ts / 1000).strftime('%Y-%m-%d %Hh')
-
-        # Find the nearest point to the FAP position and to the threshold position.
-        nearest_fap = find_nearest_point(FAP_position, group_df)
-        nearest_thr = find_nearest_point(threshold_position, group_df)
-
-        # Augment the group's dataframe with runway and index/timestamp info
-        group_df = group_df.copy()
-        group_df['runway_fap'] = nearest_fap['runway']
-        group_df['runway_thr'] = nearest_thr['runway']
-        group_df['idx_fap'] = nearest_fap['index']
-        group_df['idx_thr'] = nearest_thr['index']
-        group_df['ts_fap'] = nearest_fap['ts']
-        group_df['ts_thr'] = nearest_thr['ts']
-
-        # Compute and add delta_time to each row in the group
-        delta_time_real = (nearest_thr['ts'] - nearest_fap['ts']) / 1000
-        group_df['delta_time'] = delta_time_real
-
-        # Extract coordinates for the nearest FAP and threshold df points
-        lat_fap = group_df.loc[nearest_fap['index'], 'lat_deg']
-        lon_fap = group_df.loc[nearest_fap['index'], 'lon_deg']
-        lat_thr = group_df.loc[nearest_thr['index'], 'lat_deg']
-        lon_thr = group_df.loc[nearest_thr['index'], 'lon_deg']
-
-        # Compute the distance between the nearest FAP point and the nearest threshold point
-        distance_real = haversine(lat_fap, lon_fap, lat_thr, lon_thr)
-
-        # Compute the "true" distance between the actual FAP and THR positions
-        true_distance = haversine(nearest_fap["base_lat"], nearest_fap["base_lon"],
-                                  nearest_thr["base_lat"], nearest_thr["base_lon"])
-
-        # Compute a scaling factor (avoid division by zero)
-        scaling_factor = true_distance / distance_real if distance_real != 0 else 1
-
-        # Re-scale the delta_time and distance
-        delta_time_scaled = delta_time_real * scaling_factor
-        distance_scaled = distance_real * scaling_factor  # This should be equal to true_distance
-
-        # --- New Computations for the Scenario Pair ---
-        # Compute the distance between the real FAP point and the true threshold (using base coordinates)
-        distance_scenario = haversine(
-            lat_fap, lon_fap,
-            nearest_thr["base_lat"], nearest_thr["base_lon"]
-        )
-        # Compute the corresponding time assuming a constant speed (scale delta_time_real proportionally)
-        time_scenario = delta_time_real * (distance_scenario / distance_real) if distance_real != 0 else delta_time_real
-
-        # Save the scaled values to the group dataframe
-        group_df['distance_fap_to_thr'] = true_distance
-        group_df['delta_time_fap_to_thr'] = delta_time_scaled
-
-        # ----- New Computations at the FAP Point -----
-        # Compute speed, vertical_speed, and heading at the FAP point using the previous data point.
-        # We sort by timestamp to ensure the points are in chronological order.
-        group_df_sorted = group_df.sort_values('ts')
-        try:
-            # Get the position of the FAP point in the sorted dataframe
-            fap_pos = group_df_sorted.index.get_loc(nearest_fap['index'])
-        except Exception as e:
-            fap_pos = None
-
-        if fap_pos is not None and fap_pos > 0:
-            previous_point = group_df_sorted.iloc[fap_pos - 1]
-            # Time difference in seconds
-            dt = (nearest_fap['ts'] - previous_point['ts']) / 1000.0
-            if dt > 0:
-                # Compute horizontal distance in meters between previous point and FAP point.
-                horiz_distance = haversine(lat_fap, lon_fap, previous_point['lat_deg'], previous_point['lon_deg'])
-                speed = horiz_distance / dt  # in m/s
-                # Compute vertical speed using altitude difference (assumes 'altitude' column exists)
-                vertical_speed = (group_df.loc[nearest_fap['index'], 'altitude'] - previous_point['altitude']) / dt
-                # Compute heading (bearing) from the previous point to the FAP point.
-                heading = compute_bearing(previous_point['lat_deg'], previous_point['lon_deg'], lat_fap, lon_fap)
-            else:
-                speed, vertical_speed, heading = None, None, None
+    # The points near the positions are found with a spatial index, unless the ungated 'scenario' strategy
+    # needs the nearest points of every group
+    geometry = _landing_geometry(df, strategies, indexed='scenario' not in strategies, spatial_index=spatial_index)
+
+    results = {}
+    for strategy in strategies:
+        print(f"Landing strategy {strategy}:")
+        if strategy == 'backwards':
+            selection = _select_heading_cone(geometry, heading_offset)
         else:
-            speed, vertical_speed, heading = None, None, None
-
-        # Build the basic info dictionary for this icao24 segment including the new fields.
-        basic_info = {
-            'icao24': icao24,
-            'runway_fap': nearest_fap['runway'],
-            'idx_fap': nearest_fap['index'],
-            'idx_thr': nearest_thr['index'],
-            'ts_fap': nearest_fap['ts'],
-            'ts_thr': nearest_thr['ts'],
-            'lat_deg_fap': lat_fap,
-            'lon_deg_fap': lon_fap,
-            'lat_deg_thr': lat_thr,
-            'lon_deg_thr': lon_thr,
-            'distance': distance_real,
-            'delta_time': delta_time_real,
-            'distance_fap_to_thr': true_distance,
-            'delta_time_fap_to_thr': delta_time_scaled,
-            'speed_fap': speed,
-            'vertical_speed_fap': vertical_speed,
-            'heading_fap': heading,
-            'distance_scenario': distance_scenario,
-            'time_scenario': time_scenario
-        }
-        basic_info_results.append(basic_info)
-        # ---------------------------------------------
-
-        # Extract the ILS segment: the rows between the FAP and THR identified points.
-        # We first get their positional indexes in the group's dataframe.
-        try:
-            pos_fap = group_df.index.get_loc(nearest_fap['index'])
-            pos_thr = group_df.index.get_loc(nearest_thr['index'])
-        except Exception as e:
-            print(f"Error determining positions for icao24 {icao24}: {e}")
-            continue
-
-        start_pos = min(pos_fap, pos_thr)
-        end_pos = max(pos_fap, pos_thr) + 1  # +1 to include the endpoint
-        segment_ils = group_df.iloc[start_pos:end_pos]
-        segments_ils_results.append(segment_ils)
-
-        # Add group to the results
-        results.append(group_df)
-
-    # Concatenate the augmented group dataframes
-    df_with_runway = pd.concat(results).reset_index(drop=True)
-
-    # Create the smaller dataframe with basic info for each icao24 segment
-    basic_info_df = pd.DataFrame(basic_info_results)
-
-    # Concatenate the ILS segments (if any) into a single dataframe
-    df_segments_ils = pd.concat(segments_ils_results).reset_index(drop=True) if segments_ils_results else pd.DataFrame()
+            selection = _select_nearest_fap(geometry, gated=strategy == 'fap')
+        results[strategy] = _landing_tables(geometry, strategy, *selection)
+    return results
 
-    return df_with_runway, basic_info_df, df_segments_ils
+
+def identify_landing_runway(df):
+    """
+    Identify the landing runway of each (icao24, segment) group: the FAP and THR points are the points
+    nearest to a FAP and a threshold position of the same runway, both within 700 m of them. All the
+    groups are processed at once (the 'fap' strategy of identify_landing_runway_strategies).
+
+    Args:
+        df (pd.DataFrame): Segmented trajectory points (see identify_segments).
+
+    Returns:
+        tuple: (df_with_runway, basic_info_df, df_segments_ils): the points of the accepted groups with
+            the runway, FAP and THR columns, one row of basic info per accepted group, and the points
+            between the FAP and THR points.
+    """
+    return identify_landing_runway_strategies(df, ['fap'])['fap']
+
+
+def identify_landing_runway_backwards(df, heading_offset=10):
+    """
+    Backwards method: the THR point is the point nearest to a threshold position, and the FAP point is
+    found going backwards in time from it, as the last point before the aircraft leaves the heading cone
+    of the runway (see find_last_no_turning_point). All the (icao24, segment) groups are processed at
+    once (the 'backwards' strategy of identify_landing_runway_strategies).
+
+    Args:
+        df (pd.DataFrame): Segmented trajectory points (see identify_segments).
+        heading_offset (float, optional): Half-width of the heading cone [deg]. Defaults to 10.
+
+    Returns:
+        tuple: (df_with_runway, basic_info_df, df_segments_ils)
+    """
+    return identify_landing_runway_strategies(df, ['backwards'], heading_offset)['backwards']
+
+
+def identify_landing_runway_scenario(df):
+    """
+    Scenario method: the FAP and THR points are the points nearest to a FAP and a threshold position,
+    without gates, and the basic info adds the distance and time from the FAP point to the true
+    threshold. All the (icao24, segment) groups are processed at once (the 'scenario' strategy of
+    identify_landing_runway_strategies).
+
+    Args:
+        df (pd.DataFrame): Segmented trajectory points (see identify_segments).
+
+    Returns:
+        tuple: (df_with_runway, basic_info_df, df_segments_ils), see identify_landing_runway.
+    """
+    return identify_landing_runway_strategies(df, ['scenario'])['scenario']
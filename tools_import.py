@@ -1,12 +1,23 @@
 
-import glob
 import os
 import sys
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 
 import pandas as pd
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
 
-from tools_filter import extract_adsb_columns, filter_dataframe_by_icao, clean_dataframe_nulls
+from tools_filter import extract_adsb_columns, compact_dataframe
+from tools_index import (
+    spatial_candidates,
+    icao24_candidates,
+    catalog_candidates,
+    catalog_byte_sizes,
+    merge_candidates
+)
 
 
 def generate_dates_list(start_year, start_month, start_day, start_hour,
@@ -62,18 +73,137 @@ def generate_folder_paths(dates_list, base_path):
     return folder_paths
 
 
-def load_adsb_data(input_file: str) -> pd.DataFrame:
+def build_partition_filter(start_dt: datetime, end_dt: datetime):
+    """
+    Build a pyarrow expression over the year/month/day/hour partition keys that selects
+    every hourly partition between the start and end date-time (inclusive).
+
+    Args:
+        start_dt (datetime): Start date-time (only the date and the hour are used).
+        end_dt (datetime): End date-time (only the date and the hour are used).
+
+    Returns:
+        pyarrow.compute.Expression: The partition filter.
+    """
+    partition_filter = None
+    current = start_dt.date()
+    while current <= end_dt.date():
+        first_hour = start_dt.hour if current == start_dt.date() else 0
+        last_hour = end_dt.hour if current == end_dt.date() else 23
+        day_filter = ((pc.field('year') == current.year) & (pc.field('month') == current.month) &
+                      (pc.field('day') == current.day) &
+                      (pc.field('hour') >= first_hour) & (pc.field('hour') <= last_hour))
+        partition_filter = day_filter if partition_filter is None else partition_filter | day_filter
+        current += timedelta(days=1)
+    return partition_filter
+
+
+def scan_adsb_dataset(base_path: str, start_dt: datetime, end_dt: datetime) -> ds.Dataset:
+    """
+    Scan the hive-partitioned ADS-B dataset (base_path/year=YYYY/month=MM/day=DD/hour=H) once and
+    prune it to the hourly partitions between the start and end date-time (inclusive).
+
+    No data is read here: the returned dataset is evaluated lazily, and its files are ordered
+    chronologically by partition. Hours without any file are reported.
+
+    Args:
+        base_path (str): The base directory containing the partitioned data.
+        start_dt (datetime): Start date-time.
+        end_dt (datetime): End date-time.
+
+    Returns:
+        pyarrow.dataset.Dataset: The dataset restricted to the requested time range.
+    """
+    dataset = ds.dataset(base_path, format='parquet', partitioning='hive')
+    fragments = list(dataset.get_fragments(filter=build_partition_filter(start_dt, end_dt)))
+
+    def fragment_hour(fragment):
+        keys = ds.get_partition_keys(fragment.partition_expression)
+        return datetime(keys['year'], keys['month'], keys['day'], keys['hour'])
+
+    fragments.sort(key=lambda fragment: (fragment_hour(fragment), fragment.path))
+
+    # Report the hours for which no file was found
+    found_hours = {fragment_hour(fragment) for fragment in fragments}
+    expected_hours = generate_dates_list(start_dt.year, start_dt.month, start_dt.day, start_dt.hour,
+                                         end_dt.year, end_dt.month, end_dt.day, end_dt.hour)
+    missing_hours = [dt for dt in expected_hours if dt not in found_hours]
+    if missing_hours:
+        print(f"Warning: {len(missing_hours)} hours without data in {base_path}: "
+              f"{[dt.strftime('%Y-%m-%d %Hh') for dt in missing_hours]}")
+
+    return ds.FileSystemDataset(fragments, dataset.schema, dataset.format, dataset.filesystem)
+
+
+def build_parquet_filter(icao24_list: list = None, bounds: list = None,
+                         altitude_range: list = None, columns_not_null: list = None,
+                         time_range: list = None):
+    """
+    Build a pyarrow filter expression that can be pushed down into the parquet reader.
+
+    Row groups whose column statistics cannot satisfy the expression are skipped without
+    being decoded, and the remaining rows are filtered while reading.
+
+    Args:
+        icao24_list (list, optional): List of aircraft identifiers to keep.
+        bounds (list, optional): Geographical box as [min_lat, max_lat, min_lon, max_lon] in degrees.
+        altitude_range (list, optional): Altitude band as [min_alt, max_alt] in feet.
+        columns_not_null (list, optional): List of columns that must not be null.
+        time_range (list, optional): Time range as [start_ts, end_ts] in milliseconds.
+
+    Returns:
+        pyarrow.compute.Expression: The combined filter, or None if no condition was given.
+    """
+    conditions = []
+    if icao24_list:
+        conditions.append(pc.field('icao24').isin(list(icao24_list)))
+    if bounds is not None:
+        min_lat, max_lat, min_lon, max_lon = bounds
+        conditions.append((pc.field('lat_deg') >= min_lat) & (pc.field('lat_deg') <= max_lat))
+        conditions.append((pc.field('lon_deg') >= min_lon) & (pc.field('lon_deg') <= max_lon))
+    if altitude_range is not None:
+        min_alt, max_alt = altitude_range
+        conditions.append((pc.field('altitude') >= min_alt) & (pc.field('altitude') <= max_alt))
+    if time_range is not None:
+        start_ts, end_ts = time_range
+        conditions.append((pc.field('ts') >= start_ts) & (pc.field('ts') <= end_ts))
+    for column in columns_not_null or []:
+        conditions.append(pc.field(column).is_valid())
+
+    if not conditions:
+        return None
+    expression = conditions[0]
+    for condition in conditions[1:]:
+        expression = expression & condition
+    return expression
+
+
+def load_adsb_data(input_file: str, columns: list = None, filters=None, row_groups: list = None) -> pd.DataFrame:
     """
     Load raw ADS-B data from a parquet file.
 
     Args:
         input_file (str): The path to the input parquet file.
+        columns (list, optional): List of columns to read. Columns missing in the file are ignored.
+            If None, all columns are read.
+        filters (pyarrow.compute.Expression, optional): Row filter pushed down into the reader,
+            see build_parquet_filter. If None, all rows are read.
+        row_groups (list, optional): Indices of the row groups to read. If None, all row groups are read.
 
     Returns:
         pd.DataFrame: The raw data loaded from the file.
     """
     try:
-        df = pd.read_parquet(input_file)
+        if columns is not None:
+            # Only the footer is read here, to drop the columns that this file does not have
+            available_columns = pq.read_schema(input_file).names
+            columns = [col for col in columns if col in available_columns]
+        if row_groups is None:
+            df = pd.read_parquet(input_file, columns=columns, filters=filters)
+        else:
+            fragment = next(ds.dataset(input_file, format='parquet').get_fragments())
+            fragment = fragment.subset(row_group_ids=row_groups)
+            df = fragment.to_table(columns=columns, filter=filters).to_pandas()
     except Exception as e:
         print(f"Error reading the parquet file {input_file}: {e}")
         sys.exit(1)
@@ -82,43 +212,86 @@ def load_adsb_data(input_file: str) -> pd.DataFrame:
 
 
 def load_parquet_files(start_year, start_month, start_day, start_hour,
-                       end_year, end_month, end_day, end_hour, base_path):
+                       end_year, end_month, end_day, end_hour, base_path,
+                       icao24_list: list = None, bounds: list = None, altitude_range: list = None,
+                       workers: int = None, compact: bool = False, fixed_point_latlon: bool = False,
+                       spatial_index: pd.DataFrame = None, icao24_index: pd.DataFrame = None,
+                       catalog: pd.DataFrame = None, max_in_flight_bytes: int = None, time_range: list = None):
     """
-    Load all parquet files from the folders corresponding to each hour between the start and end date-time.
+    Load all parquet files from the hourly partitions between the start and end date-time.
 
     Args:
         start_year, start_month, start_day, start_hour: Start date-time components.
         end_year, end_month, end_day, end_hour: End date-time components.
         base_path (str): The base directory containing the data folders.
+        icao24_list (list, optional): List of aircraft identifiers to keep. Defaults to None.
+        bounds (list, optional): Geographical box [min_lat, max_lat, min_lon, max_lon] to keep.
+            Defaults to None.
+        altitude_range (list, optional): Altitude band [min_alt, max_alt] to keep. Defaults to None.
+        workers (int, optional): Number of files loaded in parallel, see load_and_process_parquet_files.
+            Defaults to None (serial loading).
+        compact (bool, optional): Convert the data to the compact schema. Defaults to False.
+        fixed_point_latlon (bool, optional): Store latitude/longitude as int32 micro-degrees in the
+            compact schema. Defaults to False.
+        spatial_index (pd.DataFrame, optional): Spatial index used to skip files and row groups
+            outside the bounds and altitude band, see tools_index.build_spatial_index. Defaults to None.
+        icao24_index (pd.DataFrame, optional): icao24 index used to skip files and row groups without
+            the requested aircraft, see tools_index.build_icao24_index. Defaults to None.
+        catalog (pd.DataFrame, optional): Footer catalog used to measure the in-flight bytes of the
+            parallel loading, see tools_index.build_catalog. Defaults to None.
+        max_in_flight_bytes (int, optional): Maximum size of the files being loaded in parallel, see
+            load_and_process_parquet_files. Defaults to None (no limit).
+        time_range (list, optional): Time range [start_ts, end_ts] in milliseconds to keep, used with the
+            catalog to skip the row groups outside it. Defaults to None (no time filtering).
 
     Returns:
         pd.DataFrame: A combined DataFrame containing data from all parquet files in the specified range.
     """
-    dates_list = generate_dates_list(start_year, start_month, start_day, start_hour,
-                                     end_year, end_month, end_day, end_hour)
-    folder_paths = generate_folder_paths(dates_list, base_path)
-
-    df_list = []
-    for folder in folder_paths:
-        # Match all parquet files in the folder (e.g., "*.snappy.parquet" if needed)
-        pattern = os.path.join(folder, "*.parquet")
-        files = glob.glob(pattern)
-        df = load_and_process_parquet_files(files, columns_to_extract=['df', 'icao24', 'ts', 'altitude', 'lat_deg', 'lon_deg'])
-        df_list.append(df)
+    # Plan the whole time range in a single pass over the partitioned dataset
+    dataset = scan_adsb_dataset(base_path,
+                                datetime(start_year, start_month, start_day, start_hour),
+                                datetime(end_year, end_month, end_day, end_hour))
 
-    # Ensure that df_list is an iterable of DataFrames.
-    combined_df = pd.concat(df_list, ignore_index=True)
+    combined_df = load_and_process_parquet_files(dataset.files, icao24_list=icao24_list,
+                                                 columns_to_extract=['df', 'icao24', 'ts', 'altitude', 'lat_deg', 'lon_deg'],
+                                                 bounds=bounds, altitude_range=altitude_range,
+                                                 workers=workers, compact=compact,
+                                                 fixed_point_latlon=fixed_point_latlon,
+                                                 spatial_index=spatial_index,
+                                                 icao24_index=icao24_index,
+                                                 catalog=catalog,
+                                                 max_in_flight_bytes=max_in_flight_bytes,
+                                                 time_range=time_range)
 
     # Return combined dataframe
     return combined_df
 
 
 def load_and_process_parquet_files(file_list: list, icao24_list: list = None,
-                                   columns_to_clean: list = None, columns_to_extract: list = None) -> pd.DataFrame:
+                                   columns_to_clean: list = None, columns_to_extract: list = None,
+                                   bounds: list = None, altitude_range: list = None,
+                                   workers: int = None, max_in_flight_files: int = None,
+                                   max_in_flight_bytes: int = None, compact: bool = False,
+                                   fixed_point_latlon: bool = False,
+                                   spatial_index: pd.DataFrame = None,
+                                   icao24_index: pd.DataFrame = None, time_range: list = None,
+                                   catalog: pd.DataFrame = None, by_file: bool = False):
     """
     Incrementally load, filter, and extract columns from a list of parquet files.
     This approach reduces memory usage by processing each file individually.
 
+    The filters and the column selection are pushed down into the parquet reader, so row groups
+    that cannot match are skipped and columns that are not extracted are never decoded.
+    With a spatial index, files and row groups that have no point inside the bounds and altitude
+    band are not even opened. Likewise with an icao24 index for the files and row groups that
+    do not contain any of the requested aircraft, and with a catalog for the ones outside the
+    time range.
+
+    When several workers are requested, the files are loaded by a thread pool (parquet decoding
+    releases the GIL). At most max_in_flight_files files, and at most max_in_flight_bytes bytes of
+    parquet files on disk, are being loaded at any time. The result is identical to the serial one,
+    with the rows in the order of file_list.
+
     Args:
         file_list (list): List of parquet file paths.
         icao24_list (list, optional): List of aircraft identifiers to filter by. Defaults to None.
@@ -126,23 +299,160 @@ def load_and_process_parquet_files(file_list: list, icao24_list: list = None,
             Defaults to ['lat_deg', 'lon_deg', 'altitude', 'ts']
         columns_to_extract (list, optional): List of columns to extract.
             Defaults to ['icao24', 'altitude', 'lat_deg', 'lon_deg', 'ts'].
+        bounds (list, optional): Geographical box [min_lat, max_lat, min_lon, max_lon] to keep.
+            Defaults to None (no geographical filtering).
+        altitude_range (list, optional): Altitude band [min_alt, max_alt] to keep.
+            Defaults to None (no altitude filtering).
+        workers (int, optional): Number of files loaded in parallel. Defaults to None (serial loading).
+        max_in_flight_files (int, optional): Maximum number of files being loaded at the same time.
+            Defaults to twice the number of workers.
+        max_in_flight_bytes (int, optional): Maximum total size of the files being loaded at the same
+            time: the uncompressed size of the row groups to read according to the catalog, or the
+            size on disk for files without catalog. A single file larger than this limit is still
+            loaded on its own. Defaults to None (no limit).
+        compact (bool, optional): Convert each file to the compact schema right after loading,
+            see tools_filter.compact_dataframe. Defaults to False.
+        fixed_point_latlon (bool, optional): Store latitude/longitude as int32 micro-degrees in the
+            compact schema. Defaults to False.
+        spatial_index (pd.DataFrame, optional): Spatial index of the files, see
+            tools_index.build_spatial_index. Only used when bounds or altitude_range are given.
+            Files that are not in the index, or changed since it was built, are read in full.
+            Defaults to None.
+        icao24_index (pd.DataFrame, optional): icao24 index of the files, see
+            tools_index.build_icao24_index. Only used when icao24_list is given. Defaults to None.
+        time_range (list, optional): Time range [start_ts, end_ts] in milliseconds to keep.
+            Defaults to None (no time filtering).
+        catalog (pd.DataFrame, optional): Footer catalog of the files, see tools_index.build_catalog.
+            Used to skip row groups outside the time range, and to measure the in-flight bytes.
+            Defaults to None.
+        by_file (bool, optional): Return the DataFrame of each file instead of the combined one,
+            e.g. to cache the hour partitions separately. Defaults to False.
 
     Returns:
-        pd.DataFrame: The combined DataFrame after processing all files.
-    """
-    df_list = []
-    for file in file_list:
-        # Load raw data from the file.
-        df_raw = load_adsb_data(file)
-        # Filter the data based on provided icao24 identifiers and non-null altitude/lat_deg.
-        df_filtered = filter_dataframe_by_icao(df_raw, icao24_list)
-        # Filter the data to remove null altitude/lat_deg.
-        df_filtered = clean_dataframe_nulls(df_filtered, columns_to_clean)
-        # Extract the required subset of columns.
-        df_extracted = extract_adsb_columns(df_filtered, columns_to_extract)
-        df_list.append(df_extracted)
+        pd.DataFrame: The combined DataFrame after processing all files, or with by_file a dictionary
+            {file: DataFrame} in the order of file_list, with an empty DataFrame for the skipped files.
+    """
+    if columns_to_clean is None:
+        columns_to_clean = ['lat_deg', 'lon_deg', 'altitude', 'ts']
+    if columns_to_extract is None:
+        columns_to_extract = ['icao24', 'altitude', 'lat_deg', 'lon_deg', 'ts']
+    if icao24_list:
+        print(f"Filtering by provided icao24 values {icao24_list}")
+    else:
+        print("No specific icao24 codes provided. Processing all flights.")
+    filters = build_parquet_filter(icao24_list=icao24_list, bounds=bounds,
+                                   altitude_range=altitude_range, columns_not_null=columns_to_clean,
+                                   time_range=time_range)
+
+    # Row groups that may contain the requested points, per indexed file
+    candidates = {}
+    if spatial_index is not None and (bounds is not None or altitude_range is not None):
+        candidates = spatial_candidates(spatial_index, bounds=bounds, altitude_range=altitude_range)
+    if icao24_index is not None and icao24_list:
+        candidates = merge_candidates(candidates, icao24_candidates(icao24_index, icao24_list))
+    if catalog is not None and time_range is not None:
+        candidates = merge_candidates(candidates, catalog_candidates(catalog, time_range))
+    requested_files = list(file_list)
+    skipped_files = {file for file in file_list if candidates.get(file) == []}
+    if skipped_files:
+        print(f"Skipping {len(skipped_files)} files without the requested points (index)")
+        file_list = [file for file in file_list if file not in skipped_files]
+
+    def process_file(file):
+        # Load only the required columns and rows from the file.
+        df_raw = load_adsb_data(file, columns=columns_to_extract, filters=filters,
+                                row_groups=candidates.get(file))
+        # Extract the required subset of columns, in the requested order.
+        df_extracted = extract_adsb_columns(df_raw, columns_to_extract)
+        if compact:
+            df_extracted = compact_dataframe(df_extracted, fixed_point_latlon=fixed_point_latlon)
+        return df_extracted
+
+    if workers is None or workers <= 1:
+        df_list = [process_file(file) for file in file_list]
+    else:
+        if max_in_flight_files is None:
+            max_in_flight_files = 2 * workers
+        byte_sizes = catalog_byte_sizes(catalog) if catalog is not None else {}
+
+        def file_bytes(file):
+            # Uncompressed size of the row groups to read, from the catalog when available
+            if file not in byte_sizes:
+                return os.path.getsize(file)
+            row_groups = candidates.get(file, byte_sizes[file].keys())
+            return sum(byte_sizes[file][row_group] for row_group in row_groups)
+
+        df_list = []
+        in_flight = deque()
+        in_flight_bytes = 0
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for file in file_list:
+                file_size = file_bytes(file)
+                # Wait for the oldest files to finish until there is room for this one
+                while in_flight and (len(in_flight) >= max_in_flight_files or
+                                     (max_in_flight_bytes is not None and
+                                      in_flight_bytes + file_size > max_in_flight_bytes)):
+                    future, size = in_flight.popleft()
+                    df_list.append(future.result())
+                    in_flight_bytes -= size
+                in_flight.append((executor.submit(process_file, file), file_size))
+                in_flight_bytes += file_size
+            while in_flight:
+                future, size = in_flight.popleft()
+                df_list.append(future.result())
+
+    if by_file:
+        loaded = dict(zip(file_list, df_list))
+        return {file: loaded.get(file, pd.DataFrame(columns=columns_to_extract)) for file in requested_files}
     if df_list:
         combined_df = pd.concat(df_list, ignore_index=True)
     else:
         combined_df = pd.DataFrame()
     return combined_df
+
+
+def iter_parquet_batches(start_year, start_month, start_day, start_hour,
+                         end_year, end_month, end_day, end_hour, base_path,
+                         icao24_list: list = None, columns_to_clean: list = None,
+                         columns_to_extract: list = None, bounds: list = None,
+                         altitude_range: list = None, batch_size: int = 131072):
+    """
+    Stream the parquet files of the hourly partitions between the start and end date-time as
+    filtered record batches, instead of loading the whole time range in memory.
+
+    The filters and the column selection are pushed down into the reader exactly as in
+    load_and_process_parquet_files. Batches are yielded in partition (hour) order, and can be
+    passed directly to the filtering functions of tools_filter.
+
+    Args:
+        start_year, start_month, start_day, start_hour: Start date-time components.
+        end_year, end_month, end_day, end_hour: End date-time components.
+        base_path (str): The base directory containing the data folders.
+        icao24_list (list, optional): List of aircraft identifiers to filter by. Defaults to None.
+        columns_to_clean (list, optional): List of columns that must not be null.
+            Defaults to ['lat_deg', 'lon_deg', 'altitude', 'ts']
+        columns_to_extract (list, optional): List of columns to extract.
+            Defaults to ['df', 'icao24', 'ts', 'altitude', 'lat_deg', 'lon_deg'].
+        bounds (list, optional): Geographical box [min_lat, max_lat, min_lon, max_lon] to keep.
+            Defaults to None.
+        altitude_range (list, optional): Altitude band [min_alt, max_alt] to keep. Defaults to None.
+        batch_size (int, optional): Maximum number of rows per batch. Defaults to 131072.
+
+    Yields:
+        pyarrow.RecordBatch: The next non-empty batch of filtered rows.
+    """
+    if columns_to_clean is None:
+        columns_to_clean = ['lat_deg', 'lon_deg', 'altitude', 'ts']
+    if columns_to_extract is None:
+        columns_to_extract = ['df', 'icao24', 'ts', 'altitude', 'lat_deg', 'lon_deg']
+
+    dataset = scan_adsb_dataset(base_path,
+                                datetime(start_year, start_month, start_day, start_hour),
+                                datetime(end_year, end_month, end_day, end_hour))
+    filters = build_parquet_filter(icao24_list=icao24_list, bounds=bounds,
+                                   altitude_range=altitude_range, columns_not_null=columns_to_clean)
+    columns = [col for col in columns_to_extract if col in dataset.schema.names]
+
+    for batch in dataset.to_batches(columns=columns, filter=filters, batch_size=batch_size):
+        if batch.num_rows > 0:
+            yield batch
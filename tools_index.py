@@ -0,0 +1,389 @@
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+from tools_filter import encode_icao24
+
+# File names of the sidecar indexes in an index directory (see main_build_index.py and load_sidecar_indexes)
+SIDECAR_INDEXES = {'spatial_index': 'spatial_index.parquet', 'icao24_index': 'icao24_index.parquet',
+                   'catalog': 'catalog.parquet'}
+
+
+def fresh_files(index: pd.DataFrame) -> set:
+    """
+    Return the files described by an index for which the index is up to date, i.e. the files
+    still exist with the same size and modification time as when the index was built.
+
+    Args:
+        index (pd.DataFrame): An index with 'file', 'file_size' and 'file_mtime' columns.
+
+    Returns:
+        set: The paths of the files for which the index can be used.
+    """
+    files = index[['file', 'file_size', 'file_mtime']].drop_duplicates('file')
+    fresh = set()
+    for path, file_size, file_mtime in files.itertuples(index=False):
+        if os.path.exists(path):
+            stat = os.stat(path)
+            if stat.st_size == file_size and stat.st_mtime == file_mtime:
+                fresh.add(path)
+    return fresh
+
+
+def save_index(index: pd.DataFrame, index_path: str):
+    """
+    Save an index (spatial, icao24, ...) as a parquet sidecar file.
+    """
+    os.makedirs(os.path.dirname(index_path) or '.', exist_ok=True)
+    index.to_parquet(index_path, index=False)
+    print(f"Index with {len(index)} records saved to {index_path}")
+
+
+def load_index(index_path: str) -> pd.DataFrame:
+    """
+    Load an index saved with save_index.
+    """
+    return pd.read_parquet(index_path)
+
+
+def load_sidecar_indexes(index_dir: str, names: list = None) -> dict:
+    """
+    Load the sidecar indexes saved in a directory by main_build_index.py (see SIDECAR_INDEXES).
+
+    The entries of the files that changed since the indexes were built are ignored when they are used
+    (see fresh_files), so that those files are read in full.
+
+    Args:
+        index_dir (str): Directory of the indexes.
+        names (list, optional): Indexes to load, among SIDECAR_INDEXES. Defaults to None (all).
+
+    Returns:
+        dict: Each index found, by name.
+    """
+    indexes = {}
+    for name in names or SIDECAR_INDEXES:
+        index_path = os.path.join(index_dir, SIDECAR_INDEXES[name])
+        if os.path.exists(index_path):
+            indexes[name] = load_index(index_path)
+    return indexes
+
+
+def _column_statistics(row_group_metadata, column: str):
+    """
+    Return the (min, max) statistics of a column in a row group footer, or None if not available.
+    """
+    for j in range(row_group_metadata.num_columns):
+        column_metadata = row_group_metadata.column(j)
+        if column_metadata.path_in_schema == column:
+            statistics = column_metadata.statistics
+            if statistics is not None and statistics.has_min_max:
+                return statistics.min, statistics.max
+            return None
+    return None
+
+
+def _spatial_records_file(path: str, tile_size: float = None) -> list:
+    """
+    Build the spatial index records of a single parquet file (see build_spatial_index).
+    """
+    stat = os.stat(path)
+    parquet_file = pq.ParquetFile(path)
+    metadata = parquet_file.metadata
+    records = []
+    for i in range(metadata.num_row_groups):
+        row_group = metadata.row_group(i)
+        record = {
+            'file': path,
+            'file_size': stat.st_size,
+            'file_mtime': stat.st_mtime,
+            'row_group': i,
+            'num_rows': row_group.num_rows
+        }
+
+        # Footer statistics are enough when no tiles are requested
+        statistics = [_column_statistics(row_group, col) for col in ['lat_deg', 'lon_deg', 'altitude']]
+        if tile_size is None and all(column_stats is not None for column_stats in statistics):
+            (lat_min, lat_max), (lon_min, lon_max), (alt_min, alt_max) = statistics
+            records.append({**record, 'tile_lat': np.nan, 'tile_lon': np.nan, 'count': row_group.num_rows,
+                            'lat_min': lat_min, 'lat_max': lat_max, 'lon_min': lon_min, 'lon_max': lon_max,
+                            'alt_min': alt_min, 'alt_max': alt_max})
+            continue
+
+        # Otherwise, scan the position columns of the row group once
+        points = parquet_file.read_row_group(i, columns=['lat_deg', 'lon_deg', 'altitude']).to_pandas()
+        points = points[points['lat_deg'].notna() & points['lon_deg'].notna()]
+        if points.empty:
+            continue
+        if tile_size is None:
+            points['tile_lat'] = np.nan
+            points['tile_lon'] = np.nan
+        else:
+            points['tile_lat'] = np.floor(points['lat_deg'] / tile_size) * tile_size
+            points['tile_lon'] = np.floor(points['lon_deg'] / tile_size) * tile_size
+        tiles = points.groupby(['tile_lat', 'tile_lon'], dropna=False).agg(
+            count=('lat_deg', 'size'),
+            lat_min=('lat_deg', 'min'),
+            lat_max=('lat_deg', 'max'),
+            lon_min=('lon_deg', 'min'),
+            lon_max=('lon_deg', 'max'),
+            alt_min=('altitude', 'min'),
+            alt_max=('altitude', 'max')
+        ).reset_index()
+        for tile in tiles.to_dict('records'):
+            records.append({**record, **tile})
+    return records
+
+
+def build_spatial_index(file_list: list, tile_size: float = None, workers: int = None) -> pd.DataFrame:
+    """
+    Build a spatial index of parquet files with ADS-B data.
+
+    For each row group of each file, the index records the latitude, longitude and altitude extents
+    of the points. If tile_size is given, one record is built per geographical tile of
+    tile_size x tile_size degrees containing points, with the point count and the extents of the
+    points in that tile. Without tiles, the extents come from the footer statistics when they are
+    available, and from a single scan of the position columns otherwise. Row groups without any
+    position have no record. The per-file extents are the union of the records of the file.
+
+    Args:
+        file_list (list): List of parquet file paths.
+        tile_size (float, optional): Size of the geographical tiles in degrees. Defaults to None (no tiles).
+        workers (int, optional): Number of files indexed in parallel. Defaults to None (serial).
+
+    Returns:
+        pd.DataFrame: The index, with columns 'file', 'file_size', 'file_mtime', 'row_group',
+            'num_rows', 'tile_lat', 'tile_lon', 'count', 'lat_min', 'lat_max', 'lon_min', 'lon_max',
+            'alt_min' and 'alt_max'.
+    """
+    if workers is None or workers <= 1:
+        records_list = [_spatial_records_file(file, tile_size) for file in file_list]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            records_list = list(executor.map(lambda file: _spatial_records_file(file, tile_size), file_list))
+
+    records = [record for file_records in records_list for record in file_records]
+    columns = ['file', 'file_size', 'file_mtime', 'row_group', 'num_rows', 'tile_lat', 'tile_lon', 'count',
+               'lat_min', 'lat_max', 'lon_min', 'lon_max', 'alt_min', 'alt_max']
+    index = pd.DataFrame(records, columns=columns)
+    print(f"Spatial index built for {len(file_list)} files: {len(index)} records")
+    return index
+
+
+def spatial_candidates(index: pd.DataFrame, bounds: list = None, altitude_range: list = None) -> dict:
+    """
+    Find the row groups of the indexed files that may contain points inside the bounds and the
+    altitude band.
+
+    Args:
+        index (pd.DataFrame): A spatial index (see build_spatial_index).
+        bounds (list, optional): Geographical box [min_lat, max_lat, min_lon, max_lon] in degrees.
+        altitude_range (list, optional): Altitude band [min_alt, max_alt] in feet.
+
+    Returns:
+        dict: For each indexed (and up to date) file, the sorted list of candidate row groups,
+            possibly empty. Files missing from the dictionary must be read in full.
+    """
+    mask = pd.Series(True, index=index.index)
+    if bounds is not None:
+        min_lat, max_lat, min_lon, max_lon = bounds
+        mask &= ((index['lat_max'] >= min_lat) & (index['lat_min'] <= max_lat) &
+                 (index['lon_max'] >= min_lon) & (index['lon_min'] <= max_lon))
+    if altitude_range is not None:
+        min_alt, max_alt = altitude_range
+        mask &= (index['alt_max'] >= min_alt) & (index['alt_min'] <= max_alt)
+
+    candidates = {file: [] for file in fresh_files(index)}
+    for file, row_groups in index[mask].groupby('file')['row_group']:
+        if file in candidates:
+            candidates[file] = sorted(row_groups.unique().tolist())
+    return candidates
+
+
+def _icao24_records_file(path: str) -> list:
+    """
+    Build the icao24 index records of a single parquet file (see build_icao24_index).
+    """
+    stat = os.stat(path)
+    parquet_file = pq.ParquetFile(path)
+    records = []
+    for i in range(parquet_file.metadata.num_row_groups):
+        icao24 = parquet_file.read_row_group(i, columns=['icao24']).column('icao24').drop_null()
+        records.append({
+            'file': path,
+            'file_size': stat.st_size,
+            'file_mtime': stat.st_mtime,
+            'row_group': i,
+            'num_rows': parquet_file.metadata.row_group(i).num_rows,
+            'icao24': np.unique(encode_icao24(icao24.unique().to_numpy(zero_copy_only=False)))
+        })
+    return records
+
+
+def build_icao24_index(file_list: list, workers: int = None) -> pd.DataFrame:
+    """
+    Build an icao24 membership index of parquet files with ADS-B data.
+
+    For each row group of each file, the index stores the exact sorted set of the icao24 identifiers
+    present, encoded as uint32 (see tools_filter.encode_icao24). Only the icao24 column is read.
+
+    Args:
+        file_list (list): List of parquet file paths.
+        workers (int, optional): Number of files indexed in parallel. Defaults to None (serial).
+
+    Returns:
+        pd.DataFrame: The index, with columns 'file', 'file_size', 'file_mtime', 'row_group',
+            'num_rows' and 'icao24' (sorted uint32 array).
+    """
+    if workers is None or workers <= 1:
+        records_list = [_icao24_records_file(file) for file in file_list]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            records_list = list(executor.map(_icao24_records_file, file_list))
+
+    records = [record for file_records in records_list for record in file_records]
+    index = pd.DataFrame(records, columns=['file', 'file_size', 'file_mtime', 'row_group', 'num_rows', 'icao24'])
+    print(f"icao24 index built for {len(file_list)} files: {len(index)} row groups")
+    return index
+
+
+def icao24_candidates(index: pd.DataFrame, icao24_list: list) -> dict:
+    """
+    Find the row groups of the indexed files that contain any of the given aircraft.
+
+    Args:
+        index (pd.DataFrame): An icao24 index (see build_icao24_index).
+        icao24_list (list): List of aircraft identifiers (hexadecimal strings).
+
+    Returns:
+        dict: For each indexed (and up to date) file, the sorted list of candidate row groups,
+            possibly empty. Files missing from the dictionary must be read in full.
+    """
+    targets = np.unique(encode_icao24(icao24_list))
+    candidates = {file: [] for file in fresh_files(index)}
+    for file, row_group, icao24 in index[['file', 'row_group', 'icao24']].itertuples(index=False):
+        if file not in candidates or len(icao24) == 0:
+            continue
+        icao24 = np.asarray(icao24, dtype=np.uint32)
+        # Both arrays are sorted: binary search of the targets in the row group set
+        positions = np.minimum(np.searchsorted(icao24, targets), len(icao24) - 1)
+        if (icao24[positions] == targets).any():
+            candidates[file].append(row_group)
+    return candidates
+
+
+def merge_candidates(candidates: dict, other_candidates: dict) -> dict:
+    """
+    Combine the candidate row groups found with two indexes: for the files in both, only the row
+    groups that are candidates in both are kept.
+    """
+    merged = dict(candidates)
+    for file, row_groups in other_candidates.items():
+        if file in merged:
+            merged[file] = sorted(set(merged[file]) & set(row_groups))
+        else:
+            merged[file] = row_groups
+    return merged
+
+
+def _catalog_records_file(path: str) -> list:
+    """
+    Build the catalog records of a single parquet file (see build_catalog).
+    """
+    stat = os.stat(path)
+    parquet_file = pq.ParquetFile(path)
+    metadata = parquet_file.metadata
+    schema_fingerprint = hashlib.sha1(str(parquet_file.schema_arrow).encode()).hexdigest()[:16]
+    records = []
+    for i in range(metadata.num_row_groups):
+        row_group = metadata.row_group(i)
+        record = {
+            'file': path,
+            'file_size': stat.st_size,
+            'file_mtime': stat.st_mtime,
+            'schema_fingerprint': schema_fingerprint,
+            'row_group': i,
+            'num_rows': row_group.num_rows,
+            'total_byte_size': row_group.total_byte_size,
+            'compressed_byte_size': sum(row_group.column(j).total_compressed_size
+                                        for j in range(row_group.num_columns)),
+            'ts_min': None,
+            'ts_max': None
+        }
+        ts_statistics = _column_statistics(row_group, 'ts')
+        if ts_statistics is not None:
+            record['ts_min'], record['ts_max'] = ts_statistics
+        for j in range(row_group.num_columns):
+            column_metadata = row_group.column(j)
+            statistics = column_metadata.statistics
+            if statistics is not None and statistics.has_null_count:
+                record[f"null_count_{column_metadata.path_in_schema}"] = statistics.null_count
+        records.append(record)
+    return records
+
+
+def build_catalog(file_list: list, workers: int = None) -> pd.DataFrame:
+    """
+    Build a catalog of parquet files with ADS-B data, reading only the file footers.
+
+    For each row group of each file, the catalog records the number of rows, the uncompressed and
+    compressed byte sizes, the ts range, the null count of every column ('null_count_<column>')
+    and a fingerprint of the file schema.
+
+    Args:
+        file_list (list): List of parquet file paths.
+        workers (int, optional): Number of footers read in parallel. Defaults to None (serial).
+
+    Returns:
+        pd.DataFrame: The catalog, one row per row group.
+    """
+    if workers is None or workers <= 1:
+        records_list = [_catalog_records_file(file) for file in file_list]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            records_list = list(executor.map(_catalog_records_file, file_list))
+
+    records = [record for file_records in records_list for record in file_records]
+    catalog = pd.DataFrame(records)
+    print(f"Catalog built for {len(file_list)} files: {len(catalog)} row groups")
+    return catalog
+
+
+def catalog_candidates(catalog: pd.DataFrame, time_range: list) -> dict:
+    """
+    Find the row groups of the catalogued files whose ts range overlaps the given time range.
+
+    Args:
+        catalog (pd.DataFrame): A catalog (see build_catalog).
+        time_range (list): Time range [start_ts, end_ts] in milliseconds.
+
+    Returns:
+        dict: For each catalogued (and up to date) file, the sorted list of candidate row groups,
+            possibly empty. Files missing from the dictionary must be read in full. Row groups
+            without ts statistics are always candidates.
+    """
+    start_ts, end_ts = time_range
+    mask = ((catalog['ts_max'] >= start_ts) & (catalog['ts_min'] <= end_ts)) \
+        | catalog['ts_min'].isna() | catalog['ts_max'].isna()
+
+    candidates = {file: [] for file in fresh_files(catalog)}
+    for file, row_groups in catalog[mask].groupby('file')['row_group']:
+        if file in candidates:
+            candidates[file] = sorted(row_groups.unique().tolist())
+    return candidates
+
+
+def catalog_byte_sizes(catalog: pd.DataFrame) -> dict:
+    """
+    Return the uncompressed byte size of each row group of the catalogued (and up to date) files,
+    as a dictionary {file: {row_group: bytes}}.
+    """
+    fresh = fresh_files(catalog)
+    byte_sizes = {}
+    for file, row_group, total_byte_size in catalog[['file', 'row_group', 'total_byte_size']].itertuples(index=False):
+        if file in fresh:
+            byte_sizes.setdefault(file, {})[row_group] = total_byte_size
+    return byte_sizes
@@ -1,8 +1,20 @@
+import contextlib
+import glob
+import json
 import os
+import resource
+import signal
 import sys
-from datetime import date, timedelta
+import threading
+import traceback
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date, datetime, timedelta, timezone
 
 import pandas as pd
+import pyarrow.dataset as ds
+
 
 from tools_calculate import (
     compute_segment_delta_times,
@@ -14,6 +26,7 @@ from tools_export import (
     export_trajectories_to_csv,
     export_trajectories_to_kml
 )
+from tools_cache import PipelineCache
 from tools_filter import (
     identify_segments,
     sort_dataframe,
@@ -21,12 +34,245 @@ from tools_filter import (
     filter_dataframe_by_altitude,
     clean_dataframe_nulls,
     extract_adsb_columns,
-    identify_landing_runway, identify_landing_runway_backwards
+    compact_dataframe,
+    expand_dataframe,
+    downsample_dataframe,
+    identify_landing_runway_strategies, LANDING_STRATEGIES
 )
-from tools_import import load_parquet_files
+from tools_import import load_and_process_parquet_files, scan_adsb_dataset
+from tools_index import load_sidecar_indexes
+from tools_projection import add_enu_columns, filter_segments_by_corridor, add_crossing_times
+from tools_spatial import SpatialIndex
+from tools_store import load_adsb_store, store_day_files, store_day_path, file_fingerprint
+
+# Manifest of the incremental processing, written in the output directory
+PROCESSING_MANIFEST = '_processed_manifest.json'
+
+# Parameters of process_adsb_data_1day that do not change its results
+RUNTIME_PARAMETERS = ['workers', 'max_in_flight_bytes', 'cache_dir', 'cache_max_bytes']
+
+# Parameters of process_adsb_data_1day used to load the data (see load_adsb_days)
+LOAD_PARAMETERS = ['base_path', 'workers', 'max_in_flight_bytes', 'compact', 'store_path', 'index_dir', 'bounds',
+                   'altitude_range']
+
+# Columns loaded by process_adsb_data_1day
+LOAD_COLUMNS = ['df', 'icao24', 'ts', 'altitude', 'lat_deg', 'lon_deg']
+
+
+def day_output_prefix(output_dir: str, day: date) -> str:
+    """
+    Prefix of the output files of one day: output_dir/save_YYYY_MM_DD.
+    """
+    return os.path.join(output_dir, f"save_{day.strftime('%Y_%m_%d')}")
+
+
+def load_adsb_days(start_date: date, end_date: date, base_path: str = "data/engage-hackathon-2025",
+                   workers: int = None, max_in_flight_bytes: int = None, compact: bool = False,
+                   store_path: str = None, index_dir: str = None, bounds=(40.3, 40.8, -3.8, -3.3),
+                   altitude_range=(-1000, 10000), files: list = None, by_file: bool = False):
+    """
+    Load the ADS-B data of the days between the start and end date (inclusive), the first stage of
+    process_adsb_data_1day.
+
+    Args:
+        start_date (date): First day to load.
+        end_date (date): Last day to load (inclusive).
+        base_path (str, optional): Base path for the input parquet files. Defaults to "data/engage-hackathon-2025".
+        workers (int, optional): Number of parquet files loaded in parallel. Defaults to None (serial).
+        max_in_flight_bytes (int, optional): Maximum size of the parquet files being loaded in parallel,
+            measured with the footer catalog of index_dir when available (see
+            tools_import.load_and_process_parquet_files). Defaults to None (no limit).
+        compact (bool, optional): Return the compact in-memory schema. Defaults to False.
+        store_path (str, optional): Compacted store to read instead of the raw files. Defaults to None.
+        index_dir (str, optional): Directory of the sidecar indexes of the raw files (see
+            main_build_index.py and tools_index.load_sidecar_indexes). With it, only the points inside
+            bounds and altitude_range, and within the days (UTC), are loaded: the files and row groups
+            without any are skipped with the spatial index and the footer catalog. Not used with a
+            store. Defaults to None (all the points are loaded).
+        bounds (tuple, optional): Geographical box (min_lat, max_lat, min_lon, max_lon) [deg], with index_dir.
+        altitude_range (tuple, optional): Altitude band (min_alt, max_alt) [ft], with index_dir.
+        files (list, optional): Input files of the days to load (hour partitions, or days of the store,
+            see _input_files), e.g. those that are not cached. Defaults to None (all of them).
+        by_file (bool, optional): Return the data of each input file instead of the combined data.
+            Defaults to False.
+
+    Returns:
+        pd.DataFrame: The loaded data (empty if there is no data), or with by_file a dictionary
+            {file: DataFrame} in the order of the files.
+    """
+    if files is None:
+        files = _input_files(start_date, end_date, base_path, store_path)
+    if store_path is not None:
+        frames = {}
+        day = start_date
+        while day <= end_date:
+            if store_day_path(store_path, day) in files:
+                frame = load_adsb_store(store_path, day, day, columns=LOAD_COLUMNS)
+                if compact and not frame.empty:
+                    frame = compact_dataframe(frame)
+                frames[store_day_path(store_path, day)] = frame
+            day += timedelta(days=1)
+    else:
+        prefilter = {}
+        if index_dir is not None:
+            start_ms, end_ms = period_window(start_date, end_date)
+            prefilter = dict(bounds=list(bounds), altitude_range=list(altitude_range),
+                             time_range=[start_ms, end_ms - 1],
+                             **load_sidecar_indexes(index_dir, ['spatial_index', 'catalog']))
+        frames = load_and_process_parquet_files(list(files), columns_to_extract=LOAD_COLUMNS, workers=workers,
+                                                max_in_flight_bytes=max_in_flight_bytes, compact=compact,
+                                                by_file=True, **prefilter)
+    return frames if by_file else combine_frames(list(frames.values()))
+
+
+def combine_frames(frames: list) -> pd.DataFrame:
+    """
+    Concatenate the DataFrames of the input files of a period, skipping the empty ones.
+    """
+    frames = [frame for frame in frames if not frame.empty]
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+
+def period_window(start_date: date, end_date: date) -> tuple:
+    """
+    Time window of the days between the start and end date (inclusive), as [start_ms, end_ms) in UTC
+    milliseconds.
+    """
+    start_ms = int(datetime(start_date.year, start_date.month, start_date.day, tzinfo=timezone.utc).timestamp() * 1000)
+    return start_ms, start_ms + ((end_date - start_date).days + 1) * 86400 * 1000
+
+
+def _input_files(start_date: date, end_date: date, base_path: str, store_path: str = None) -> list:
+    """
+    Input files of the days between the start and end date (inclusive): the hour partitions of the raw
+    dataset, or the compacted days of the store.
+    """
+    if store_path is not None:
+        return store_day_files(store_path, start_date, end_date)
+    return scan_adsb_dataset(base_path,
+                             datetime(start_date.year, start_date.month, start_date.day, 0),
+                             datetime(end_date.year, end_date.month, end_date.day, 23)).files
+
+
+def _stage_keys(cache: PipelineCache, start_date: date, end_date: date, base_path: str = "data/engage-hackathon-2025",
+                model: str = "fap", compact: bool = False, store_path: str = None,
+                bounds=(40.3, 40.8, -3.8, -3.3), altitude_range=(-1000, 10000), time_gap_threshold=3600,
+                overlap_seconds: int = 0, enu: bool = False, corridor_prefilter: bool = False,
+                downsample_seconds: float = 0, crossing_times: bool = False, index_dir: str = None) -> dict:
+    """
+    Cache keys of the stages of process_adsb_data_1day for a period (see its parameters).
 
+    The loaded data is cached input file by input file ('files', one key per hour partition or day of
+    the store), so that a new hour only reads that hour. The 'load' key of the whole period is not an
+    entry of its own, but the upstream key of the overlap buffer and of the segments.
 
-def process_adsb_data_1day(year, month, day, delta_days=0, output_dir="output", base_path="data/engage-hackathon-2025", model: str="fap"):
+    Returns:
+        dict: The keys of the 'files' ({file: key}), 'load', 'segments' and 'landing' stages, and of
+            the overlap buffers of the period ('tail') and of the previous day ('previous_tail'), None
+            when not used or, for the previous day, when it is not cached.
+    """
+    def load_params(first_date, last_date):
+        # With the sidecar indexes, only the points inside the box, the altitude band and the days are loaded
+        params = {'columns': LOAD_COLUMNS, 'compact': compact}
+        if index_dir is not None and store_path is None:
+            params['prefilter'] = {'bounds': list(bounds), 'altitude_range': list(altitude_range),
+                                   'time_window': list(period_window(first_date, last_date))}
+        return params
+
+    files = _input_files(start_date, end_date, base_path, store_path)
+    key_files = {file: cache.key('file', load_params(start_date, end_date), input_files=[file]) for file in files}
+    key_load = cache.key('load', load_params(start_date, end_date), input_files=files)
+
+    key_tail = None
+    key_previous_tail = None
+    if overlap_seconds > 0:
+        key_tail = cache.key('tail', {'overlap_seconds': overlap_seconds}, upstream_key=key_load)
+        previous_date = start_date - timedelta(days=1)
+        key_previous_load = cache.key('load', load_params(previous_date, previous_date),
+                                      input_files=_input_files(previous_date, previous_date, base_path, store_path))
+        key_previous_tail = cache.key('tail', {'overlap_seconds': overlap_seconds}, upstream_key=key_previous_load)
+        if not cache.contains('tail', key_previous_tail):
+            key_previous_tail = None
+
+    key_segments = cache.key('segments', {'bounds': list(bounds), 'altitude_range': list(altitude_range),
+                                          'time_gap_threshold': time_gap_threshold,
+                                          'overlap_seconds': overlap_seconds, 'previous_tail': key_previous_tail,
+                                          'enu': enu, 'downsample_seconds': downsample_seconds},
+                             upstream_key=key_load)
+    key_landing = cache.key('landing', {'model': model, 'corridor_prefilter': corridor_prefilter,
+                                        'crossing_times': crossing_times},
+                            upstream_key=key_segments)
+    return {'files': key_files, 'load': key_load, 'tail': key_tail, 'previous_tail': key_previous_tail,
+            'segments': key_segments, 'landing': key_landing}
+
+
+def missing_day_files(day: date, output_dir: str = "output", cache_dir: str = None, **kwargs) -> list:
+    """
+    Input files of a day (see _input_files) whose data is not in the pipeline cache of
+    process_adsb_data_1day, i.e. the ones that need to be read. None are needed when the segments of
+    the day are cached.
+
+    Args:
+        day (date): The day.
+        output_dir (str, optional): Output directory of process_adsb_data_1day. Defaults to "output".
+        cache_dir (str, optional): Directory of the pipeline cache. Defaults to output_dir/cache.
+        **kwargs: Other arguments of process_adsb_data_1day (base_path, model, compact, ...).
+
+    Returns:
+        list: The files to read, in order.
+    """
+    cache = PipelineCache(cache_dir or os.path.join(output_dir, "cache"))
+    keys = _stage_keys(cache, day, day, **{key: value for key, value in kwargs.items()
+                                           if key not in RUNTIME_PARAMETERS})
+    if cache.contains('segments', keys['segments']):
+        return []
+    return [file for file, key in keys['files'].items() if not cache.contains('file', key)]
+
+
+def prefetch_adsb_days(days: list, depth: int = 1, pending_files=None, **kwargs):
+    """
+    Yield the days with their data, loading the next days in a background thread while the caller
+    processes the current one, so that reading and decoding overlap with the computation.
+
+    Args:
+        days (list): The days (date objects) to load, in processing order.
+        depth (int, optional): Number of days loaded ahead of the current one. Bounds the memory to
+            depth + 1 days of data. With 0, the days are loaded when they are requested. Defaults to 1.
+        pending_files (callable, optional): Function of a day that returns the input files to load, e.g.
+            the ones that are not cached (see missing_day_files). The days without any are not loaded.
+            Defaults to None (all the input files are loaded).
+        **kwargs: Arguments of load_adsb_days (base_path, workers, compact, store_path, ...).
+
+    Yields:
+        tuple: (day, data) for each day, in order, the data of each loaded input file as a dictionary
+            {file: DataFrame} (see load_adsb_days and the preloaded argument of process_adsb_data_1day).
+            It is None for the days that are not loaded.
+    """
+    in_flight = deque()
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        for day in days:
+            files = pending_files(day) if pending_files is not None else None
+            if files is not None and not files:
+                print(f"Day {day.isoformat()} is cached, it is not prefetched")
+                in_flight.append((day, None))
+            else:
+                in_flight.append((day, executor.submit(load_adsb_days, day, day, files=files, by_file=True,
+                                                       **kwargs)))
+            if len(in_flight) > depth:
+                loaded_day, future = in_flight.popleft()
+                yield loaded_day, future.result() if future is not None else None
+        while in_flight:
+            loaded_day, future = in_flight.popleft()
+            yield loaded_day, future.result() if future is not None else None
+
+
+def process_adsb_data_1day(year, month, day, delta_days=0, output_dir="output", base_path="data/engage-hackathon-2025", model: str="fap",
+                           workers: int = None, max_in_flight_bytes: int = None, compact: bool = False,
+                           store_path: str = None, bounds=(40.3, 40.8, -3.8, -3.3), altitude_range=(-1000, 10000), time_gap_threshold=3600,
+                           cache_dir: str = None, cache_max_bytes: int = None, preloaded: dict = None,
+                           overlap_seconds: int = 0, enu: bool = False,
+                           corridor_prefilter: bool = False, downsample_seconds: float = 0,
+                           crossing_times: bool = False, index_dir: str = None):
     """
     Process ADS-B data for a given date or date range.
 
@@ -39,45 +285,114 @@ def process_adsb_data_1day(year, month, day, delta_days=0, output_dir="output",
             Directory where the output files will be saved.
         base_path: str
             Base path for the input parquet files.
+        model: str
+            Landing runway identification method, "fap", "backwards" or "scenario" (see
+            tools_filter.identify_landing_runway_strategies). Any other value raises a ValueError.
+        workers: int
+            Number of parquet files loaded in parallel. If None, files are loaded one by one.
+        max_in_flight_bytes: int
+            Maximum size of the parquet files being loaded in parallel (see load_adsb_days). If None, not limited.
+        compact: bool
+            Keep the trajectory points in the compact in-memory schema (see tools_filter.compact_dataframe).
+            Exported files use the original schema.
+        store_path: str
+            Compacted store to read instead of the raw files in base_path (see tools_store.compact_adsb_dataset).
+        bounds: tuple
+            Geographical box (min_lat, max_lat, min_lon, max_lon) of the segments [deg].
+        altitude_range: tuple
+            Altitude band (min_alt, max_alt) of the segments [ft].
+        time_gap_threshold: int
+            Time gap between two points of the same aircraft that starts a new segment [s].
+        cache_dir: str
+            Directory of the pipeline cache (see tools_cache.PipelineCache). Defaults to output_dir/cache.
+        cache_max_bytes: int
+            Maximum size of the pipeline cache. If None, the cache is not limited.
+        preloaded: dict
+            Data of input files of the period already loaded with load_adsb_days, as {file: DataFrame}
+            (see prefetch_adsb_days), used instead of loading them again when they are not cached.
+        overlap_seconds: int
+            Overlap-buffer mode, for the flights that span midnight. If greater than zero, the points of the
+            last overlap_seconds of the period are kept in the cache, and the points kept by the previous
+            day are stitched onto the period before identifying the segments. Landings are then assigned
+            to the day of their threshold time, so that they are not counted twice. If zero, the period
+            is processed alone.
+        enu: bool
+            Add the 'east', 'north' and 'up' columns of the local frame around LEMD to the segments
+            (see tools_projection.add_enu_columns), once, before they are cached. The spatial index,
+            the corridor prefilter and the crossing times then use them instead of projecting the
+            positions again; the distances and bearings of the landing runway identification are
+            haversine ones either way.
+        corridor_prefilter: bool
+            Only identify the landing runway of the segments with points inside a final approach corridor
+            (see tools_projection.filter_segments_by_corridor). The results of the "fap" and "backwards"
+            models do not change, but most overflights and departures are skipped.
+        downsample_seconds: float
+            If greater than zero, keep at most one point per aircraft every downsample_seconds before
+            identifying the segments (see tools_filter.downsample_dataframe).
+        crossing_times: bool
+            Add the times at which each landing crosses the FAP and the threshold, interpolated between
+            samples, to the basic info (see tools_projection.add_crossing_times). Unlike ts_fap and
+            ts_thr, they stay accurate when the data is downsampled.
+        index_dir: str
+            Directory of the sidecar indexes of the raw files (see main_build_index.py). With it, only the
+            points inside bounds and altitude_range, and within the period, are loaded, skipping the files
+            and row groups without any (see load_adsb_days), and the segments are identified on these
+            points only: an aircraft that leaves the box or the band for more than time_gap_threshold
+            starts a new segment. The entries of the files changed since the indexes were built are ignored.
     """
+    if model not in LANDING_STRATEGIES:
+        raise ValueError(f"unknown model {model!r}, expected one of {list(LANDING_STRATEGIES)}")
+
     # Compute start and end dates
     start_date = date(year, month, day)
     end_date = start_date + timedelta(days=delta_days) if delta_days > 0 else start_date
 
     # Build output prefix based on date or date range
     if start_date == end_date:
-        output_prefix = os.path.join(output_dir, f"save_{start_date.strftime('%Y_%m_%d')}")
+        output_prefix = day_output_prefix(output_dir, start_date)
     else:
         output_prefix = os.path.join(output_dir, f"save_{start_date.strftime('%Y_%m_%d')}_to_{end_date.strftime('%Y_%m_%d')}")
 
-    # Define cache file names using the output prefix
-    cache_file = f"{output_prefix}_cached_df.pkl"
-    cache_file2 = f"{output_prefix}_cached2_df.pkl"
-    cache_file3 = f"{output_prefix}_cached_landing.pkl"
+    # Stage keys chain on the upstream key, so changing a parameter only recomputes the stages that depend on it
+    cache = PipelineCache(cache_dir or os.path.join(output_dir, "cache"), max_bytes=cache_max_bytes)
+    keys = _stage_keys(cache, start_date, end_date, base_path=base_path, model=model, compact=compact,
+                       store_path=store_path, bounds=bounds, altitude_range=altitude_range,
+                       time_gap_threshold=time_gap_threshold, overlap_seconds=overlap_seconds, enu=enu,
+                       corridor_prefilter=corridor_prefilter, downsample_seconds=downsample_seconds,
+                       crossing_times=crossing_times, index_dir=index_dir)
+    key_tail, key_previous_tail = keys['tail'], keys['previous_tail']
+    key_segments, key_landing = keys['segments'], keys['landing']
+
+    # Overlap buffer: tail of this period, and tail of the previous day if it was processed
+    start_ms, end_ms = period_window(start_date, end_date)
+    if overlap_seconds > 0 and key_previous_tail is None:
+        previous_date = start_date - timedelta(days=1)
+        print(f"Warning: no overlap buffer of {previous_date.isoformat()}, process it first to stitch the "
+              f"flights that span midnight")
 
-    # --- Load Dataframe with Caching ---
-    if os.path.exists(cache_file):
-        print(f"Loading cached dataframe from {cache_file} ...")
-        df = pd.read_pickle(cache_file)
-    else:
-        print("Cache file not found. Processing data ...")
-        df = load_parquet_files(
-            start_date.year, start_date.month, start_date.day, 0,
-            end_date.year, end_date.month, end_date.day, 23,
-            base_path=base_path
-        )
+    # --- Clean and Process Dataframe with Caching ---
+    df = cache.load('segments', key_segments)
+    if df is None:
+        # --- Load Dataframe with Caching, input file by input file ---
+        frames = {file: cache.load('file', key) for file, key in keys['files'].items()}
+        missing_files = [file for file, frame in frames.items() if frame is None]
+        if missing_files:
+            loaded = dict(preloaded or {})
+            unloaded_files = [file for file in missing_files if file not in loaded]
+            if unloaded_files:
+                print(f"Processing data of {len(unloaded_files)} files ...")
+                loaded.update(load_adsb_days(start_date, end_date, base_path=base_path, workers=workers,
+                                             max_in_flight_bytes=max_in_flight_bytes, compact=compact,
+                                             store_path=store_path, index_dir=index_dir, bounds=bounds,
+                                             altitude_range=altitude_range, files=unloaded_files, by_file=True))
+            for file in missing_files:
+                cache.save('file', keys['files'][file], loaded[file])
+                frames[file] = loaded[file]
+        df = combine_frames(list(frames.values()))
         if df.empty:
             print(f"No data found for the specified period: {output_prefix}")
             return
-        print(f"Saving processed dataframe to cache file {cache_file} ...")
-        df.to_pickle(cache_file)
 
-    # --- Clean and Process Dataframe with Caching ---
-    if os.path.exists(cache_file2):
-        print(f"Loading cached dataframe2 from {cache_file2} ...")
-        df = pd.read_pickle(cache_file2)
-    else:
-        print("Cache file2 not found. Processing data ...")
         print("Cleaning dataframe nulls ...")
         columns_to_clean = ['altitude', 'lat_deg', 'lon_deg']
         df_filtered = clean_dataframe_nulls(df, columns_to_clean)
@@ -89,38 +404,67 @@ def process_adsb_data_1day(year, month, day, delta_days=0, output_dir="output",
         print("Sorting dataframe ...")
         sorted_df = sort_dataframe(df_extracted)
 
+        if overlap_seconds > 0:
+            # Keep the tail of this period for the next day, before stitching the previous one
+            cache.save('tail', key_tail, sorted_df[sorted_df['ts'] >= end_ms - overlap_seconds * 1000])
+            if key_previous_tail is not None:
+                previous_tail = cache.load('tail', key_previous_tail)
+                print(f"Stitching {len(previous_tail)} points of the previous day ...")
+                sorted_df = sort_dataframe(pd.concat([previous_tail, sorted_df], ignore_index=True))
+
+        if downsample_seconds > 0:
+            print(f"Downsampling to one point every {downsample_seconds} s ...")
+            sorted_df = downsample_dataframe(sorted_df, downsample_seconds)
+
         print("Identifying segments ...")
-        df_segments, df_extra = identify_segments(sorted_df)
+        df_segments, df_extra = identify_segments(sorted_df, time_gap_threshold=time_gap_threshold)
 
         # Final dataframe for further processing
         df = df_segments
 
         print("Filtering dataframe by geographical bounds ...")
-        min_lat, max_lat, min_lon, max_lon = [40.3, 40.8, -3.8, -3.3]  # [deg]
+        min_lat, max_lat, min_lon, max_lon = bounds  # [deg]
         df = filter_dataframe_by_bounds(df, min_lat, max_lat, min_lon, max_lon)
 
         print("Filtering dataframe by altitude ...")
-        min_alt, max_alt = [-1000, 10000]  # [ft]
+        min_alt, max_alt = altitude_range  # [ft]
         df = filter_dataframe_by_altitude(df, min_alt, max_alt)
 
-        print(f"Saving processed dataframe to cache file2 {cache_file2} ...")
-        df.to_pickle(cache_file2)
+        if enu:
+            print("Projecting to the local ENU frame ...")
+            df = add_enu_columns(df)
 
-    # --- Identify Landing Runways with Caching ---
-    if os.path.exists(cache_file3):
-        print(f"Loading cached landing runway results from {cache_file3} ...")
-        df_with_runway, basic_info_df, df_segments_ils = pd.read_pickle(cache_file3)
-    else:
-        print("Cache file for landing runway not found. Processing landing runway results ...")
-        if model == "fap":
-            df_with_runway, basic_info_df, df_segments_ils = identify_landing_runway(df)
-        elif model == "backwards":
-            df_with_runway, basic_info_df, df_segments_ils = identify_landing_runway_backwards(df)
-        else:
-            print("Model not recognized.")
+        cache.save('segments', key_segments, df)
 
-        print(f"Saving landing runway results to cache file {cache_file3} ...")
-        pd.to_pickle((df_with_runway, basic_info_df, df_segments_ils), cache_file3)
+    # --- Identify Landing Runways with Caching ---
+    landing_results = cache.load_landing('landing', key_landing)
+    if landing_results is None:
+        print("Processing landing runway results ...")
+        df_landing = filter_segments_by_corridor(df)[0] if corridor_prefilter else df
+        spatial_index = None
+        if model != 'scenario':
+            # KD-tree of the segments for the 700 m gates, cached with them as its Arrow inputs
+            spatial_frame = cache.load('kdtree', key_segments)
+            if spatial_frame is not None:
+                spatial_index = SpatialIndex.from_frame(spatial_frame)
+            else:
+                print("Building the spatial index of the segments ...")
+                spatial_index = SpatialIndex(df)
+                cache.save('kdtree', key_segments, spatial_index.to_frame())
+        landing_results = identify_landing_runway_strategies(df_landing, [model], spatial_index=spatial_index)[model]
+        if crossing_times:
+            print("Interpolating the FAP and threshold crossing times ...")
+            df_with_runway, basic_info_df, df_segments_ils = landing_results
+            landing_results = (df_with_runway, add_crossing_times(basic_info_df, df_landing), df_segments_ils)
+
+        cache.save_landing('landing', key_landing, landing_results)
+    if overlap_seconds > 0:
+        # Landings belong to the day of their threshold time: those of the previous day are dropped
+        landing_results = tuple(
+            result[(result['ts_thr'] >= start_ms) & (result['ts_thr'] < end_ms)] if 'ts_thr' in result.columns else result
+            for result in landing_results)
+    df_with_runway, basic_info_df, df_segments_ils = landing_results
+    cache.report()
 
     # --- Analysis and Plotting ---
     # Define time thresholds (in seconds)
@@ -160,17 +504,27 @@ def process_adsb_data_1day(year, month, day, delta_days=0, output_dir="output",
 
     # --- Training subset ---
 
-    df_training_subset = normal_basic_info_df[
-        ['icao24', 'runway_fap', 'ts_fap', 'ts_thr',
-         'distance_fap_to_thr', 'delta_time_fap_to_thr',
-         'speed_fap', 'vertical_speed_fap', 'heading_fap']
-    ].copy()  # Create a copy to avoid SettingWithCopyWarning
+    training_columns = ['icao24', 'runway_fap', 'ts_fap', 'ts_thr',
+                        'distance_fap_to_thr', 'delta_time_fap_to_thr',
+                        'speed_fap', 'vertical_speed_fap', 'heading_fap']
+    # Interpolated crossing times, if requested
+    training_columns += [column for column in ['ts_fap_crossing', 'ts_thr_crossing', 'delta_time_crossing']
+                         if column in normal_basic_info_df.columns]
+    df_training_subset = normal_basic_info_df[training_columns].copy()  # Create a copy to avoid SettingWithCopyWarning
 
     # Add a new column 'weekday' computed from 'ts_fap'
     df_training_subset['weekday'] = df_training_subset['ts_fap'].apply(get_day_of_week)
 
     # --- Exporting Results ---
 
+    if compact:
+        # Export with hexadecimal icao24 and byte-string df, as in the original data
+        df_training_subset = expand_dataframe(df_training_subset)
+        df = expand_dataframe(df)
+        normal_basic_info_df = expand_dataframe(normal_basic_info_df)
+        df_segments_ils = expand_dataframe(df_segments_ils)
+        normal_df_segments_ils = expand_dataframe(normal_df_segments_ils)
+
     print("Exporting training CSV ...")
     export_trajectories_to_csv(df_training_subset, output_prefix + '_training.csv')
 
@@ -186,3 +540,286 @@ def process_adsb_data_1day(year, month, day, delta_days=0, output_dir="output",
     print("Exporting segments KML ...")
     export_trajectories_to_kml(df_segments_ils, output_prefix + '_segments_all.kml')
     export_trajectories_to_kml(normal_df_segments_ils, output_prefix + '_segments_all_filtered.kml')
+
+
+def merge_day_outputs(output_dir: str, days: list):
+    """
+    Merge the training events and the statistics of some days into the combined files of the output
+    directory, combined_training.csv and combined_statistics.csv.
+
+    The rows of these days already in the combined files are replaced, the rows of the other days
+    are kept, so the combined files can be updated as new days are processed.
+
+    Args:
+        output_dir (str): Output directory of process_adsb_data_1day.
+        days (list): The days (date objects) to merge.
+    """
+    if not days:
+        return
+    day_keys = [day.isoformat() for day in days]
+    training_frames = []
+    statistics_rows = []
+    for day, day_key in zip(days, day_keys):
+        output_prefix = day_output_prefix(output_dir, day)
+
+        training_file = output_prefix + '_training.csv'
+        if os.path.exists(training_file):
+            df_training = pd.read_csv(training_file, dtype={'icao24': str}, float_precision='round_trip')
+            df_training.insert(0, 'date', day_key)
+            training_frames.append(df_training)
+
+        # Global statistics (save_YYYY_MM_DD_statistics.csv) and statistics per runway
+        statistics_files = [output_prefix + '_statistics.csv'] + sorted(glob.glob(output_prefix + '_*_statistics.csv'))
+        for statistics_file in statistics_files:
+            if not os.path.exists(statistics_file):
+                continue
+            runway = statistics_file[len(output_prefix) + 1:-len('statistics.csv')].rstrip('_') or 'all'
+            stats = pd.read_csv(statistics_file, float_precision='round_trip')
+            statistics_rows.append({'date': day_key, 'runway': runway,
+                                    **dict(zip(stats['Statistic'], stats['Value']))})
+
+    for name, new_df in [('training', pd.concat(training_frames, ignore_index=True) if training_frames else pd.DataFrame()),
+                         ('statistics', pd.DataFrame(statistics_rows))]:
+        combined_file = os.path.join(output_dir, f"combined_{name}.csv")
+        if os.path.exists(combined_file):
+            combined_df = pd.read_csv(combined_file, dtype={'icao24': str, 'date': str}, float_precision='round_trip')
+            combined_df = combined_df[~combined_df['date'].isin(day_keys)]
+            new_df = pd.concat([combined_df, new_df], ignore_index=True)
+        if new_df.empty:
+            continue
+        new_df = new_df.sort_values('date', kind='stable')
+        new_df.to_csv(combined_file + '.tmp', index=False)
+        os.replace(combined_file + '.tmp', combined_file)
+        print(f"Updated {combined_file} ({len(days)} days merged)")
+
+
+def _resident_memory_mb() -> float:
+    """
+    Resident memory of this process [MB]: the current one from /proc where available, or else the peak
+    one (ru_maxrss, in bytes on macOS and in kilobytes on Linux).
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _watch_memory(max_memory_mb: int, stop: threading.Event, interval: float = 0.5):
+    """
+    Check the resident memory of this process every interval seconds until stop is set, and signal the
+    main thread (SIGUSR1) when it exceeds max_memory_mb.
+
+    This is a soft cap: an allocation between two checks is not stopped, and the signal is only handled
+    when the main thread runs Python code again (not within a long NumPy or Arrow call).
+    """
+    while not stop.wait(interval):
+        if _resident_memory_mb() > max_memory_mb:
+            os.kill(os.getpid(), signal.SIGUSR1)
+            return
+
+
+def _process_day_logged(day: date, output_dir: str, log_dir: str, max_memory_mb: int, kwargs: dict):
+    """
+    Run process_adsb_data_1day for one day in a worker process, writing its output to a log file.
+
+    Returns:
+        str: The error of the day, or None if it was processed.
+    """
+    stop = threading.Event()
+    if max_memory_mb is not None:
+        # The resident memory (not the address space, which Arrow and NumPy reserve far beyond what they
+        # use) is checked in the background: beyond the cap, the day fails with a MemoryError instead of
+        # exhausting the machine
+        def memory_exceeded(signum, frame):
+            raise MemoryError(f"resident memory above the cap of {max_memory_mb} MB")
+        signal.signal(signal.SIGUSR1, memory_exceeded)
+        threading.Thread(target=_watch_memory, args=(max_memory_mb, stop), daemon=True).start()
+
+    log_file = os.path.join(log_dir, os.path.basename(day_output_prefix(output_dir, day)) + '.log')
+    with open(log_file, 'w') as log, contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+        try:
+            process_adsb_data_1day(day.year, day.month, day.day, output_dir=output_dir, **kwargs)
+        except Exception as e:
+            traceback.print_exc()
+            return f"{type(e).__name__}: {e}"
+        finally:
+            stop.set()
+    return None
+
+
+def _run_days(days: list, processes: int, output_dir: str, log_dir: str, max_memory_mb: int, kwargs: dict) -> dict:
+    """
+    Process days in a pool of worker processes, see process_adsb_days_parallel.
+
+    Returns:
+        dict: Error of each day (None if it was processed). Days lost with a crashed worker have a
+            BrokenProcessPool error. An exception raised by a day does not stop the other days.
+    """
+    errors = {}
+    # One day per worker process, so that the memory of a day is released when it finishes
+    with ProcessPoolExecutor(max_workers=processes, max_tasks_per_child=1) as executor:
+        futures = {executor.submit(_process_day_logged, day, output_dir, log_dir, max_memory_mb, kwargs): day
+                   for day in days}
+        for future in as_completed(futures):
+            day = futures[future]
+            try:
+                errors[day] = future.result()
+            except BrokenProcessPool as e:
+                errors[day] = e
+            except Exception as e:
+                # E.g. a MemoryError of the watchdog raised outside process_adsb_data_1day
+                errors[day] = f"{type(e).__name__}: {e}"
+            if errors[day] is None:
+                print(f"Day {day.isoformat()} processed")
+    return errors
+
+
+def process_adsb_days_parallel(days: list, output_dir: str = "output/training_data", processes: int = None,
+                               max_memory_mb: int = None, **kwargs) -> dict:
+    """
+    Process several days with process_adsb_data_1day in parallel worker processes, then merge the
+    training events and statistics of the processed days (see merge_day_outputs).
+
+    The output of each day is written to output_dir/logs/save_YYYY_MM_DD.log. A failed day is
+    reported and does not stop the other days. If a worker process crashes (e.g. killed by the
+    operating system), the days it took down with the pool are retried one by one.
+
+    Args:
+        days (list): The days (date objects) to process.
+        output_dir (str, optional): Output directory. Defaults to "output/training_data".
+        processes (int, optional): Number of worker processes. Defaults to None (number of CPUs).
+        max_memory_mb (int, optional): Resident memory cap of each worker process [MB], checked every
+            half second. A day that needs more memory fails with a MemoryError. This is a soft cap: since
+            the memory is polled, an allocation spike faster than the polling interval is not stopped,
+            and may still exhaust the machine. Defaults to None (no cap).
+        **kwargs: Other arguments of process_adsb_data_1day (base_path, model, workers, ...).
+
+    Returns:
+        dict: Error message of each failed day.
+    """
+    log_dir = os.path.join(output_dir, "logs")
+    os.makedirs(log_dir, exist_ok=True)
+
+    errors = _run_days(days, processes, output_dir, log_dir, max_memory_mb, kwargs)
+    for day in sorted(day for day, error in errors.items() if isinstance(error, BrokenProcessPool)):
+        print(f"Retrying day {day.isoformat()} after a worker crash ...")
+        errors.update(_run_days([day], 1, output_dir, log_dir, max_memory_mb, kwargs))
+
+    failed_days = {}
+    for day in sorted(errors):
+        if errors[day] is not None:
+            failed_days[day] = str(errors[day])
+            print(f"Day {day.isoformat()} failed: {failed_days[day]} (see {log_dir})")
+
+    merge_day_outputs(output_dir, sorted(day for day in days if day not in failed_days))
+    print(f"Processed {len(days) - len(failed_days)} of {len(days)} days, {len(failed_days)} failed")
+    return failed_days
+
+
+def process_adsb_days_incremental(start_date: date, end_date: date, output_dir: str = "output/training_data",
+                                  base_path: str = "data/engage-hackathon-2025", processes: int = None,
+                                  max_memory_mb: int = None, prefetch_depth: int = 1, **kwargs) -> list:
+    """
+    Process the days between the start and end date (inclusive) with process_adsb_data_1day, skipping
+    the days whose hour partitions did not change since they were last processed.
+
+    A manifest in the output directory records the fingerprints (path, size, mtime) of the hour files
+    each day was processed from. A day is processed again when one of its hours is new or changed:
+    only the new or changed hours are read, the other ones coming from the cache of the loaded data
+    of process_adsb_data_1day, which is kept hour by hour, while the segments and landings of the day
+    are recomputed, since they span several hours. The new landing events and statistics are then
+    merged into the combined files (see merge_day_outputs).
+
+    Args:
+        start_date (date): First day to process.
+        end_date (date): Last day to process (inclusive).
+        output_dir (str, optional): Output directory. Defaults to "output/training_data".
+        base_path (str, optional): Base path for the input parquet files. Defaults to "data/engage-hackathon-2025".
+        processes (int, optional): Number of days processed in parallel, see process_adsb_days_parallel.
+            Defaults to None (days are processed one by one).
+        max_memory_mb (int, optional): Memory cap of each process, see process_adsb_days_parallel.
+        prefetch_depth (int, optional): Number of days loaded ahead while a day is processed, when the
+            days are processed one by one (see prefetch_adsb_days). The days already in the pipeline cache
+            are not loaded, nor their cached hours (see missing_day_files). Defaults to 1.
+        **kwargs: Other arguments of process_adsb_data_1day (model, workers, store_path, ...).
+
+    Returns:
+        list: The days (date objects) that were processed. Failed days are processed again in the next run.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, PROCESSING_MANIFEST)
+    manifest = {'params': None, 'days': {}}
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+
+    # A change of the processing parameters invalidates all the processed days
+    params = json.loads(json.dumps({key: value for key, value in kwargs.items() if key not in RUNTIME_PARAMETERS}))
+    if manifest['params'] != params:
+        if manifest['days']:
+            print("Processing parameters changed, all the days will be processed again")
+        manifest = {'params': params, 'days': {}}
+
+    # Input files of each day: the hour partitions, or the compacted day of the store
+    store_path = kwargs.get('store_path')
+    files_per_day = {}
+    if store_path is not None:
+        day = start_date
+        while day <= end_date:
+            if os.path.exists(store_day_path(store_path, day)):
+                files_per_day[day] = [store_day_path(store_path, day)]
+            day += timedelta(days=1)
+    else:
+        dataset = scan_adsb_dataset(base_path,
+                                    datetime(start_date.year, start_date.month, start_date.day, 0),
+                                    datetime(end_date.year, end_date.month, end_date.day, 23))
+        for fragment in dataset.get_fragments():
+            keys = ds.get_partition_keys(fragment.partition_expression)
+            files_per_day.setdefault(date(keys['year'], keys['month'], keys['day']), []).append(fragment.path)
+
+    pending_days = {}
+    for day, files in sorted(files_per_day.items()):
+        day_key = day.isoformat()
+        fingerprints = [file_fingerprint(file) for file in files]
+        new_hours = [fingerprint for fingerprint in fingerprints if fingerprint not in manifest['days'].get(day_key, [])]
+        if not new_hours:
+            print(f"Day {day_key} is up to date")
+            continue
+        print(f"Day {day_key} has {len(new_hours)} new or changed files")
+        pending_days[day] = fingerprints
+        # Remove the statistics of a previous run, a runway may no longer have landings
+        for statistics_file in glob.glob(day_output_prefix(output_dir, day) + '_*statistics.csv'):
+            os.remove(statistics_file)
+
+    def save_processed(days):
+        for day in days:
+            manifest['days'][day.isoformat()] = pending_days[day]
+        with open(manifest_path + '.tmp', 'w') as f:
+            json.dump(manifest, f, indent=1)
+        os.replace(manifest_path + '.tmp', manifest_path)
+
+    if processes is not None and processes > 1:
+        failed_days = process_adsb_days_parallel(list(pending_days), output_dir=output_dir, base_path=base_path,
+                                                 processes=processes, max_memory_mb=max_memory_mb, **kwargs)
+        processed_days = [day for day in pending_days if day not in failed_days]
+        save_processed(processed_days)
+    else:
+        processed_days = []
+        load_kwargs = {key: value for key, value in kwargs.items() if key in LOAD_PARAMETERS}
+        # Only the hours that are not cached are read
+        def pending_files(day):
+            return missing_day_files(day, output_dir=output_dir, base_path=base_path, **kwargs)
+
+        for day, data in prefetch_adsb_days(list(pending_days), depth=prefetch_depth, pending_files=pending_files,
+                                            base_path=base_path, **load_kwargs):
+            print(f"Processing day {day.isoformat()} ...")
+            process_adsb_data_1day(day.year, day.month, day.day, output_dir=output_dir, base_path=base_path,
+                                   preloaded=data, **kwargs)
+            merge_day_outputs(output_dir, [day])
+            save_processed([day])
+            processed_days.append(day)
+
+    print(f"Processed {len(processed_days)} of {len(files_per_day)} days")
+    return processed_days
@@ -0,0 +1,397 @@
+"""
+Local east-north-up (ENU) frame around Madrid-Barajas (LEMD).
+
+Latitude/longitude/altitude are converted once, as whole columns, to metres in a plane tangent to the
+Earth at the LEMD reference point. Distances, bearings and along-track/cross-track offsets to the
+runways are then plain array arithmetic, instead of the trigonometry of haversine/compute_bearing on
+every call. The runway FAPs, thresholds, headings and approach axes are precomputed in the same frame
+(see RUNWAY_GEOMETRY).
+
+The frame uses the same spherical Earth (radius 6371 km) as tools_filter.haversine, so that the
+distances, and the 700 m gates built on them, agree with it:
+
+- 'east' and 'north' are the coordinates of the ground position of each point (altitude does not
+  change the horizontal distances, as with haversine).
+- 'up' is the height [m] above the tangent plane at the reference point, including the Earth curvature
+  (about -70 m at 30 km from the reference point, at ground level).
+
+Accuracy against haversine over the 50 km box (40.3-40.8 N, 3.3-3.8 W, pairs up to 69 km apart, see
+test_projection_accuracy.py): horizontal distances differ by at most 0.4 m (relative error 2e-5), and by
+less than 2 cm between points less than 1 km apart. Bearings differ from compute_bearing by the meridian
+convergence, at most 0.2 deg at the edges of the box. (A WGS84 ellipsoidal ENU frame would differ
+from haversine by up to 0.3%, the error of the spherical Earth itself.)
+
+Scope: the frame is used by the proximity and corridor searches, i.e. the KD-tree of
+tools_spatial.SpatialIndex (the candidates of the 700 m gates of the landing engine), the approach
+corridor prefilter and the axis-crossing detector. They read the 'east' and 'north' columns when the
+segments have them and project 'lat_deg'/'lon_deg' otherwise. The landing engine of tools_filter still
+computes the distances, gates and bearings it reports with haversine and calculate_bearing, so that its
+outputs stay identical to those of the per-group methods. Adding the columns is opt-in in the pipeline
+(the enu option of tools_process.process_adsb_data_1day), since they are cached and exported with the
+segments.
+"""
+import numpy as np
+import pandas as pd
+
+from FAP_positions import FAP_position
+from threshold_positions import threshold_position
+from tools_filter import is_fixed_point, MICRODEGREES_PER_DEGREE
+
+# Radius of the Earth [m], as in tools_filter.haversine
+EARTH_RADIUS = 6371000
+
+# Feet to metres (ADS-B and FAP altitudes are in feet)
+FEET_TO_METERS = 0.3048
+
+# Reference point of the frame: LEMD aerodrome reference point (latitude [deg], longitude [deg], elevation [ft])
+LEMD_ORIGIN = (40.472222, -3.560833, 2000)
+
+
+def geodetic_to_enu(lat, lon, altitude=None, origin: tuple = LEMD_ORIGIN):
+    """
+    Convert latitude/longitude/altitude to the local ENU frame (vectorised).
+
+    Args:
+        lat, lon (array-like): Coordinates [deg].
+        altitude (array-like, optional): Altitude [ft]. Defaults to None (the elevation of the origin).
+        origin (tuple, optional): Reference point (latitude [deg], longitude [deg], elevation [ft]).
+            Defaults to LEMD_ORIGIN.
+
+    Returns:
+        tuple: (east, north, up) arrays [m].
+    """
+    lat0, lon0, elevation0 = origin
+    phi0 = np.radians(lat0)
+    phi = np.radians(np.asarray(lat, dtype=float))
+    dlambda = np.radians(np.asarray(lon, dtype=float) - lon0)
+
+    # Unit vector of each point, in a frame rotated to the longitude of the origin
+    x = np.cos(phi) * np.cos(dlambda)
+    y = np.cos(phi) * np.sin(dlambda)
+    z = np.sin(phi)
+
+    east = EARTH_RADIUS * y
+    north = EARTH_RADIUS * (np.cos(phi0) * z - np.sin(phi0) * x)
+    height = elevation0 if altitude is None else np.asarray(altitude, dtype=float)
+    up = ((EARTH_RADIUS + height * FEET_TO_METERS) * (np.sin(phi0) * z + np.cos(phi0) * x)
+          - (EARTH_RADIUS + elevation0 * FEET_TO_METERS))
+    return east, north, up
+
+
+def enu_to_geodetic(east, north, origin: tuple = LEMD_ORIGIN):
+    """
+    Convert ENU ground coordinates back to latitude/longitude (inverse of geodetic_to_enu).
+
+    Args:
+        east, north (array-like): ENU coordinates [m].
+        origin (tuple, optional): Reference point of the frame. Defaults to LEMD_ORIGIN.
+
+    Returns:
+        tuple: (lat, lon) arrays [deg].
+    """
+    lat0, lon0, _ = origin
+    phi0 = np.radians(lat0)
+    y = np.asarray(east, dtype=float) / EARTH_RADIUS
+    n = np.asarray(north, dtype=float) / EARTH_RADIUS
+    u = np.sqrt(1 - y ** 2 - n ** 2)
+    x = np.cos(phi0) * u - np.sin(phi0) * n
+    z = np.sin(phi0) * u + np.cos(phi0) * n
+    return np.degrees(np.arcsin(z)), lon0 + np.degrees(np.arctan2(y, x))
+
+
+def add_enu_columns(df: pd.DataFrame, origin: tuple = LEMD_ORIGIN) -> pd.DataFrame:
+    """
+    Add the 'east', 'north' and 'up' columns [m] of the local ENU frame to the trajectory points.
+
+    Works with latitude/longitude in degrees or in the fixed-point compact schema; the other columns
+    are left unchanged.
+
+    Args:
+        df (pd.DataFrame): Trajectory points with 'lat_deg', 'lon_deg' and 'altitude' [ft] columns.
+        origin (tuple, optional): Reference point of the frame. Defaults to LEMD_ORIGIN.
+
+    Returns:
+        pd.DataFrame: A copy of the DataFrame with the ENU columns.
+    """
+    scale = MICRODEGREES_PER_DEGREE if is_fixed_point(df) else 1
+    df = df.copy()
+    df['east'], df['north'], df['up'] = geodetic_to_enu(df['lat_deg'].to_numpy(dtype=float) / scale,
+                                                        df['lon_deg'].to_numpy(dtype=float) / scale,
+                                                        df['altitude'].to_numpy(dtype=float), origin)
+    return df
+
+
+def enu_distance(east1, north1, east2, north2):
+    """
+    Horizontal distance [m] between points of the ENU frame (element-wise).
+    """
+    return np.hypot(np.asarray(east2, dtype=float) - east1, np.asarray(north2, dtype=float) - north1)
+
+
+def enu_bearing(east1, north1, east2, north2):
+    """
+    Bearing [deg, 0-360, clockwise from north] from the first to the second points of the ENU frame
+    (element-wise).
+    """
+    bearing = np.degrees(np.arctan2(np.asarray(east2, dtype=float) - east1, np.asarray(north2, dtype=float) - north1))
+    return (bearing + 360) % 360
+
+
+class RunwayGeometry:
+    """
+    FAP, threshold and approach axis of a runway in the ENU frame.
+
+    Attributes:
+        fap_east, fap_north, fap_up: Position of the FAP [m].
+        thr_east, thr_north, thr_up: Position of the threshold [m] (at the elevation of the origin).
+        length: Horizontal distance from the FAP to the threshold [m].
+        heading: Bearing of the approach axis, from the FAP to the threshold [deg].
+        axis_east, axis_north: Unit vector of the approach axis, from the FAP to the threshold.
+    """
+
+    def __init__(self, fap, threshold, origin: tuple = LEMD_ORIGIN):
+        self.fap_east, self.fap_north, self.fap_up = (
+            float(value) for value in geodetic_to_enu(fap.latitude, fap.longitude, fap.altitude, origin))
+        self.thr_east, self.thr_north, self.thr_up = (
+            float(value) for value in geodetic_to_enu(threshold.latitude, threshold.longitude, None, origin))
+        self.length = float(enu_distance(self.fap_east, self.fap_north, self.thr_east, self.thr_north))
+        self.heading = float(enu_bearing(self.fap_east, self.fap_north, self.thr_east, self.thr_north))
+        self.axis_east = (self.thr_east - self.fap_east) / self.length
+        self.axis_north = (self.thr_north - self.fap_north) / self.length
+
+    def along_cross_track(self, east, north):
+        """
+        Along-track and cross-track offsets [m] of points of the ENU frame to the approach axis.
+
+        Args:
+            east, north (array-like): ENU coordinates of the points [m].
+
+        Returns:
+            tuple: (along, cross) arrays. 'along' is the distance along the axis from the FAP (0 at the
+                FAP, length at the threshold); 'cross' the distance to the axis (positive to the right).
+        """
+        d_east = np.asarray(east, dtype=float) - self.fap_east
+        d_north = np.asarray(north, dtype=float) - self.fap_north
+        along = d_east * self.axis_east + d_north * self.axis_north
+        cross = d_east * self.axis_north - d_north * self.axis_east
+        return along, cross
+
+    def __repr__(self):
+        return (f"RunwayGeometry(heading={self.heading:.1f}, length={self.length:.0f}, "
+                f"fap=({self.fap_east:.0f}, {self.fap_north:.0f}), thr=({self.thr_east:.0f}, {self.thr_north:.0f}))")
+
+
+def build_runway_geometry(origin: tuple = LEMD_ORIGIN) -> dict:
+    """
+    Precompute the geometry of each runway of FAP_positions / threshold_positions in the ENU frame.
+
+    Returns:
+        dict: RunwayGeometry per runway name.
+    """
+    return {runway: RunwayGeometry(FAP_position[runway], threshold_position[runway], origin)
+            for runway in FAP_position}
+
+
+# Runway geometry in the LEMD frame
+RUNWAY_GEOMETRY = build_runway_geometry()
+
+
+def approach_corridor_mask(east, north, geometry: RunwayGeometry, half_width_thr: float = 1000,
+                           half_width_fap: float = 2000, margin: float = 1000) -> np.ndarray:
+    """
+    Check which points of the ENU frame are inside the final approach corridor of a runway.
+
+    The corridor follows the approach axis from the FAP to the threshold, extended by a margin beyond
+    both ends. Its half-width narrows linearly from half_width_fap at the FAP to half_width_thr at the
+    threshold (a cone), and is constant beyond them.
+
+    Args:
+        east, north (array-like): ENU coordinates of the points [m].
+        geometry (RunwayGeometry): Geometry of the runway (see RUNWAY_GEOMETRY).
+        half_width_thr (float, optional): Half-width at the threshold [m]. Defaults to 1000.
+        half_width_fap (float, optional): Half-width at the FAP [m]. Defaults to 2000.
+        margin (float, optional): Extension beyond the FAP and the threshold [m]. Defaults to 1000.
+
+    Returns:
+        np.ndarray: Boolean mask of the points inside the corridor.
+    """
+    along, cross = geometry.along_cross_track(east, north)
+    fraction = np.clip(along / geometry.length, 0, 1)  # 0 at the FAP, 1 at the threshold
+    half_width = half_width_fap + (half_width_thr - half_width_fap) * fraction
+    return (along >= -margin) & (along <= geometry.length + margin) & (np.abs(cross) <= half_width)
+
+
+def filter_segments_by_corridor(df: pd.DataFrame, half_width_thr: float = 1000, half_width_fap: float = 2000,
+                                margin: float = 1000) -> tuple:
+    """
+    Prefilter of the runway identification: keep only the (icao24, segment) groups with at least one
+    point inside the approach corridor of a runway (see approach_corridor_mask), and which are not
+    classified as departing or level.
+
+    With the default corridors, which contain the 700 m discs around the thresholds, every segment that
+    passes the gates of the 'fap' and 'backwards' strategies of identify_landing_runway_strategies is
+    kept, so their results do not change. The ungated 'scenario' strategy only reports the kept segments.
+
+    Args:
+        df (pd.DataFrame): Segmented trajectory points (see identify_segments), with the 'east' and
+            'north' columns (see add_enu_columns), or else with 'lat_deg' and 'lon_deg'.
+        half_width_thr, half_width_fap, margin (float, optional): Corridor dimensions [m], see
+            approach_corridor_mask.
+
+    Returns:
+        tuple: (filtered DataFrame, with the original index, and the number of segments per outcome:
+            'kept', 'departing/level', 'no position', 'outside corridor')
+    """
+    if 'east' in df.columns and 'north' in df.columns:
+        east, north = df['east'].to_numpy(dtype=float), df['north'].to_numpy(dtype=float)
+    else:
+        scale = MICRODEGREES_PER_DEGREE if is_fixed_point(df) else 1
+        east, north, _ = geodetic_to_enu(df['lat_deg'].to_numpy(dtype=float) / scale,
+                                         df['lon_deg'].to_numpy(dtype=float) / scale)
+
+    in_corridor = np.zeros(len(df), dtype=bool)
+    for geometry in RUNWAY_GEOMETRY.values():
+        in_corridor |= approach_corridor_mask(east, north, geometry, half_width_thr, half_width_fap, margin)
+
+    # Outcome of each group
+    group_id = df.groupby(['icao24', 'segment']).ngroup().to_numpy()
+    n_groups = group_id.max() + 1 if len(group_id) else 0
+    grouped = group_id >= 0
+    has_position = np.zeros(n_groups, dtype=bool)
+    has_position[group_id[grouped & ~np.isnan(east) & ~np.isnan(north)]] = True
+    has_corridor_point = np.zeros(n_groups, dtype=bool)
+    has_corridor_point[group_id[grouped & in_corridor]] = True
+    excluded = np.zeros(n_groups, dtype=bool)
+    if 'trajectory' in df.columns:
+        excluded[group_id[grouped & df['trajectory'].isin(['departing', 'level']).to_numpy()]] = True
+
+    kept = ~excluded & has_corridor_point
+    rejections = {
+        'kept': int(kept.sum()),
+        'departing/level': int(excluded.sum()),
+        'no position': int((~excluded & ~has_position).sum()),
+        'outside corridor': int((~excluded & has_position & ~has_corridor_point).sum()),
+    }
+    print(f"  Corridor prefilter: {rejections['kept']} of {n_groups} segments kept, "
+          f"{rejections['departing/level']} departing/level, {rejections['no position']} without position, "
+          f"{rejections['outside corridor']} outside the approach corridors")
+
+    return df[grouped & kept[np.maximum(group_id, 0)]], rejections
+
+
+# Columns of the results of find_axis_crossings
+CROSSING_COLUMNS = ['icao24', 'segment', 'runway', 'ts_fap', 'ts_thr', 'cross_track_fap', 'cross_track_thr',
+                    'delta_time']
+
+
+def find_axis_crossings(df: pd.DataFrame, max_cross_track: float = 700) -> pd.DataFrame:
+    """
+    Find when each (icao24, segment) group crosses the FAP and the threshold of a runway, by linear
+    interpolation between samples, for all the groups at once.
+
+    The crossings are those of the planes perpendicular to the approach axis at the FAP and at the
+    threshold (see RunwayGeometry.along_cross_track), in the direction of the approach, less than
+    max_cross_track from the axis. The crossing times do not depend on the sample density, unlike the
+    timestamps of the nearest samples. For each group, the last threshold crossing and the last FAP
+    crossing before it are kept, on the runway whose threshold is crossed closest to the axis.
+
+    Args:
+        df (pd.DataFrame): Segmented trajectory points (see identify_segments), with the 'east' and
+            'north' columns (see add_enu_columns), or else with 'lat_deg' and 'lon_deg'.
+        max_cross_track (float, optional): Maximum distance to the axis at the crossings [m]. Defaults to 700.
+
+    Returns:
+        pd.DataFrame: One row per group with both crossings (see CROSSING_COLUMNS): the runway, the
+            interpolated times [ms], the distances to the axis at the crossings [m] (positive to the
+            right) and the time from the FAP to the threshold [s].
+    """
+    if 'east' in df.columns and 'north' in df.columns:
+        east, north = df['east'].to_numpy(dtype=float), df['north'].to_numpy(dtype=float)
+    else:
+        scale = MICRODEGREES_PER_DEGREE if is_fixed_point(df) else 1
+        east, north, _ = geodetic_to_enu(df['lat_deg'].to_numpy(dtype=float) / scale,
+                                         df['lon_deg'].to_numpy(dtype=float) / scale)
+
+    # Consecutive samples in time of each group (pairs of positions in the time order)
+    group_id = df.groupby(['icao24', 'segment']).ngroup().to_numpy()
+    ts = df['ts'].to_numpy(dtype=float)
+    time_order = np.lexsort((ts, group_id))
+    group_sorted = group_id[time_order]
+    pairs = np.flatnonzero((group_sorted[1:] == group_sorted[:-1]) & (group_sorted[1:] >= 0))
+    first, second = time_order[pairs], time_order[pairs + 1]
+    pair_group = group_sorted[pairs]
+
+    candidates = []
+    for runway, geometry in RUNWAY_GEOMETRY.items():
+        along, cross = geometry.along_cross_track(east, north)
+        crossings = {}
+        for name, plane in [('fap', 0), ('thr', geometry.length)]:
+            # Crossing of the plane towards the threshold, interpolated between the two samples
+            crossing = (along[first] < plane) & (along[second] >= plane)
+            fraction = (plane - along[first][crossing]) / (along[second][crossing] - along[first][crossing])
+            cross_track = cross[first][crossing] + fraction * (cross[second][crossing] - cross[first][crossing])
+            near_axis = np.abs(cross_track) <= max_cross_track
+            crossings[name] = pd.DataFrame({
+                'group': pair_group[crossing][near_axis],
+                'pair': pairs[crossing][near_axis],
+                'ts': (ts[first][crossing] + fraction * (ts[second][crossing] - ts[first][crossing]))[near_axis],
+                'cross_track': cross_track[near_axis],
+            })
+
+        # Last threshold crossing of each group, and the last FAP crossing before it
+        thr = crossings['thr'].drop_duplicates('group', keep='last').set_index('group')
+        fap = crossings['fap']
+        fap = fap[fap['pair'].to_numpy() <= thr['pair'].reindex(fap['group']).to_numpy()]
+        fap = fap.drop_duplicates('group', keep='last').set_index('group')
+        both = thr.join(fap, how='inner', lsuffix='_thr', rsuffix='_fap')
+        candidates.append(pd.DataFrame({
+            'group': both.index.to_numpy(),
+            'runway': runway,
+            'ts_fap': both['ts_fap'].to_numpy(),
+            'ts_thr': both['ts_thr'].to_numpy(),
+            'cross_track_fap': both['cross_track_fap'].to_numpy(),
+            'cross_track_thr': both['cross_track_thr'].to_numpy(),
+        }))
+
+    # Runway whose threshold is crossed closest to the axis (first runway on ties)
+    results = pd.concat(candidates, ignore_index=True)
+    results = results.iloc[np.lexsort((np.abs(results['cross_track_thr'].to_numpy()),
+                                       results['group'].to_numpy()))]
+    results = results.drop_duplicates('group').reset_index(drop=True)
+
+    # Group keys, from the first sample of each group
+    group_first = time_order[np.searchsorted(group_sorted, results['group'].to_numpy())]
+    results['icao24'] = df['icao24'].to_numpy()[group_first]
+    results['segment'] = df['segment'].to_numpy()[group_first]
+    results['delta_time'] = (results['ts_thr'] - results['ts_fap']) / 1000
+    return results[CROSSING_COLUMNS]
+
+
+def add_crossing_times(basic_info_df: pd.DataFrame, df: pd.DataFrame, max_cross_track: float = 700) -> pd.DataFrame:
+    """
+    Add the interpolated crossing times (see find_axis_crossings) to the basic info of the landings:
+    'ts_fap_crossing', 'ts_thr_crossing' [ms] and 'delta_time_crossing' [s], NaN when the segment does
+    not cross both planes of its runway.
+
+    Args:
+        basic_info_df (pd.DataFrame): Basic info of the landings (see identify_landing_runway_strategies).
+        df (pd.DataFrame): The segmented trajectory points the landings were identified from.
+        max_cross_track (float, optional): See find_axis_crossings. Defaults to 700.
+
+    Returns:
+        pd.DataFrame: A copy of the basic info with the crossing columns.
+    """
+    basic_info_df = basic_info_df.copy()
+    if basic_info_df.empty:
+        return basic_info_df
+    crossings = find_axis_crossings(df, max_cross_track)
+
+    # Segment of each landing, from its THR point
+    keys = pd.DataFrame({'icao24': df.loc[basic_info_df['idx_thr'], 'icao24'].to_numpy(),
+                         'segment': df.loc[basic_info_df['idx_thr'], 'segment'].to_numpy(),
+                         'runway': basic_info_df['runway_fap'].to_numpy()})
+    matched = keys.merge(crossings, on=['icao24', 'segment', 'runway'], how='left')
+    basic_info_df['ts_fap_crossing'] = matched['ts_fap'].to_numpy()
+    basic_info_df['ts_thr_crossing'] = matched['ts_thr'].to_numpy()
+    basic_info_df['delta_time_crossing'] = matched['delta_time'].to_numpy()
+    return basic_info_df
@@ -0,0 +1,207 @@
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+from tools_cache import save_stage_cache, load_stage_cache
+from tools_filter import with_degrees
+from tools_projection import geodetic_to_enu, RUNWAY_GEOMETRY
+
+# Columns of the query results of SpatialIndex
+QUERY_COLUMNS = ['icao24', 'segment', 'target', 'row', 'index', 'distance']
+
+
+def runway_targets(kind: str = 'fap') -> tuple:
+    """
+    Runway reference points in the ENU frame, as query targets of SpatialIndex.
+
+    Args:
+        kind (str, optional): 'fap' or 'thr'. Defaults to 'fap'.
+
+    Returns:
+        tuple: (names, east, north), the runway names and their coordinates [m].
+    """
+    names = list(RUNWAY_GEOMETRY)
+    east = np.array([getattr(RUNWAY_GEOMETRY[runway], f"{kind}_east") for runway in names])
+    north = np.array([getattr(RUNWAY_GEOMETRY[runway], f"{kind}_north") for runway in names])
+    return names, east, north
+
+
+def waypoint_targets(lat, lon, names: list = None) -> tuple:
+    """
+    Arbitrary waypoints in the ENU frame, as query targets of SpatialIndex.
+
+    Args:
+        lat, lon (array-like): Coordinates of the waypoints [deg].
+        names (list, optional): Names of the waypoints. Defaults to their position (0, 1, ...).
+
+    Returns:
+        tuple: (names, east, north)
+    """
+    east, north, _ = geodetic_to_enu(np.atleast_1d(lat), np.atleast_1d(lon))
+    return (list(range(len(east))) if names is None else list(names)), east, north
+
+
+class SpatialIndex:
+    """
+    KD-tree over the horizontal ENU positions of a day of trajectory points, for proximity queries
+    against the runway reference points or arbitrary waypoints (see runway_targets and waypoint_targets).
+
+    Queries run in logarithmic time in the number of points. Their results are DataFrames with one row
+    per matched point (see QUERY_COLUMNS), sorted by (icao24, segment): the target name, the position
+    ('row') and the index label ('index') of the point in the indexed DataFrame, and the horizontal
+    distance [m]. Distances agree with haversine within the accuracy of the ENU frame (see
+    tools_projection).
+
+    The index is stored as the Arrow table of its inputs (the ENU positions and the ids of the indexed
+    points, see to_frame), from which the tree is rebuilt when it is loaded (see from_frame, save and
+    load). The pipeline caches it with the stage-2 (segments) frame it was built from.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        """
+        Args:
+            df (pd.DataFrame): Segmented trajectory points (see identify_segments), with the 'east' and
+                'north' columns of the ENU frame (see tools_projection.add_enu_columns), or else with
+                'lat_deg' and 'lon_deg', which are then projected.
+        """
+        if 'east' in df.columns and 'north' in df.columns:
+            east, north = df['east'].to_numpy(dtype=float), df['north'].to_numpy(dtype=float)
+        else:
+            degrees = with_degrees(df)
+            east, north, _ = geodetic_to_enu(degrees['lat_deg'].to_numpy(dtype=float),
+                                             degrees['lon_deg'].to_numpy(dtype=float))
+
+        # Points without a position are not indexed
+        rows = np.flatnonzero(~np.isnan(east) & ~np.isnan(north))
+        self._build(rows, df['icao24'].to_numpy()[rows], df['segment'].to_numpy()[rows], df.index.to_numpy()[rows],
+                    east[rows], north[rows])
+
+    def _build(self, rows, icao24, segment, index, east, north):
+        self.rows = rows
+        self.icao24 = icao24
+        self.segment = segment
+        self.index = index
+        self.tree = cKDTree(np.column_stack([east, north]))
+
+    def __len__(self):
+        return len(self.rows)
+
+    def _results(self, targets: tuple, target_position, points, distances) -> pd.DataFrame:
+        names = np.asarray(targets[0], dtype=object)
+        results = pd.DataFrame({
+            'icao24': self.icao24[points],
+            'segment': self.segment[points],
+            'target': names[target_position],
+            'row': self.rows[points],
+            'index': self.index[points],
+            'distance': distances,
+        }, columns=QUERY_COLUMNS)
+        return results.sort_values(['icao24', 'segment', 'row'], kind='stable').reset_index(drop=True)
+
+    def query_radius(self, targets: tuple, radius: float) -> pd.DataFrame:
+        """
+        Find all the points within a radius of the targets (e.g. 700 m of any FAP).
+
+        Args:
+            targets (tuple): (names, east, north) of the targets, see runway_targets.
+            radius (float): Radius [m].
+
+        Returns:
+            pd.DataFrame: The matched points, a point matching several targets appearing once per target.
+        """
+        _, east, north = targets
+        target_points = np.column_stack([np.atleast_1d(east), np.atleast_1d(north)])
+        matches = self.tree.query_ball_point(target_points, radius)
+        counts = np.array([len(match) for match in matches], dtype=np.int64)
+        target_position = np.repeat(np.arange(len(matches)), counts)
+        points = np.concatenate([np.asarray(match, dtype=np.int64) for match in matches]) if counts.sum() \
+            else np.zeros(0, dtype=np.int64)
+        distances = np.hypot(self.tree.data[points, 0] - target_points[target_position, 0],
+                             self.tree.data[points, 1] - target_points[target_position, 1])
+        return self._results(targets, target_position, points, distances)
+
+    def query_nearest(self, targets: tuple, k: int = 1, max_distance: float = np.inf) -> pd.DataFrame:
+        """
+        Find the k points nearest to each target.
+
+        Args:
+            targets (tuple): (names, east, north) of the targets, see runway_targets.
+            k (int, optional): Number of points per target. Defaults to 1.
+            max_distance (float, optional): Only return the points within this distance [m].
+                Defaults to no limit.
+
+        Returns:
+            pd.DataFrame: The matched points.
+        """
+        _, east, north = targets
+        target_points = np.column_stack([np.atleast_1d(east), np.atleast_1d(north)])
+        distances, points = self.tree.query(target_points, k=k, distance_upper_bound=max_distance)
+        distances, points = distances.reshape(len(target_points), -1), points.reshape(len(target_points), -1)
+        found = points < len(self.rows)  # Missing neighbours are reported with the number of points
+        target_position = np.nonzero(found)[0]
+        return self._results(targets, target_position, points[found], distances[found])
+
+    def nearest_per_segment(self, targets: tuple, radius: float) -> pd.DataFrame:
+        """
+        Find the point of each (icao24, segment) group nearest to each target, among the points within a
+        radius of it (e.g. the nearest FAP and threshold points that pass the 700 m gates).
+
+        Args:
+            targets (tuple): (names, east, north) of the targets, see runway_targets.
+            radius (float): Radius [m].
+
+        Returns:
+            pd.DataFrame: One row per group and target within the radius (the first point on ties).
+        """
+        results = self.query_radius(targets, radius)
+        results = results.sort_values(['distance', 'row'], kind='stable')
+        results = results.drop_duplicates(['icao24', 'segment', 'target'])
+        return results.sort_values(['icao24', 'segment', 'row'], kind='stable').reset_index(drop=True)
+
+    @staticmethod
+    def groups(results: pd.DataFrame) -> dict:
+        """
+        Rows of the matched points of a query result, grouped by (icao24, segment).
+
+        Returns:
+            dict: {(icao24, segment): array of rows}
+        """
+        return {key: group['row'].to_numpy() for key, group in results.groupby(['icao24', 'segment'])}
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Inputs of the tree, one row per indexed point: its position ('row') and index label ('index') in
+        the indexed DataFrame, its icao24 and segment, and its 'east' and 'north' coordinates [m].
+        """
+        return pd.DataFrame({
+            'row': self.rows,
+            'icao24': self.icao24,
+            'segment': self.segment,
+            'index': self.index,
+            'east': self.tree.data[:, 0],
+            'north': self.tree.data[:, 1],
+        })
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame) -> 'SpatialIndex':
+        """
+        Rebuild an index from the inputs returned by to_frame.
+        """
+        spatial_index = cls.__new__(cls)
+        spatial_index._build(frame['row'].to_numpy(), frame['icao24'].to_numpy(), frame['segment'].to_numpy(),
+                             frame['index'].to_numpy(), frame['east'].to_numpy(dtype=float),
+                             frame['north'].to_numpy(dtype=float))
+        return spatial_index
+
+    def save(self, file: str):
+        """
+        Save the inputs of the index to an Arrow file (see tools_cache.save_stage_cache).
+        """
+        save_stage_cache(self.to_frame(), file)
+
+    @staticmethod
+    def load(file: str) -> 'SpatialIndex':
+        """
+        Load an index saved with save, rebuilding its tree.
+        """
+        return SpatialIndex.from_frame(load_stage_cache(file))
@@ -0,0 +1,183 @@
+import json
+import os
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from tools_filter import sort_dataframe
+from tools_import import scan_adsb_dataset, load_and_process_parquet_files
+
+# Columns used by the processing pipeline, always kept in the compacted store
+STORE_COLUMNS = ['df', 'icao24', 'ts', 'altitude', 'lat_deg', 'lon_deg']
+
+# Name of the manifest file, ignored by pyarrow when scanning the store
+MANIFEST_FILE = '_manifest.json'
+
+
+def file_fingerprint(path: str) -> list:
+    """
+    Fingerprint of a file, used to detect new or modified input files: [path, size, mtime].
+    """
+    stat = os.stat(path)
+    return [path, stat.st_size, stat.st_mtime]
+
+
+def load_manifest(store_path: str) -> dict:
+    """
+    Load the manifest of a compacted store, or an empty one if the store does not exist yet.
+
+    The manifest records the store settings ('columns' and 'bounds') and, for each compacted day
+    ('YYYY-MM-DD'), the fingerprints of the raw files it was built from.
+    """
+    manifest_path = os.path.join(store_path, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        return {'columns': None, 'bounds': None, 'days': {}}
+    with open(manifest_path) as f:
+        return json.load(f)
+
+
+def save_manifest(store_path: str, manifest: dict):
+    """
+    Save the manifest of a compacted store, replacing the previous one atomically.
+    """
+    manifest_path = os.path.join(store_path, MANIFEST_FILE)
+    with open(manifest_path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(manifest_path + '.tmp', manifest_path)
+
+
+def store_day_path(store_path: str, day: date) -> str:
+    """
+    Path of the compacted file of a day: store_path/year=YYYY/month=M/day=D/part-0.parquet.
+    """
+    return os.path.join(store_path, f"year={day.year}", f"month={day.month}", f"day={day.day}",
+                        "part-0.parquet")
+
+
+def compact_adsb_dataset(base_path: str, store_path: str, start_date: date, end_date: date,
+                         bounds: list = None, extra_columns: list = None,
+                         row_group_size: int = 1048576, workers: int = None) -> list:
+    """
+    Build or update a compacted store of the raw hourly ADS-B dataset.
+
+    The raw dataset is read once, keeping only the pipeline columns (see STORE_COLUMNS) plus the
+    optional extra columns, and only the rows with a position and an altitude inside the bounds.
+    Each day is written to a single zstd-compressed parquet file with large row groups, sorted by
+    icao24 and time. The store is partitioned by year/month/day.
+
+    Compaction is incremental: a day is only rebuilt when its raw files changed (new hours, or
+    modified files) since it was last compacted, according to the store manifest.
+
+    Args:
+        base_path (str): Base directory of the raw hive-partitioned dataset.
+        store_path (str): Directory of the compacted store.
+        start_date (date): First day to compact.
+        end_date (date): Last day to compact (inclusive).
+        bounds (list, optional): Geographical box [min_lat, max_lat, min_lon, max_lon] to keep.
+            Defaults to None (all positions are kept).
+        extra_columns (list, optional): Additional raw columns to keep. Defaults to None.
+        row_group_size (int, optional): Maximum number of rows per row group. Defaults to 1048576.
+        workers (int, optional): Number of raw files loaded in parallel. Defaults to None (serial).
+
+    Returns:
+        list: The days (date objects) that were (re)compacted.
+
+    Raises:
+        ValueError: If the store was built with different columns or bounds.
+    """
+    columns = STORE_COLUMNS + [col for col in extra_columns or [] if col not in STORE_COLUMNS]
+    bounds = list(bounds) if bounds is not None else None
+
+    os.makedirs(store_path, exist_ok=True)
+    manifest = load_manifest(store_path)
+    if manifest['days'] and (manifest['columns'] != columns or manifest['bounds'] != bounds):
+        raise ValueError(f"The store {store_path} was built with columns {manifest['columns']} and "
+                         f"bounds {manifest['bounds']}; use a new store path for columns {columns} "
+                         f"and bounds {bounds}")
+    manifest['columns'] = columns
+    manifest['bounds'] = bounds
+
+    # Plan the whole range at once, then group the raw files per day
+    dataset = scan_adsb_dataset(base_path,
+                                datetime(start_date.year, start_date.month, start_date.day, 0),
+                                datetime(end_date.year, end_date.month, end_date.day, 23))
+    files_per_day = {}
+    for fragment in dataset.get_fragments():
+        keys = ds.get_partition_keys(fragment.partition_expression)
+        day = date(keys['year'], keys['month'], keys['day'])
+        files_per_day.setdefault(day, []).append(fragment.path)
+
+    compacted_days = []
+    for day, files in sorted(files_per_day.items()):
+        fingerprints = [file_fingerprint(file) for file in files]
+        day_key = day.isoformat()
+        output_file = store_day_path(store_path, day)
+        if manifest['days'].get(day_key) == fingerprints and os.path.exists(output_file):
+            print(f"Day {day_key} is up to date in {store_path}")
+            continue
+
+        print(f"Compacting day {day_key} ({len(files)} files) ...")
+        df = load_and_process_parquet_files(files, columns_to_extract=columns, bounds=bounds,
+                                            workers=workers)
+        if not df.empty:
+            df = sort_dataframe(df)
+        table = pa.Table.from_pandas(df, preserve_index=False)
+
+        # Write to a temporary file first, so that an interrupted run never leaves a partial day
+        os.makedirs(os.path.dirname(output_file), exist_ok=True)
+        pq.write_table(table, output_file + '.tmp', compression='zstd', row_group_size=row_group_size)
+        os.replace(output_file + '.tmp', output_file)
+
+        manifest['days'][day_key] = fingerprints
+        save_manifest(store_path, manifest)
+        compacted_days.append(day)
+
+    return compacted_days
+
+
+def store_day_files(store_path: str, start_date: date, end_date: date) -> list:
+    """
+    Return the compacted files of the days between the start and end date (inclusive) that are in
+    the store, reporting the missing days.
+    """
+    day_files = []
+    current = start_date
+    while current <= end_date:
+        day_file = store_day_path(store_path, current)
+        if os.path.exists(day_file):
+            day_files.append(day_file)
+        else:
+            print(f"Warning: day {current.isoformat()} is not in the store {store_path}")
+        current += timedelta(days=1)
+    return day_files
+
+
+def load_adsb_store(store_path: str, start_date: date, end_date: date, columns: list = None,
+                    filters=None) -> pd.DataFrame:
+    """
+    Load the days between the start and end date (inclusive) from a compacted store.
+
+    Args:
+        store_path (str): Directory of the compacted store (see compact_adsb_dataset).
+        start_date (date): First day to load.
+        end_date (date): Last day to load (inclusive).
+        columns (list, optional): List of columns to load. Defaults to all the store columns.
+        filters (pyarrow.compute.Expression, optional): Additional row filter, see
+            tools_import.build_parquet_filter. Defaults to None.
+
+    Returns:
+        pd.DataFrame: The data of the requested days, day by day, each day sorted by icao24 and time.
+    """
+    day_files = store_day_files(store_path, start_date, end_date)
+    if not day_files:
+        return pd.DataFrame()
+
+    dataset = ds.dataset(day_files, format='parquet')
+    if columns is not None:
+        columns = [col for col in columns if col in dataset.schema.names]
+    table = dataset.to_table(columns=columns, filter=filters)
+    print(f"Loaded {table.num_rows} rows from {len(day_files)} days of {store_path}")
+    return table.to_pandas()